@@ -1,12 +1,17 @@
 from __future__ import annotations
 
-from pydantic import BaseModel
-from fastapi import APIRouter, HTTPException
-from sqlalchemy import select
+import json
+from typing import Any, List
 
-from app.db.session import db_session
+from pydantic import BaseModel, ValidationError
+from fastapi import APIRouter, HTTPException, Request
+
+from app.db.session import async_db_session
 from app.models.event import MeetingEvent
 from app.models.meeting import Meeting
+from app.services.activity import activity
+from app.services.ingest import existing_meeting_ids, insert_events
+from app.utils.config import EVENTS_BULK_MAX
 
 router = APIRouter(prefix="/events", tags=["events"])
 
@@ -16,12 +21,73 @@ class EventIn(BaseModel):
     author: str | None = None
 
 @router.post("/")
-def ingest_event(payload: EventIn):
-    with db_session() as session:
-        meeting = session.get(Meeting, payload.meeting_id)
+async def ingest_event(payload: EventIn):
+    async with async_db_session() as session:
+        meeting = await session.get(Meeting, payload.meeting_id)
         if not meeting:
             raise HTTPException(status_code=404, detail="Meeting not found")
         event = MeetingEvent(meeting_id=payload.meeting_id, content=payload.content, author=payload.author)
         session.add(event)
-        session.flush()
-        return {"id": event.id}
+        await session.flush()
+        event_id = event.id
+    activity.record(payload.meeting_id, chars=len(payload.content))
+    return {"id": event_id}
+
+def _parse_bulk(body: bytes, content_type: str) -> List[Any]:
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        items = []
+        for n, line in enumerate(body.decode("utf-8").splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=f"Invalid JSON on line {n}: {e}")
+        return items
+    try:
+        data = json.loads(body or b"[]")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON: {e}")
+    if isinstance(data, dict) and isinstance(data.get("events"), list):
+        data = data["events"]
+    if not isinstance(data, list):
+        raise HTTPException(status_code=400, detail="Expected a JSON array of events")
+    return data
+
+async def _ingest_bulk(items: List[Any]) -> dict:
+    results: List[dict] = [{} for _ in items]
+    valid: List[tuple] = []
+    for i, item in enumerate(items):
+        try:
+            valid.append((i, EventIn.model_validate(item)))
+        except ValidationError as e:
+            results[i] = {"index": i, "error": e.errors(include_url=False)}
+    async with async_db_session() as session:
+        # the helpers are shared with the sync stream writer
+        known = await session.run_sync(existing_meeting_ids, {ev.meeting_id for _, ev in valid})
+        to_insert = []
+        for i, ev in valid:
+            if ev.meeting_id in known:
+                to_insert.append((i, ev))
+            else:
+                results[i] = {"index": i, "error": "Meeting not found"}
+        rows = [ev.model_dump() for _, ev in to_insert]
+        ids = await session.run_sync(insert_events, rows)
+    activity.record_rows(rows)
+    for (i, _), event_id in zip(to_insert, ids):
+        results[i] = {"index": i, "id": event_id}
+    return {"inserted": len(ids), "results": results}
+
+@router.post("/bulk")
+async def ingest_events_bulk(request: Request):
+    """Ingest many events in one transaction.
+
+    Accepts a JSON array (or ``{"events": [...]}``) or NDJSON with
+    ``Content-Type: application/x-ndjson``. Items may target different meetings.
+    Results come back in input order; invalid items or unknown meetings are
+    reported per item and do not stop the rest of the batch.
+    """
+    items = _parse_bulk(await request.body(), request.headers.get("content-type", ""))
+    if len(items) > EVENTS_BULK_MAX:
+        raise HTTPException(status_code=413, detail=f"At most {EVENTS_BULK_MAX} events per request")
+    return await _ingest_bulk(items)
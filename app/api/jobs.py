@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, HTTPException
+from sqlalchemy import select
+
+from app.db.session import read_session
+from app.models.job import Job
+from app.services.jobs import job_to_dict
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+@router.get("/{job_id}")
+def get_job(job_id: int):
+    """Status of a background job and of the steps it spawned"""
+    with read_session() as session:
+        job = session.get(Job, job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+        children = list(session.scalars(select(Job).where(Job.parent_id == job_id).order_by(Job.id)).all())
+        return job_to_dict(job, children)
@@ -1,24 +1,39 @@
 from __future__ import annotations
 
+import asyncio
+import json
+from dataclasses import asdict
 from datetime import datetime, timedelta
 from typing import List, Optional
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
+from loguru import logger
 from pydantic import BaseModel, EmailStr
-from sqlalchemy import select
+from sqlalchemy import func, select, tuple_, update
 
-from app.db.session import db_session
+from app.db.session import async_db_session, async_read_session
 from app.models.meeting import Meeting, Participant, MeetingStatus, MeetingSummary
-from app.models.base import Base
-from app.db.session import engine
+from app.services.activity import activity
+from app.services.answer import synthesize_answer
 from app.services.calendar import build_ics_invite
-from app.services.emailer import send_email
-from app.services.summarizer import summarize_text
-from app.services.vector_store import VectorStore
+from app.services.emailer import queue_email
+from app.services.final_notes import enqueue_final_notes, final_notes_job
+from app.services.ingest import StreamClosed, event_buffer, existing_meeting_ids
+from app.services.jobs import runner as job_runner
+from app.services.notifier import (
+    MEETINGS_TOPIC,
+    broadcaster,
+    meeting_topic,
+    publish_meeting,
+    summary_to_dict,
+)
+from app.services.presence import presence
+from app.services.retrieval import retrieve
 from app.models.event import MeetingEvent
-
-# Create tables on first import
-Base.metadata.create_all(bind=engine)
+from app.utils.config import FEED_KEEPALIVE_SECONDS, PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX
+from app.utils.pagination import cache_headers, decode_cursor, encode_cursor, etag_for, not_modified
 
 router = APIRouter(prefix="/meetings", tags=["meetings"])
 
@@ -46,37 +61,123 @@ class MeetingOut(BaseModel):
     class Config:
         from_attributes = True
 
+_MEETING_COLUMNS = (
+    Meeting.id,
+    Meeting.title,
+    Meeting.description,
+    Meeting.status,
+    Meeting.scheduled_start,
+    Meeting.scheduled_end,
+    Meeting.actual_start,
+    Meeting.actual_end,
+    Meeting.created_at,
+)
+
+def _page_size(limit: Optional[int]) -> int:
+    return max(1, min(limit or PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX))
+
+def _keyset(cursor: Optional[str], at_column, id_column):
+    """WHERE clause for rows after ``cursor`` in ``(at, id)`` descending order."""
+    try:
+        at, row_id = decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return tuple_(at_column, id_column) < tuple_(at, row_id)
+
 @router.get("/", response_model=List[MeetingOut])
-def list_meetings():
-    """Get all meetings"""
+async def list_meetings(
+    request: Request,
+    response: Response,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+):
+    """List meetings, newest first, one page at a time.
+
+    The cursor for the next page is in the ``X-Next-Cursor`` header (absent on
+    the last page). Responses carry ``ETag``/``Last-Modified``; a matching
+    ``If-None-Match`` or ``If-Modified-Since`` gets a 304 without loading the page.
+    """
+    size = _page_size(limit)
+    where = [Meeting.status == status] if status else []
+    if cursor:
+        where.append(_keyset(cursor, Meeting.created_at, Meeting.id))
     try:
-        with db_session() as session:
-            stmt = select(Meeting).order_by(Meeting.created_at.desc())
-            meetings = list(session.scalars(stmt).all())
-            # Convert to dicts while session is still open to avoid DetachedInstanceError
-            meetings_data = []
-            for meeting in meetings:
-                meetings_data.append({
-                    "id": meeting.id,
-                    "title": meeting.title,
-                    "description": meeting.description,
-                    "status": meeting.status,
-                    "scheduled_start": meeting.scheduled_start,
-                    "scheduled_end": meeting.scheduled_end,
-                    "actual_start": meeting.actual_start,
-                    "actual_end": meeting.actual_end,
-                })
-            return meetings_data
+        async with async_read_session() as session:
+            # a status change bumps updated_at and a new or deleted meeting changes
+            # the count, so this covers every page; both come from indexes
+            total, last_modified = (await session.execute(
+                select(func.count(Meeting.id), func.max(Meeting.updated_at))
+            )).one()
+            etag = etag_for("meetings", size, cursor, status, total, last_modified)
+            headers = cache_headers(etag, last_modified)
+            if not_modified(request, etag, last_modified):
+                return Response(status_code=304, headers=headers)
+            stmt = (
+                select(*_MEETING_COLUMNS)
+                .where(*where)
+                .order_by(Meeting.created_at.desc(), Meeting.id.desc())
+                .limit(size + 1)
+            )
+            rows = (await session.execute(stmt)).mappings().all()
+    except HTTPException:
+        raise
     except Exception as e:
-        from loguru import logger
         logger.error(f"Error listing meetings: {e}")
         raise HTTPException(status_code=500, detail=f"Error listing meetings: {str(e)}")
+    if len(rows) > size:
+        rows = rows[:size]
+        headers["X-Next-Cursor"] = encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
+    response.headers.update(headers)
+    return [dict(r) for r in rows]
+
+async def _meeting_status(meeting_id: int) -> Optional[str]:
+    async with async_db_session() as session:
+        return await session.scalar(select(Meeting.status).where(Meeting.id == meeting_id))
+
+async def _event_stream(request: Request, topic: str):
+    last_id = request.headers.get("last-event-id")
+    sub = broadcaster.subscribe(topic, int(last_id) if last_id and last_id.isdigit() else None)
+    try:
+        # EventSource reconnects after this many ms if the connection drops
+        yield b"retry: 5000\n\n"
+        while True:
+            try:
+                frame = await asyncio.wait_for(sub.queue.get(), FEED_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    return
+                frame = b": keepalive\n\n"
+            yield frame
+    finally:
+        broadcaster.unsubscribe(sub)
+
+def _sse(request: Request, topic: str) -> StreamingResponse:
+    return StreamingResponse(
+        _event_stream(request, topic),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/feed")
+async def meetings_feed(request: Request):
+    """Server-Sent Events: a ``meeting`` event whenever a meeting is created or changes status."""
+    return _sse(request, MEETINGS_TOPIC)
+
+@router.get("/{meeting_id}/feed")
+async def meeting_feed(request: Request, meeting_id: int):
+    """Server-Sent Events for one meeting: ``summary`` for each new summary and
+    ``meeting`` on status changes. ``resync`` means events were missed and the
+    client should refetch ``/summaries``."""
+    if await _meeting_status(meeting_id) is None:
+        raise HTTPException(status_code=404, detail="Meeting not found")
+    return _sse(request, meeting_topic(meeting_id))
 
 @router.get("/{meeting_id}", response_model=MeetingOut)
-def get_meeting(meeting_id: int):
+async def get_meeting(meeting_id: int):
     """Get a specific meeting"""
-    with db_session() as session:
-        meeting = session.get(Meeting, meeting_id)
+    async with async_read_session() as session:
+        meeting = await session.get(Meeting, meeting_id)
         if not meeting:
             raise HTTPException(status_code=404, detail="Meeting not found")
         # Convert to dict while session is still open
@@ -92,8 +193,8 @@ def get_meeting(meeting_id: int):
         }
 
 @router.post("/", response_model=MeetingOut)
-def create_meeting(payload: MeetingCreateIn):
-    with db_session() as session:
+async def create_meeting(payload: MeetingCreateIn):
+    async with async_db_session() as session:
         meeting = Meeting(
             title=payload.title,
             description=payload.description,
@@ -101,12 +202,12 @@ def create_meeting(payload: MeetingCreateIn):
             scheduled_end=payload.scheduled_end,
         )
         session.add(meeting)
-        session.flush()
-        for p in payload.participants:
-            session.add(Participant(meeting_id=meeting.id, name=p.name, email=str(p.email)))
-        session.flush()
+        await session.flush()
+        participants = [Participant(meeting_id=meeting.id, name=p.name, email=str(p.email)) for p in payload.participants]
+        session.add_all(participants)
+        await session.flush()
         # Convert to dict while session is still open
-        return {
+        result = {
             "id": meeting.id,
             "title": meeting.title,
             "description": meeting.description,
@@ -116,31 +217,32 @@ def create_meeting(payload: MeetingCreateIn):
             "actual_start": meeting.actual_start,
             "actual_end": meeting.actual_end,
         }
+    presence.load(result["id"], participants, replace=True)
+    publish_meeting(result)
+    return result
 
 class MeetingStartIn(BaseModel):
     start_time: Optional[datetime] = None
 
 @router.post("/{meeting_id}/start", response_model=MeetingOut)
-def start_meeting(meeting_id: int, payload: MeetingStartIn = MeetingStartIn()):
-    with db_session() as session:
-        db_meeting = session.get(Meeting, meeting_id)
+async def start_meeting(meeting_id: int, payload: MeetingStartIn = MeetingStartIn()):
+    async with async_db_session() as session:
+        db_meeting = await session.get(Meeting, meeting_id)
         if not db_meeting:
             raise HTTPException(status_code=404, detail="Meeting not found")
         db_meeting.status = MeetingStatus.LIVE
         db_meeting.actual_start = payload.start_time or datetime.utcnow()
+        event_buffer.open_meeting(meeting_id)
         session.add(db_meeting)
-        session.flush()
+        await session.flush()
         # Notify all participants that meeting has started
-        recipients = [p.email for p in db_meeting.participants]
+        # (selected explicitly: relationships cannot lazy-load under asyncio)
+        recipients = list(await session.scalars(select(Participant.email).where(Participant.meeting_id == meeting_id)))
         if recipients:
-            try:
-                send_email(recipients, f"Meeting started: {db_meeting.title}", f"<p>Meeting {db_meeting.title} has started. Please join soon.</p>")
-            except Exception as e:
-                # Don't fail the request if email fails
-                from loguru import logger
-                logger.warning(f"Failed to send email notification: {e}")
+            # queued: delivery (and its failures) happens off the request
+            queue_email(recipients, f"Meeting started: {db_meeting.title}", f"<p>Meeting {db_meeting.title} has started. Please join soon.</p>")
         # Convert to dict while session is still open
-        return {
+        result = {
             "id": db_meeting.id,
             "title": db_meeting.title,
             "description": db_meeting.description,
@@ -150,91 +252,172 @@ def start_meeting(meeting_id: int, payload: MeetingStartIn = MeetingStartIn()):
             "actual_start": db_meeting.actual_start,
             "actual_end": db_meeting.actual_end,
         }
+    # starts the staleness clock, so events sent before the start get summarized too
+    activity.record(meeting_id, events=0)
+    publish_meeting(result)
+    return result
 
 class JoinIn(BaseModel):
     email: EmailStr
 
+async def _load_roster(meeting_id: int) -> None:
+    # once per meeting and process; after that presence never touches the database per ping
+    if not presence.has_roster(meeting_id):
+        async with async_read_session() as session:
+            await session.run_sync(presence.ensure_loaded, [meeting_id])
+
 @router.post("/{meeting_id}/join")
-def join_meeting(meeting_id: int, payload: JoinIn):
-    with db_session() as session:
-        stmt = select(Participant).where(Participant.meeting_id == meeting_id, Participant.email == str(payload.email))
-        participant = session.scalar(stmt)
-        if not participant:
-            raise HTTPException(status_code=404, detail="Participant not found for meeting")
-        participant.joined_at = datetime.utcnow()
-        participant.last_seen_at = participant.joined_at
-        session.add(participant)
-        return {"ok": True}
+async def join_meeting(meeting_id: int, payload: JoinIn):
+    await _load_roster(meeting_id)
+    if not presence.join(meeting_id, str(payload.email)):
+        raise HTTPException(status_code=404, detail="Participant not found for meeting")
+    return {"ok": True}
 
 @router.post("/{meeting_id}/heartbeat")
-def heartbeat(meeting_id: int, payload: JoinIn):
-    with db_session() as session:
-        stmt = select(Participant).where(Participant.meeting_id == meeting_id, Participant.email == str(payload.email))
-        participant = session.scalar(stmt)
-        if not participant:
-            raise HTTPException(status_code=404, detail="Participant not found for meeting")
-        participant.last_seen_at = datetime.utcnow()
-        session.add(participant)
-        return {"ok": True}
+async def heartbeat(meeting_id: int, payload: JoinIn):
+    """Recorded in memory; written to the participant table in the next presence flush."""
+    await _load_roster(meeting_id)
+    if not presence.heartbeat(meeting_id, str(payload.email)):
+        raise HTTPException(status_code=404, detail="Participant not found for meeting")
+    return {"ok": True}
 
-@router.post("/{meeting_id}/end", response_model=MeetingOut)
-def end_meeting(meeting_id: int):
-    with db_session() as session:
-        db_meeting = session.get(Meeting, meeting_id)
-        if not db_meeting:
-            raise HTTPException(status_code=404, detail="Meeting not found")
-        db_meeting.status = MeetingStatus.ENDED
-        db_meeting.actual_end = datetime.utcnow()
-        session.add(db_meeting)
-        session.flush()
-        # build final notes from all events
-        events_stmt = select(MeetingEvent).where(MeetingEvent.meeting_id == db_meeting.id).order_by(MeetingEvent.created_at.asc())
-        all_events = [e.content for e in session.scalars(events_stmt).all()]
-        final_notes = summarize_text(all_events, max_sentences=12) if all_events else ""
-        if final_notes:
-            final_summary = MeetingSummary(
-                meeting_id=db_meeting.id,
-                window_start=db_meeting.actual_start or db_meeting.created_at,
-                window_end=db_meeting.actual_end or datetime.utcnow(),
-                summary_text=final_notes,
-                kind="final",
+@router.get("/{meeting_id}/presence")
+async def get_presence(meeting_id: int):
+    """Who has joined and who is online now (seen within ``PRESENCE_ONLINE_SECONDS``)."""
+    if await _meeting_status(meeting_id) is None:
+        raise HTTPException(status_code=404, detail="Meeting not found")
+    await _load_roster(meeting_id)
+    participants = presence.participants(meeting_id)
+    return {
+        "participants": participants,
+        "joined": sum(p["joined_at"] is not None for p in participants),
+        "online": sum(p["online"] for p in participants),
+    }
+
+class MeetingEndOut(MeetingOut):
+    # poll GET /jobs/{job_id} for notes generation, indexing and email
+    job_id: Optional[int] = None
+
+@router.post("/{meeting_id}/end", response_model=MeetingEndOut)
+async def end_meeting(meeting_id: int):
+    if await _meeting_status(meeting_id) is None:
+        raise HTTPException(status_code=404, detail="Meeting not found")
+    # stop the meeting's streams and wait for their buffered fragments, so the
+    # final notes job reads the whole transcript
+    event_buffer.close_meeting(meeting_id)
+    try:
+        if not await run_in_threadpool(event_buffer.wait_written, meeting_id):
+            logger.warning(f"Streamed fragments of meeting {meeting_id} not written yet; final notes may miss them")
+        async with async_db_session() as session:
+            # only the first end of a session takes effect; a retried or concurrent
+            # one gets the same job back
+            ended = await session.execute(
+                update(Meeting)
+                .where(Meeting.id == meeting_id, Meeting.status != MeetingStatus.ENDED)
+                .values(status=MeetingStatus.ENDED, actual_end=datetime.utcnow())
             )
-            session.add(final_summary)
-            # persist to vector store
-            vs = VectorStore()
-            vs.add_texts([final_notes])
-            # email notes to participants
-            recipients = [p.email for p in db_meeting.participants]
-            if recipients:
-                try:
-                    send_email(recipients, f"Notes: {db_meeting.title}", f"<p>{final_notes}</p>")
-                except Exception as e:
-                    # Don't fail the request if email fails
-                    from loguru import logger
-                    logger.warning(f"Failed to send email notification: {e}")
-        # Convert to dict while session is still open
-        return {
-            "id": db_meeting.id,
-            "title": db_meeting.title,
-            "description": db_meeting.description,
-            "status": db_meeting.status,
-            "scheduled_start": db_meeting.scheduled_start,
-            "scheduled_end": db_meeting.scheduled_end,
-            "actual_start": db_meeting.actual_start,
-            "actual_end": db_meeting.actual_end,
-        }
+            db_meeting = await session.get(Meeting, meeting_id)
+            if not db_meeting:
+                raise HTTPException(status_code=404, detail="Meeting not found")
+            if ended.rowcount:
+                # final notes, indexing and email run as a durable background job
+                job = await session.run_sync(enqueue_final_notes, db_meeting)
+            else:
+                job = await session.run_sync(final_notes_job, meeting_id)
+            # Convert to dict while session is still open
+            result = {
+                "id": db_meeting.id,
+                "title": db_meeting.title,
+                "description": db_meeting.description,
+                "status": db_meeting.status,
+                "scheduled_start": db_meeting.scheduled_start,
+                "scheduled_end": db_meeting.scheduled_end,
+                "actual_start": db_meeting.actual_start,
+                "actual_end": db_meeting.actual_end,
+                "job_id": job.id if job else None,
+            }
+    finally:
+        # the status now turns new streams away; open ones still get closed
+        event_buffer.release_meeting(meeting_id)
+    if ended.rowcount:
+        presence.retire(meeting_id)
+        publish_meeting(result)
+        job_runner.wake()
+    return result
+
+def _fragments(message: str, meeting_id: int, author: Optional[str]) -> List[dict]:
+    """A frame is plain text, one ``{"content", "author"}`` object, or a list of them."""
+    try:
+        data = json.loads(message)
+    except ValueError:
+        data = message
+    # a caption such as "2024" or "null" parses as a JSON scalar but is still text
+    if isinstance(data, dict):
+        data = [data]
+    elif not isinstance(data, list):
+        data = [message]
+    rows = []
+    for item in data:
+        if isinstance(item, dict):
+            content, who = item.get("content"), item.get("author") or author
+        else:
+            content, who = item, author
+        if isinstance(content, str) and content.strip():
+            rows.append({"meeting_id": meeting_id, "content": content, "author": who})
+    return rows
+
+@router.websocket("/{meeting_id}/stream")
+async def stream_transcript(websocket: WebSocket, meeting_id: int, author: Optional[str] = None):
+    """Continuous transcript ingestion for live captioning clients.
+
+    Each text frame carries one or more fragments and is acknowledged with
+    ``{"accepted": total, "pending": n}``. Fragments are buffered and written in
+    batches; while the buffer is full the server sends ``{"backpressure": true}``
+    once and stops reading until the writer catches up.
+    """
+    status = await _meeting_status(meeting_id)
+    if status is None or status == MeetingStatus.ENDED:
+        await websocket.close(code=4404 if status is None else 4409)
+        return
+    try:
+        event_buffer.attach(meeting_id)
+    except StreamClosed:
+        await websocket.close(code=4409)
+        return
+    await websocket.accept()
+    accepted = 0
+    try:
+        while True:
+            rows = _fragments(await websocket.receive_text(), meeting_id, author)
+            warned = False
+            for row in rows:
+                while not event_buffer.try_put(row):
+                    # not reading the socket meanwhile pushes back on the client too
+                    if not warned:
+                        await websocket.send_json({"backpressure": True, "pending": event_buffer.pending})
+                        warned = True
+                    await asyncio.sleep(0.05)
+                accepted += 1
+            await websocket.send_json({"accepted": accepted, "pending": event_buffer.pending})
+    except StreamClosed:
+        # the meeting ended while streaming; fragments from this frame on are not part of it
+        await websocket.close(code=4409)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        event_buffer.detach(meeting_id)
 
 class InviteIn(BaseModel):
     start: datetime
     end: datetime
 
 @router.post("/{meeting_id}/invite")
-def send_invites(meeting_id: int, payload: InviteIn):
-    with db_session() as session:
-        meeting = session.get(Meeting, meeting_id)
+async def send_invites(meeting_id: int, payload: InviteIn):
+    async with async_db_session() as session:
+        meeting = await session.get(Meeting, meeting_id)
         if not meeting:
             raise HTTPException(status_code=404, detail="Meeting not found")
-        recipients = [p.email for p in meeting.participants]
+        recipients = list(await session.scalars(select(Participant.email).where(Participant.meeting_id == meeting_id)))
         ics_bytes = build_ics_invite(meeting.title, meeting.description or "", payload.start, payload.end, recipients)
         subject = f"Invitation: {meeting.title}"
         body = f"""
@@ -245,61 +428,100 @@ def send_invites(meeting_id: int, payload: InviteIn):
             body += f"<p><strong>Description:</strong> {meeting.description}</p>"
         body += "<p>Please find the calendar invite attached to this email.</p>"
         if recipients:
-            try:
-                send_email(
-                    recipients, 
-                    subject, 
-                    body,
-                    attachment_data=ics_bytes,
-                    attachment_filename="meeting.ics",
-                    attachment_content_type="text/calendar; charset=utf-8; method=REQUEST"
-                )
-            except Exception as e:
-                # Don't fail the request if email fails
-                from loguru import logger
-                logger.warning(f"Failed to send calendar invite email: {e}")
+            queue_email(
+                recipients,
+                subject,
+                body,
+                attachment_data=ics_bytes,
+                attachment_filename="meeting.ics",
+                attachment_content_type="text/calendar; charset=utf-8; method=REQUEST"
+            )
         return {"ok": True}
 
 class RagIn(BaseModel):
     question: str
+    # search these meetings instead of only the one in the path
+    meeting_ids: Optional[List[int]] = None
+    kinds: Optional[List[str]] = None
 
 @router.get("/{meeting_id}/summaries")
-def get_summaries(meeting_id: int):
-    with db_session() as session:
-        db_meeting = session.get(Meeting, meeting_id)
+async def get_summaries(
+    request: Request,
+    meeting_id: int,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    kind: Optional[str] = None,
+):
+    """Summaries for a meeting, newest window first, one page at a time.
+
+    Like ``list_meetings``, the cursor for the next page is in the
+    ``X-Next-Cursor`` header (absent on the last page).
+
+    Summaries are append-only, so their count and newest id identify the
+    response; unchanged pages come back as 304.
+    """
+    size = _page_size(limit)
+    where = [MeetingSummary.meeting_id == meeting_id]
+    if kind:
+        where.append(MeetingSummary.kind == kind)
+    if cursor:
+        where.append(_keyset(cursor, MeetingSummary.window_end, MeetingSummary.id))
+    async with async_read_session() as session:
+        db_meeting = await session.get(Meeting, meeting_id)
         if not db_meeting:
             raise HTTPException(status_code=404, detail="Meeting not found")
-        stmt = select(MeetingSummary).where(MeetingSummary.meeting_id == meeting_id).order_by(MeetingSummary.window_end.desc())
-        summaries = list(session.scalars(stmt).all())
-        return {
-            "summaries": [
-                {
-                    "id": s.id,
-                    "kind": s.kind,
-                    "window_start": s.window_start.isoformat(),
-                    "window_end": s.window_end.isoformat(),
-                    "summary_text": s.summary_text,
-                }
-                for s in summaries
-            ]
-        }
+        total, newest_id, last_modified = (await session.execute(
+            select(func.count(MeetingSummary.id), func.max(MeetingSummary.id), func.max(MeetingSummary.created_at))
+            .where(MeetingSummary.meeting_id == meeting_id)
+        )).one()
+        etag = etag_for("summaries", meeting_id, size, cursor, kind, total, newest_id)
+        headers = cache_headers(etag, last_modified)
+        if not_modified(request, etag, last_modified):
+            return Response(status_code=304, headers=headers)
+        stmt = (
+            select(MeetingSummary)
+            .where(*where)
+            .order_by(MeetingSummary.window_end.desc(), MeetingSummary.id.desc())
+            .limit(size + 1)
+        )
+        summaries = list((await session.scalars(stmt)).all())
+        if len(summaries) > size:
+            summaries = summaries[:size]
+            headers["X-Next-Cursor"] = encode_cursor(summaries[-1].window_end, summaries[-1].id)
+        body = {"summaries": [summary_to_dict(s) for s in summaries]}
+    return JSONResponse(body, headers=headers)
 
 @router.post("/{meeting_id}/rag")
-def rag_query(meeting_id: int, payload: RagIn):
-    with db_session() as session:
-        db_meeting = session.get(Meeting, meeting_id)
-        if not db_meeting:
-            raise HTTPException(status_code=404, detail="Meeting not found")
-    
-    # simple global index; in prod, partition per meeting
-    vs = VectorStore()
-    hits = vs.query(payload.question, k=5)
-    
-    # If no hits and vector store is not available, provide helpful message
-    if not hits:
-        from loguru import logger
-        if not hasattr(vs, 'model') or vs.model is None:
-            logger.warning("Vector store not available for RAG query")
+async def rag_query(meeting_id: int, payload: RagIn):
+    meeting_ids = payload.meeting_ids or [meeting_id]
+    async with async_read_session() as session:
+        known = await session.run_sync(existing_meeting_ids, [meeting_id, *meeting_ids])
+    if meeting_id not in known:
+        raise HTTPException(status_code=404, detail="Meeting not found")
+    unknown = sorted(set(meeting_ids) - known)
+    if unknown:
+        raise HTTPException(status_code=404, detail=f"Meetings not found: {unknown}")
+
+    # BM25 works without embeddings; with them, dense and BM25 rankings are fused.
+    # Encoding the question and searching are CPU-bound; keep them off the event loop
+    hits = await run_in_threadpool(retrieve, payload.question, k=5, meeting_ids=meeting_ids, kinds=payload.kinds)
+    answer = await run_in_threadpool(synthesize_answer, payload.question, hits)
     
-    return {"answers": [{"text": h.text, "score": h.score} for h in hits]}
+    return {
+        # the hits' most relevant sentences, each marked [n] for its entry in citations
+        "answer": asdict(answer),
+        "answers": [
+            {
+                "text": h.text,
+                "score": h.score,
+                "meeting_id": h.meeting_id,
+                "kind": h.kind,
+                "ref": h.ref,
+                # transcript hits: the events they came from, e.g. to jump to that point of the meeting
+                "event_ids": h.event_ids,
+                "authors": h.authors,
+            }
+            for h in hits
+        ]
+    }
 
@@ -1,20 +1,127 @@
 from __future__ import annotations
 
-from contextlib import contextmanager
-from typing import Generator
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncGenerator, Dict, Generator
 
-from sqlalchemy import create_engine
+from sqlalchemy import MetaData, create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
-DATABASE_URL = "sqlite:///./meeting_helper.db"
-
-engine = create_engine(
+from app.utils.config import (
+    DATABASE_READ_URL,
     DATABASE_URL,
-    connect_args={"check_same_thread": False},
-    pool_pre_ping=True,
+    DB_MAX_OVERFLOW,
+    DB_POOL_RECYCLE_SECONDS,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT_SECONDS,
+    SQLITE_BUSY_TIMEOUT_MS,
+    SQLITE_CACHE_SIZE_KB,
+    SQLITE_MMAP_SIZE,
+    SQLITE_SYNCHRONOUS,
 )
 
+# asyncio drivers for the sync URLs DATABASE_URL is usually given as
+_ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg", "mysql": "aiomysql"}
+
+
+def async_url(url: str) -> str:
+    """The same database through its asyncio driver, e.g. ``sqlite://`` -> ``sqlite+aiosqlite://``."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in _ASYNC_DRIVERS or parsed.get_driver_name() in _ASYNC_DRIVERS.values():
+        return url
+    return parsed.set(drivername=f"{backend}+{_ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+
+def _is_sqlite(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def _is_memory(url: str) -> bool:
+    return make_url(url).database in (None, "", ":memory:")
+
+
+def engine_options(url: str, is_async: bool = False) -> Dict[str, Any]:
+    """``create_engine`` keyword arguments for the profile ``url`` calls for.
+
+    SQLite keeps SQLAlchemy's default pool (one file, writes serialize
+    anyway) and is tuned through pragmas instead; server databases get a
+    sized, recycled pool.
+    """
+    if _is_sqlite(url):
+        # sessions are handed between request, writer and scheduler threads
+        return {} if is_async else {"connect_args": {"check_same_thread": False}}
+    return {
+        "pool_pre_ping": True,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": DB_POOL_RECYCLE_SECONDS,
+    }
+
+
+def sqlite_pragmas(read_only: bool = False) -> Dict[str, Any]:
+    pragmas: Dict[str, Any] = {
+        # WAL: readers never block the writer and the writer never blocks readers
+        "journal_mode": "wal",
+        # with WAL, NORMAL only risks the last transactions on power loss, never corruption
+        "synchronous": SQLITE_SYNCHRONOUS,
+        "cache_size": -SQLITE_CACHE_SIZE_KB,  # negative: KiB rather than pages
+        "mmap_size": SQLITE_MMAP_SIZE,
+        # wait for a lock instead of failing with "database is locked"
+        "busy_timeout": SQLITE_BUSY_TIMEOUT_MS,
+    }
+    if read_only:
+        # journal_mode is a property of the file, set by the writer
+        del pragmas["journal_mode"]
+        pragmas["query_only"] = "on"
+    return pragmas
+
+
+def apply_sqlite_pragmas(target: Engine, read_only: bool = False) -> None:
+    """Run the profile's pragmas on every new connection of ``target`` (a sync or async engine)."""
+    pragmas = sqlite_pragmas(read_only)
+
+    @event.listens_for(getattr(target, "sync_engine", target), "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def make_engines(url: str, read_only: bool = False):
+    """A sync and an async engine on ``url``; SQLite ones get the pragma profile."""
+    sync = create_engine(url, **engine_options(url))
+    aio = create_async_engine(async_url(url), **engine_options(url, is_async=True))
+    if _is_sqlite(url):
+        apply_sqlite_pragmas(sync, read_only)
+        apply_sqlite_pragmas(aio, read_only)
+    return sync, aio
+
+
+engine, async_engine = make_engines(DATABASE_URL)
+
+# Reads that need no transaction of their own (listings, lookups, feed checks) go to a
+# separate pool: DATABASE_READ_URL (e.g. a replica) or, for a SQLite file, query_only
+# connections to the same file, which under WAL read a snapshot without waiting on writers.
+if DATABASE_READ_URL:
+    read_engine, async_read_engine = make_engines(DATABASE_READ_URL, read_only=_is_sqlite(DATABASE_READ_URL))
+elif _is_sqlite(DATABASE_URL) and not _is_memory(DATABASE_URL):
+    read_engine, async_read_engine = make_engines(DATABASE_URL, read_only=True)
+else:
+    read_engine, async_read_engine = engine, async_engine
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+# expire_on_commit=False: attributes stay readable after commit without another (awaited) load
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+AsyncReadSessionLocal = async_sessionmaker(async_read_engine, autoflush=False, expire_on_commit=False)
+
 
 @contextmanager
 def db_session() -> Generator:
@@ -28,3 +135,59 @@ def db_session() -> Generator:
     finally:
         session.close()
 
+
+@asynccontextmanager
+async def async_db_session() -> AsyncGenerator[AsyncSession, None]:
+    """``db_session`` for async routes: every query is awaited, nothing blocks the event loop.
+
+    Relationships are not lazy-loaded in async code; select what you need.
+    Sync helpers that take a ``Session`` can run via ``await session.run_sync(fn, ...)``.
+    """
+    session = AsyncSessionLocal()
+    try:
+        yield session
+        await session.commit()
+    except Exception:
+        await session.rollback()
+        raise
+    finally:
+        await session.close()
+
+
+@contextmanager
+def read_session() -> Generator:
+    """Session on the read pool; never commits, so it must not write."""
+    session = ReadSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@asynccontextmanager
+async def async_read_session() -> AsyncGenerator[AsyncSession, None]:
+    """``read_session`` for async routes."""
+    session = AsyncReadSessionLocal()
+    try:
+        yield session
+    finally:
+        await session.close()
+
+
+def ensure_indexes(metadata: MetaData) -> None:
+    """Create indexes added to models after their tables already exist.
+
+    ``create_all`` skips existing tables entirely, indexes included.
+    """
+    for table in metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+
+def init_db() -> None:
+    """Create missing tables and indexes; run once at startup, not on import."""
+    from app.models import event, job, meeting  # noqa: F401  (register every table on Base.metadata)
+    from app.models.base import Base
+
+    Base.metadata.create_all(bind=engine)
+    ensure_indexes(Base.metadata)
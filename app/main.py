@@ -1,3 +1,6 @@
+import threading
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
@@ -5,10 +8,49 @@ from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 from app.api.meetings import router as meetings_router
 from app.api.events import router as events_router
+from app.api.jobs import router as jobs_router
+from app.db.session import init_db
+from app.utils import metrics
 from app.utils.config import WEB_ORIGIN
-from app.services.scheduler import start_scheduler
+from app.services.chunker import chunk_indexer
+from app.services.emailer import mail_queue
+from app.services.ingest import event_buffer
+from app.services.jobs import runner as job_runner
+from app.services.lexical_index import get_lexical_index
+from app.services.presence import presence
+from app.services.scheduler import start_scheduler, stop_scheduler
+from app.services.summarizer import shutdown_pool
+from app.services.vector_store import get_vector_store
+
+
+def _load_models() -> None:
+    get_vector_store()
+    chunk_indexer.start()
+
 
-app = FastAPI(title="GenAI Meeting Helper", version="0.1.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    init_db()
+    job_runner.start()
+    # background scheduler for rolling summaries, absentee checks and index syncs
+    start_scheduler()
+    # the embedding model takes seconds to load: serve requests meanwhile, a RAG
+    # query arriving first waits for it in get_vector_store
+    warm_up = threading.Thread(target=_load_models, name="model-warm-up", daemon=True)
+    warm_up.start()
+    yield
+    stop_scheduler()
+    warm_up.join(timeout=30)
+    chunk_indexer.stop()
+    event_buffer.stop()
+    presence.flush()
+    job_runner.stop()
+    get_lexical_index().flush()
+    mail_queue.stop()
+    shutdown_pool()
+
+
+app = FastAPI(title="GenAI Meeting Helper", version="0.1.0", lifespan=lifespan)
 
 # CORS configuration - allow all localhost origins
 # Note: Cannot use "*" with allow_credentials=True, so we list specific origins
@@ -88,8 +130,10 @@ def root():
 def health():
     return {"healthy": True}
 
+@app.get("/metrics")
+def get_metrics():
+    return metrics.snapshot()
+
 app.include_router(meetings_router)
 app.include_router(events_router)
-
-# start background scheduler for rolling summaries
-start_scheduler()
+app.include_router(jobs_router)
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import ForeignKey, Index, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+class JobStatus:
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+class Job(Base):
+    kind: Mapped[str] = mapped_column(String(64))
+    meeting_id: Mapped[Optional[int]] = mapped_column(ForeignKey("meeting.id", ondelete="CASCADE"), index=True, default=None)
+    parent_id: Mapped[Optional[int]] = mapped_column(ForeignKey("job.id", ondelete="CASCADE"), index=True, default=None)
+    status: Mapped[str] = mapped_column(String(32), default=JobStatus.PENDING)
+    payload: Mapped[Optional[str]] = mapped_column(Text, default=None)  # JSON
+    attempts: Mapped[int] = mapped_column(default=0)
+    max_attempts: Mapped[int] = mapped_column(default=5)
+    run_after: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, default=None)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(default=None)
+
+    __table_args__ = (
+        Index("ix_job_status_run_after", "status", "run_after"),
+    )
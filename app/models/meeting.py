@@ -26,6 +26,14 @@ class Meeting(Base):
     summaries: Mapped[List["MeetingSummary"]] = relationship(back_populates="meeting", cascade="all, delete-orphan")
     events: Mapped[List["MeetingEvent"]] = relationship(back_populates="meeting", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # keyset pagination of the meetings list, newest first, optionally by status
+        Index("ix_meeting_created_id", "created_at", "id"),
+        Index("ix_meeting_status_created_id", "status", "created_at", "id"),
+        # max(updated_at) for the list's ETag
+        Index("ix_meeting_updated_at", "updated_at"),
+    )
+
 class Participant(Base):
     meeting_id: Mapped[int] = mapped_column(ForeignKey("meeting.id", ondelete="CASCADE"), index=True)
     name: Mapped[str] = mapped_column(String(255))
@@ -49,3 +57,16 @@ class MeetingSummary(Base):
 
     meeting: Mapped[Meeting] = relationship(back_populates="summaries")
 
+    __table_args__ = (
+        Index("ix_meetingsummary_meeting_window_end_id", "meeting_id", "window_end", "id"),
+    )
+
+
+class SummaryWatermark(Base):
+    """Highest ``MeetingEvent.id`` covered by a meeting's rolling summaries.
+
+    Advanced in the same transaction that writes the summaries, so every
+    event lands in exactly one rolling summary across delays and restarts.
+    """
+    meeting_id: Mapped[int] = mapped_column(ForeignKey("meeting.id", ondelete="CASCADE"), unique=True)
+    last_event_id: Mapped[int] = mapped_column(default=0)
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Dict, Iterable, List
+
+from app.utils import metrics
+from app.utils.config import ROLLING_TRIGGER_CHARS, ROLLING_TRIGGER_EVENTS
+
+
+class _Pending:
+    __slots__ = ("events", "chars", "since")
+
+    def __init__(self) -> None:
+        self.events = 0
+        self.chars = 0
+        self.since = time.monotonic()
+
+
+class ActivityTracker:
+    """Transcript volume each meeting has received since its last rolling summary.
+
+    Ingest paths call ``record`` after their transaction commits. The
+    scheduler asks ``take_due`` which meetings have enough new material (or
+    have waited long enough) to be worth summarizing, so a meeting nobody is
+    talking in is never queried.
+    """
+
+    def __init__(self, event_threshold: int = ROLLING_TRIGGER_EVENTS, char_threshold: int = ROLLING_TRIGGER_CHARS) -> None:
+        self.event_threshold = event_threshold
+        self.char_threshold = char_threshold
+        self._pending: Dict[int, _Pending] = {}
+        self._lock = threading.Lock()
+        self._by_volume = metrics.counter("rolling.triggered_by_volume")
+        self._by_staleness = metrics.counter("rolling.triggered_by_staleness")
+        metrics.register("rolling.pending", self)
+
+    def record(self, meeting_id: int, events: int = 1, chars: int = 0) -> None:
+        with self._lock:
+            entry = self._pending.get(meeting_id)
+            if entry is None:
+                entry = self._pending[meeting_id] = _Pending()
+            entry.events += events
+            entry.chars += chars
+
+    def record_rows(self, rows: Iterable[Dict]) -> None:
+        """``record`` for inserted event rows (``meeting_id`` and ``content``), totalled per meeting first."""
+        totals: Dict[int, List[int]] = {}
+        for row in rows:
+            t = totals.setdefault(row["meeting_id"], [0, 0])
+            t[0] += 1
+            t[1] += len(row["content"])
+        for meeting_id, (events, chars) in totals.items():
+            self.record(meeting_id, events, chars)
+
+    def take_due(self, max_staleness: float) -> List[int]:
+        """Meetings past a volume threshold or holding events older than ``max_staleness`` seconds.
+
+        Their counters are cleared; anything ingested from here on counts
+        towards the next summary.
+        """
+        now = time.monotonic()
+        due: List[int] = []
+        with self._lock:
+            for meeting_id, entry in list(self._pending.items()):
+                if entry.events >= self.event_threshold or entry.chars >= self.char_threshold:
+                    self._by_volume.inc()
+                elif now - entry.since >= max_staleness:
+                    self._by_staleness.inc()
+                else:
+                    continue
+                del self._pending[meeting_id]
+                due.append(meeting_id)
+        return due
+
+    def discard(self, meeting_id: int) -> None:
+        """The meeting ended; its final notes cover whatever was pending."""
+        with self._lock:
+            self._pending.pop(meeting_id, None)
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "meetings": len(self._pending),
+                "events": sum(e.events for e in self._pending.values()),
+            }
+
+
+activity = ActivityTracker()
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import functools
+import math
+import time
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from app.utils.config import VECTOR_EF_SEARCH, VECTOR_HNSW_M, VECTOR_NPROBE, VECTOR_PQ_M
+
+FLAT = "flat"
+IVFPQ = "ivfpq"
+HNSW = "hnsw"
+MODES = (FLAT, IVFPQ, HNSW)
+
+# faiss wants roughly 39 training points per IVF list; cap the sample so training stays cheap
+_TRAIN_POINTS_PER_LIST = 64
+
+
+@functools.lru_cache(maxsize=None)
+def load_faiss():
+    """The faiss module, or None if it is not installed.
+
+    Imported on first use rather than with this module: only the ANN modes
+    and legacy index imports need it, and it is slow to load.
+    """
+    try:
+        import faiss
+    except ImportError:
+        return None
+    return faiss
+
+
+def _pq_subquantizers(dimension: int, preferred: int) -> int:
+    """Largest divisor of ``dimension`` that is <= ``preferred``."""
+    for m in range(min(preferred, dimension), 0, -1):
+        if dimension % m == 0:
+            return m
+    return 1
+
+
+def nlist_for(n: int) -> int:
+    return max(1, min(int(4 * math.sqrt(n)), n // _TRAIN_POINTS_PER_LIST or 1))
+
+
+def train_size(n: int) -> int:
+    """Rows to sample for training: enough for the IVF lists and the 256-centroid PQ codebooks."""
+    return min(n, max(nlist_for(n) * _TRAIN_POINTS_PER_LIST, 256 * 39))
+
+
+def build_index(
+    mode: str,
+    dimension: int,
+    chunks: Iterator[np.ndarray],
+    total: int,
+    train_sample: np.ndarray,
+):
+    """Train (if needed) and fill an ANN index for inner-product search.
+
+    ``chunks`` yields the rows in global order so faiss ids match store positions.
+    """
+    faiss = load_faiss()
+    if faiss is None:
+        raise RuntimeError("faiss is required for ANN index modes")
+    if mode == HNSW:
+        index = faiss.IndexHNSWFlat(dimension, VECTOR_HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efSearch = VECTOR_EF_SEARCH
+    elif mode == IVFPQ:
+        nlist = nlist_for(total)
+        quantizer = faiss.IndexFlatIP(dimension)
+        m = _pq_subquantizers(dimension, VECTOR_PQ_M)
+        index = faiss.IndexIVFPQ(quantizer, dimension, nlist, m, 8, faiss.METRIC_INNER_PRODUCT)
+        index.train(np.ascontiguousarray(train_sample, dtype="float32"))
+        index.nprobe = min(VECTOR_NPROBE, nlist)
+    else:
+        raise ValueError(f"Unknown ANN index mode: {mode}")
+    for chunk in chunks:
+        index.add(np.ascontiguousarray(chunk, dtype="float32"))
+    return index
+
+
+def set_search_param(index, value: int) -> None:
+    """Set ``nprobe`` (IVF) or ``efSearch`` (HNSW)."""
+    if hasattr(index, "hnsw"):
+        index.hnsw.efSearch = int(value)
+    else:
+        index.nprobe = int(value)
+
+
+def get_search_param(index) -> int:
+    if hasattr(index, "hnsw"):
+        return int(index.hnsw.efSearch)
+    return int(index.nprobe)
+
+
+def search_param_name(index) -> str:
+    return "efSearch" if hasattr(index, "hnsw") else "nprobe"
+
+
+def recall_report(
+    index,
+    exact_search,
+    queries: np.ndarray,
+    k: int = 10,
+    values: Optional[Sequence[int]] = None,
+) -> List[Dict[str, float]]:
+    """Recall@k and latency of ``index`` for each search parameter in ``values``.
+
+    ``exact_search(q, k)`` must return the true top-k positions for one query;
+    it is the flat scan the ANN index is approximating.
+    """
+    if values is None:
+        values = [1, 2, 4, 8, 16, 32, 64, 128] if not hasattr(index, "hnsw") else [16, 32, 64, 128, 256]
+    queries = np.ascontiguousarray(queries, dtype="float32")
+    truth = [set(exact_search(q, k)) for q in queries]
+    original = get_search_param(index)
+    report: List[Dict[str, float]] = []
+    try:
+        for value in values:
+            set_search_param(index, value)
+            latencies: List[float] = []
+            found = 0
+            for q, expected in zip(queries, truth):
+                t0 = time.perf_counter()
+                _, idxs = index.search(q.reshape(1, -1), k)
+                latencies.append((time.perf_counter() - t0) * 1000.0)
+                found += len(expected.intersection(int(i) for i in idxs[0] if i >= 0))
+            total = sum(len(t) for t in truth) or 1
+            report.append({
+                search_param_name(index): value,
+                f"recall@{k}": found / total,
+                "mean_ms": float(np.mean(latencies)),
+                "p99_ms": float(np.percentile(latencies, 99)),
+            })
+    finally:
+        set_search_param(index, original)
+    return report
+
+
+if __name__ == "__main__":
+    # print a recall/latency table for the configured store: python -m app.services.ann_index
+    import argparse
+
+    from app.services.vector_store import get_vector_store
+
+    parser = argparse.ArgumentParser(description="Recall@k vs latency for the ANN vector index")
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--values", type=int, nargs="*")
+    args = parser.parse_args()
+    for row in get_vector_store().recall_report(k=args.k, sample=args.queries, values=args.values):
+        print("  ".join(f"{key}={val:.4g}" if isinstance(val, float) else f"{key}={val}" for key, val in row.items()))
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.summarizer import split_sentences
+from app.services.vector_store import VectorHit
+from app.utils import metrics
+from app.utils.config import RAG_ANSWER_BUDGET_MS, RAG_ANSWER_MAX_INPUT, RAG_ANSWER_SENTENCES, RAG_MMR_LAMBDA
+
+_answer_ms = metrics.histogram("rag.answer_ms")
+
+
+@dataclass
+class Citation:
+    n: int  # the [n] marker used in the answer text
+    ref: Optional[str] = None
+    meeting_id: Optional[int] = None
+    kind: Optional[str] = None
+    event_ids: Optional[List[int]] = None
+
+
+@dataclass
+class Answer:
+    text: str
+    citations: List[Citation] = field(default_factory=list)
+
+
+def mmr(relevance: np.ndarray, similarity: np.ndarray, k: int, lambda_: float, deadline: Optional[float] = None) -> List[int]:
+    """Greedy maximal marginal relevance: up to ``k`` indices, in the order picked.
+
+    Each step takes the candidate maximizing
+    ``lambda_ * relevance - (1 - lambda_) * max similarity to those picked``;
+    ties go to the lower index. Candidates with no relevance are skipped, and
+    selection stops early once the best candidate would add more redundancy
+    than relevance. Past ``deadline`` (a ``perf_counter`` value) the picks so
+    far are returned, but there is always at least one.
+    """
+    n = len(relevance)
+    picked: List[int] = []
+    if n == 0 or k <= 0:
+        return picked
+    redundancy = np.zeros(n)
+    available = relevance > 0
+    while len(picked) < k and available.any():
+        if picked and deadline is not None and time.perf_counter() > deadline:
+            break
+        scores = np.where(available, lambda_ * relevance - (1.0 - lambda_) * redundancy, -np.inf)
+        best = int(np.argmax(scores))
+        if picked and scores[best] <= 0:
+            break
+        picked.append(best)
+        available[best] = False
+        redundancy = np.maximum(redundancy, similarity[best])
+    return picked
+
+
+def _sentences(hits: Sequence[VectorHit], limit: int) -> List[Tuple[int, int, str]]:
+    """(hit, position, sentence) for the hits' sentences, best hit first, at most ``limit``."""
+    out = []
+    for h, hit in enumerate(hits):
+        for pos, sentence in enumerate(split_sentences(hit.text)):
+            if len(out) == limit:
+                return out
+            out.append((h, pos, sentence))
+    return out
+
+
+def synthesize_answer(
+    question: str,
+    hits: Sequence[VectorHit],
+    max_sentences: int = RAG_ANSWER_SENTENCES,
+    lambda_: float = RAG_MMR_LAMBDA,
+    budget_ms: float = RAG_ANSWER_BUDGET_MS,
+) -> Answer:
+    """An extractive answer: the hits' sentences that best answer ``question``, with citations.
+
+    Sentences and the question share one TF-IDF space, like
+    ``summarize_text``; relevance is cosine similarity to the question and
+    MMR drops sentences that repeat one already picked, which matters when
+    rolling summaries of one meeting overlap. Picked sentences are shown in
+    retrieval order, each followed by an ``[n]`` marker for its hit. Input is
+    capped at ``RAG_ANSWER_MAX_INPUT`` sentences so the cost stays within the
+    budget however long the hits are.
+    """
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    started = time.perf_counter()
+    deadline = started + budget_ms / 1000.0
+    try:
+        candidates = _sentences(hits, RAG_ANSWER_MAX_INPUT)
+        if not candidates:
+            return Answer(text="")
+        try:
+            X = TfidfVectorizer(stop_words="english").fit_transform([s for _, _, s in candidates] + [question])
+        except ValueError:
+            # only stop words; nothing to rank by
+            return Answer(text="")
+        X, q = X[:-1], X[-1]
+        relevance = (X @ q.T).toarray().ravel()
+        if not relevance.any():
+            # the question shares no terms with the text (e.g. a dense-only match): fall back to
+            # the sentences most central to the hits, as summaries rank them
+            relevance = X @ (X.T @ np.full(X.shape[0], 1.0 / X.shape[0]))
+        similarity = (X @ X.T).toarray()
+        picked = mmr(relevance, similarity, max_sentences, lambda_, deadline)
+        picked.sort(key=lambda i: candidates[i][:2])
+
+        citations: Dict[int, Citation] = {}
+        parts = []
+        for i in picked:
+            h, _, sentence = candidates[i]
+            if h not in citations:
+                hit = hits[h]
+                citations[h] = Citation(
+                    n=len(citations) + 1, ref=hit.ref, meeting_id=hit.meeting_id, kind=hit.kind, event_ids=hit.event_ids
+                )
+            parts.append(f"{sentence} [{citations[h].n}].")
+        return Answer(text=" ".join(parts), citations=list(citations.values()))
+    finally:
+        _answer_ms.observe((time.perf_counter() - started) * 1000.0)
@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Deque, Dict, List, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy import func, select
+
+from app.db.session import read_session
+from app.models.event import MeetingEvent
+from app.services.vector_store import VectorRecord, get_vector_store
+from app.utils import metrics
+from app.utils.watermark import IdWatermark
+from app.utils.config import (
+    CHUNK_EMBED_BATCH,
+    CHUNK_EMBED_DUTY,
+    CHUNK_FETCH_BATCH,
+    CHUNK_FLUSH_SECONDS,
+    CHUNK_INDEX_SECONDS,
+    CHUNK_MAX_PER_CYCLE,
+    CHUNK_OVERLAP_TOKENS,
+    CHUNK_TOKENS,
+)
+
+# transcript chunks are stored under the same kind the BM25 index gives single events
+CHUNK_KIND = "transcript"
+
+
+@dataclass
+class _Window:
+    """A meeting's transcript words not yet fully covered by emitted chunks."""
+    words: List[str] = field(default_factory=list)
+    word_events: List[int] = field(default_factory=list)  # MeetingEvent.id of each word
+    events: Dict[int, Tuple[Optional[str], datetime]] = field(default_factory=dict)  # id -> (author, created_at)
+    fresh_from: int = 0  # words before this index are overlap, already part of an emitted chunk
+    last_event_at: Optional[datetime] = None
+
+
+class TranscriptChunker:
+    """Splits each meeting's event stream into overlapping windows of ``size`` words.
+
+    ``add`` takes events in id order; ``take`` returns the chunks completed so
+    far. Consecutive chunks share ``overlap`` words, so a sentence cut at a
+    boundary is whole in one of them. ``flush_idle`` emits the partial window
+    of meetings that have gone quiet, so the end of a meeting is indexed too.
+    """
+
+    def __init__(self, size: int = CHUNK_TOKENS, overlap: int = CHUNK_OVERLAP_TOKENS) -> None:
+        if not 0 <= overlap < size:
+            raise ValueError(f"Chunk overlap {overlap} must be smaller than the chunk size {size}")
+        self.size = size
+        self.overlap = overlap
+        self._windows: Dict[int, _Window] = {}
+        self._ready: List[VectorRecord] = []
+
+    @property
+    def meetings(self) -> int:
+        return len(self._windows)
+
+    def add(self, meeting_id: int, event_id: int, author: Optional[str], content: str, created_at: datetime) -> None:
+        words = content.split()
+        if not words:
+            return
+        window = self._windows.get(meeting_id)
+        if window is None:
+            window = self._windows[meeting_id] = _Window()
+        window.words.extend(words)
+        window.word_events.extend([event_id] * len(words))
+        window.events[event_id] = (author, created_at)
+        window.last_event_at = created_at
+        while len(window.words) >= self.size:
+            self._emit(meeting_id, window, self.size)
+
+    def flush_idle(self, now: datetime, idle: timedelta) -> None:
+        for meeting_id, window in list(self._windows.items()):
+            if window.last_event_at is None or now - window.last_event_at < idle:
+                continue
+            if len(window.words) > window.fresh_from:
+                self._emit(meeting_id, window, len(window.words))
+            else:
+                # nothing new since the last chunk; the overlap is not worth keeping around
+                del self._windows[meeting_id]
+
+    def take(self) -> List[VectorRecord]:
+        ready, self._ready = self._ready, []
+        return ready
+
+    def _emit(self, meeting_id: int, window: _Window, n: int) -> None:
+        event_ids = sorted(set(window.word_events[:n]))
+        metas = [window.events[e] for e in event_ids]
+        authors = list(dict.fromkeys(a for a, _ in metas if a))
+        self._ready.append(VectorRecord(
+            text=" ".join(window.words[:n]),
+            meeting_id=meeting_id,
+            kind=CHUNK_KIND,
+            created_at=metas[-1][1].isoformat(),
+            ref=f"chunk:{event_ids[0]}-{event_ids[-1]}",
+            event_ids=event_ids,
+            authors=authors or None,
+            started_at=metas[0][1].isoformat(),
+        ))
+        keep = min(self.overlap, n)
+        window.words = window.words[n - keep:]
+        window.word_events = window.word_events[n - keep:]
+        # only the overlap was emitted; words past the chunk are still fresh
+        window.fresh_from = keep
+        still = set(window.word_events)
+        window.events = {e: m for e, m in window.events.items() if e in still}
+
+
+class ChunkIndexer:
+    """Background thread that embeds transcript chunks as events arrive.
+
+    Each cycle reads events past a cursor (``CHUNK_FETCH_BATCH`` at a time),
+    chunks them with ``TranscriptChunker`` and embeds up to
+    ``CHUNK_MAX_PER_CYCLE`` chunks in batches of ``CHUNK_EMBED_BATCH``. After
+    every batch it sleeps long enough that embedding uses at most
+    ``CHUNK_EMBED_DUTY`` of a core, so a burst of transcript never starves
+    ingest or queries; a backlog stays in the database and is caught up over
+    the following cycles. Progress is the highest event id in each meeting's
+    stored chunks, read back from the vector store on start; events are then
+    followed with an ``IdWatermark``, so one committed late is still chunked.
+    """
+
+    def __init__(self, interval: float = CHUNK_INDEX_SECONDS) -> None:
+        self.interval = interval
+        self.chunker = TranscriptChunker()
+        self._queue: Deque[VectorRecord] = deque()
+        self._marks: Dict[int, int] = {}  # meeting -> highest event id in an indexed chunk
+        self._restored: Dict[int, int] = {}  # _marks as read back on start: events up to these are indexed
+        self._cursor: Optional[IdWatermark] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._indexed = metrics.counter("chunks.indexed")
+        self._embed_ms = metrics.histogram("chunks.embed_ms")
+        self._backlog = metrics.gauge("chunks.queued")
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        if get_vector_store().model is None:
+            logger.info("No embedding model; transcript chunks are searched through the BM25 index only")
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="chunk-indexer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                behind = self.step()
+            except Exception as e:
+                logger.error(f"Transcript chunk indexing failed: {e}")
+                behind = False
+            self._stop.wait(0 if behind else self.interval)
+
+    def _restore(self) -> None:
+        """Per-meeting progress from stored chunks, and where to resume reading events."""
+        for record in get_vector_store().records:
+            if record.kind == CHUNK_KIND and record.event_ids and record.meeting_id is not None:
+                mark = self._marks.get(record.meeting_id, 0)
+                self._marks[record.meeting_id] = max(mark, record.event_ids[-1])
+        with read_session() as session:
+            latest = session.execute(
+                select(MeetingEvent.meeting_id, func.max(MeetingEvent.id)).group_by(MeetingEvent.meeting_id)
+            ).all()
+        behind = [self._marks.get(meeting_id, 0) for meeting_id, last in latest if last > self._marks.get(meeting_id, 0)]
+        self._restored = dict(self._marks)
+        self._cursor = IdWatermark(min(behind) if behind else max((last for _, last in latest), default=0))
+
+    def _read_events(self) -> bool:
+        """Feed the next events to the chunker; True if there may be more."""
+        with read_session() as session:
+            rows = session.execute(
+                select(MeetingEvent.id, MeetingEvent.meeting_id, MeetingEvent.author, MeetingEvent.content, MeetingEvent.created_at)
+                .where(self._cursor.condition(MeetingEvent.id))
+                .order_by(MeetingEvent.id)
+                .limit(CHUNK_FETCH_BATCH)
+            ).all()
+        for event_id, meeting_id, author, content, created_at in rows:
+            if event_id > self._restored.get(meeting_id, 0):
+                self.chunker.add(meeting_id, event_id, author, content, created_at)
+        self._cursor.advance(row[0] for row in rows)
+        return len(rows) == CHUNK_FETCH_BATCH
+
+    def step(self) -> bool:
+        """One cycle; returns True while there is a backlog, so the next cycle starts at once."""
+        if self._cursor is None:
+            self._restore()
+        more = False
+        # the queue bounds memory: stop reading while a cycle's worth is waiting
+        if len(self._queue) < CHUNK_MAX_PER_CYCLE:
+            more = self._read_events()
+            if not more:
+                self.chunker.flush_idle(datetime.utcnow(), timedelta(seconds=CHUNK_FLUSH_SECONDS))
+            self._queue.extend(self.chunker.take())
+        vs = get_vector_store()
+        done = 0
+        while self._queue and done < CHUNK_MAX_PER_CYCLE and not self._stop.is_set():
+            batch = [self._queue[i] for i in range(min(CHUNK_EMBED_BATCH, len(self._queue)))]
+            started = time.perf_counter()
+            vs.add_records(batch)
+            elapsed = time.perf_counter() - started
+            for _ in batch:
+                self._queue.popleft()
+            for record in batch:
+                self._marks[record.meeting_id] = max(self._marks.get(record.meeting_id, 0), record.event_ids[-1])
+            done += len(batch)
+            self._indexed.inc(len(batch))
+            self._embed_ms.observe(elapsed * 1000.0)
+            if CHUNK_EMBED_DUTY < 1.0:
+                self._stop.wait(elapsed * (1.0 / CHUNK_EMBED_DUTY - 1.0))
+        self._backlog.set(len(self._queue))
+        return more or bool(self._queue)
+
+
+chunk_indexer = ChunkIndexer()
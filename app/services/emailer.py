@@ -1,61 +1,373 @@
 from __future__ import annotations
 
-import os
+import queue
 import smtplib
+import threading
+import time
+from concurrent.futures import Future
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.mime.base import MIMEBase
 from email import encoders
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from loguru import logger
 
-from app.utils.config import SMTP_FROM, SMTP_HOST, SMTP_PASSWORD, SMTP_PORT, SMTP_USER
+from app.utils import metrics
+from app.utils.config import (
+    SMTP_FROM,
+    SMTP_HOST,
+    SMTP_MAX_RETRIES,
+    SMTP_PASSWORD,
+    SMTP_POOL_SIZE,
+    SMTP_PORT,
+    SMTP_RATE_PER_SEC,
+    SMTP_STARTTLS,
+    SMTP_USER,
+)
+
+
+def smtp_configured() -> bool:
+    return bool(SMTP_HOST and SMTP_USER and SMTP_PASSWORD)
+
+
+def build_message(
+    to_addresses: List[str],
+    subject: str,
+    html_body: str,
+    text_body: str | None = None,
+    attachment_data: Optional[bytes] = None,
+    attachment_filename: Optional[str] = None,
+    attachment_content_type: str = "text/calendar",
+) -> MIMEMultipart:
+    msg = MIMEMultipart("alternative")
+    msg["Subject"] = subject
+    msg["From"] = SMTP_FROM
+    msg["To"] = ", ".join(to_addresses)
+
+    if text_body:
+        msg.attach(MIMEText(text_body, "plain"))
+    msg.attach(MIMEText(html_body, "html"))
+
+    # Add attachment if provided
+    if attachment_data and attachment_filename:
+        part = MIMEBase("application", "octet-stream")
+        part.set_payload(attachment_data)
+        encoders.encode_base64(part)
+        part.add_header(
+            "Content-Disposition",
+            f'attachment; filename= "{attachment_filename}"',
+        )
+        part.add_header("Content-Type", attachment_content_type)
+        msg.attach(part)
+    return msg
+
+
+def _log_unsent(to_addresses: List[str], subject: str, html_body: str, attachment_data, attachment_filename) -> None:
+    logger.warning("SMTP not configured; printing email to logs")
+    logger.info(f"TO: {to_addresses}\nSUBJECT: {subject}\nBODY: {html_body}")
+    if attachment_data:
+        logger.info(f"ATTACHMENT: {attachment_filename} ({len(attachment_data)} bytes)")
 
 
 def send_email(
-    to_addresses: List[str], 
-    subject: str, 
-    html_body: str, 
+    to_addresses: List[str],
+    subject: str,
+    html_body: str,
     text_body: str | None = None,
     attachment_data: Optional[bytes] = None,
     attachment_filename: Optional[str] = None,
     attachment_content_type: str = "text/calendar"
 ) -> None:
-    if not SMTP_HOST or not SMTP_USER or not SMTP_PASSWORD:
-        logger.warning("SMTP not configured; printing email to logs")
-        logger.info(f"TO: {to_addresses}\nSUBJECT: {subject}\nBODY: {html_body}")
-        if attachment_data:
-            logger.info(f"ATTACHMENT: {attachment_filename} ({len(attachment_data)} bytes)")
-        return
-
-    try:
-        msg = MIMEMultipart("alternative")
-        msg["Subject"] = subject
-        msg["From"] = SMTP_FROM
-        msg["To"] = ", ".join(to_addresses)
-
-        if text_body:
-            msg.attach(MIMEText(text_body, "plain"))
-        msg.attach(MIMEText(html_body, "html"))
-        
-        # Add attachment if provided
-        if attachment_data and attachment_filename:
-            part = MIMEBase("application", "octet-stream")
-            part.set_payload(attachment_data)
-            encoders.encode_base64(part)
-            part.add_header(
-                "Content-Disposition",
-                f'attachment; filename= "{attachment_filename}"',
-            )
-            part.add_header("Content-Type", attachment_content_type)
-            msg.attach(part)
-
-        with smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=10) as server:
-            server.starttls()
-            server.login(SMTP_USER, SMTP_PASSWORD)
-            server.sendmail(SMTP_FROM, to_addresses, msg.as_string())
-        logger.info(f"Email sent successfully to {to_addresses}")
-    except Exception as e:
-        logger.error(f"Failed to send email: {e}")
-        raise  # Re-raise to let caller handle it
+    """Send and wait for delivery (over a pooled connection). Raises if delivery fails.
+
+    Tried once: callers that wait are jobs, and the job runner owns the retries.
+    """
+    queue_email(
+        to_addresses, subject, html_body, text_body,
+        attachment_data, attachment_filename, attachment_content_type,
+        max_retries=0,
+    ).result()
+
+
+def queue_email(
+    to_addresses: List[str],
+    subject: str,
+    html_body: str,
+    text_body: str | None = None,
+    attachment_data: Optional[bytes] = None,
+    attachment_filename: Optional[str] = None,
+    attachment_content_type: str = "text/calendar",
+    max_retries: Optional[int] = None,
+) -> Future:
+    """Hand a message to the outbound queue and return immediately.
+
+    The future resolves once the message is accepted by the SMTP server, or
+    fails after the retries (``SMTP_MAX_RETRIES`` unless given) are exhausted.
+    """
+    if not smtp_configured():
+        _log_unsent(to_addresses, subject, html_body, attachment_data, attachment_filename)
+        done: Future = Future()
+        done.set_result(None)
+        return done
+    msg = build_message(
+        to_addresses, subject, html_body, text_body,
+        attachment_data, attachment_filename, attachment_content_type,
+    )
+    return mail_queue.submit(to_addresses, msg, max_retries=max_retries)
+
+
+class TokenBucket:
+    """Blocking rate limiter: ``rate`` sends per second with bursts up to ``burst``."""
+
+    def __init__(self, rate: float, burst: Optional[float] = None) -> None:
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+_buckets: Dict[str, TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def rate_limiter_for(host: str, rate: float) -> TokenBucket:
+    """One bucket per SMTP host, shared by every connection to it."""
+    with _buckets_lock:
+        bucket = _buckets.get(host)
+        if bucket is None:
+            bucket = _buckets[host] = TokenBucket(rate)
+        return bucket
+
+
+class _Outbound:
+    __slots__ = ("to", "message", "max_retries", "attempts", "future")
+
+    def __init__(self, to: List[str], message: MIMEMultipart, max_retries: int) -> None:
+        self.to = to
+        self.message = message
+        self.max_retries = max_retries
+        self.attempts = 0
+        self.future: Future = Future()
+
+
+class MailQueue:
+    """Outbound mail delivered by a pool of persistent SMTP connections.
+
+    Each worker thread keeps one authenticated connection open and reuses it
+    for every message it sends, so STARTTLS and login happen once per
+    connection rather than once per message. Sends to the host share a token
+    bucket. Transient failures (disconnects, timeouts, 4xx replies) are retried
+    with exponential backoff; 5xx replies fail the message straight away.
+    ``stop`` gives messages waiting out a backoff one last attempt, and logs
+    whatever still is not sent.
+    """
+
+    IDLE_CHECK_SECONDS = 30.0
+
+    def __init__(
+        self,
+        host: str = SMTP_HOST,
+        port: int = SMTP_PORT,
+        user: str = SMTP_USER,
+        password: str = SMTP_PASSWORD,
+        sender: str = SMTP_FROM,
+        pool_size: int = SMTP_POOL_SIZE,
+        rate_per_sec: float = SMTP_RATE_PER_SEC,
+        max_retries: int = SMTP_MAX_RETRIES,
+        starttls: bool = SMTP_STARTTLS,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.sender = sender
+        self.pool_size = max(1, pool_size)
+        self.max_retries = max_retries
+        self.starttls = starttls
+        self._limiter = rate_limiter_for(f"{host}:{port}", rate_per_sec)
+        self._queue: "queue.Queue[Optional[_Outbound]]" = queue.Queue()
+        self._threads: List[threading.Thread] = []
+        self._start_lock = threading.Lock()
+        self._in_flight = 0
+        self._retrying = 0
+        self._timers: Dict[threading.Timer, _Outbound] = {}
+        self._stopping = False
+        self._count_lock = threading.Lock()
+        self._sent = metrics.counter("mail.sent")
+        self._failed = metrics.counter("mail.failed")
+        self._retried = metrics.counter("mail.retried")
+        self._send_ms = metrics.histogram("mail.send_ms")
+        metrics.register("mail.queue", self)
+
+    # -- public ------------------------------------------------------------
+
+    def submit(self, to: List[str], message: MIMEMultipart, max_retries: Optional[int] = None) -> Future:
+        self._ensure_started()
+        item = _Outbound(to, message, self.max_retries if max_retries is None else max_retries)
+        self._queue.put(item)
+        return item.future
+
+    def stats(self) -> Dict[str, int]:
+        with self._count_lock:
+            return {
+                "queued": self._queue.qsize(),
+                "in_flight": self._in_flight,
+                "retrying": self._retrying,
+                "sent": self._sent.value,
+                "failed": self._failed.value,
+            }
+
+    snapshot = stats
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Let queued messages drain, then close every connection."""
+        with self._count_lock:
+            self._stopping = True
+            waiting = list(self._timers.items())
+            self._timers.clear()
+            self._retrying -= len(waiting)
+        # no more backoff: retry now, ahead of the workers' stop markers
+        for timer, item in waiting:
+            timer.cancel()
+            self._queue.put(item)
+        for _ in self._threads:
+            self._queue.put(None)
+        deadline = time.monotonic() + timeout
+        for t in self._threads:
+            t.join(timeout=max(0.0, deadline - time.monotonic()))
+        self._threads = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                self._fail(item, RuntimeError("mail queue stopped before the message was sent"))
+
+    # -- workers -----------------------------------------------------------
+
+    def _ensure_started(self) -> None:
+        if self._threads:
+            return
+        with self._start_lock:
+            if not self._threads:
+                self._stopping = False
+                for i in range(self.pool_size):
+                    t = threading.Thread(target=self._worker, name=f"smtp-{i}", daemon=True)
+                    t.start()
+                    self._threads.append(t)
+
+    def _connect(self) -> smtplib.SMTP:
+        conn = smtplib.SMTP(self.host, self.port, timeout=10)
+        if self.starttls:
+            conn.starttls()
+        if self.user:
+            conn.login(self.user, self.password)
+        return conn
+
+    @staticmethod
+    def _close(conn: Optional[smtplib.SMTP]) -> None:
+        if conn is None:
+            return
+        try:
+            conn.quit()
+        except Exception:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def _worker(self) -> None:
+        conn: Optional[smtplib.SMTP] = None
+        last_used = 0.0
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    return
+                self._limiter.acquire()
+                with self._count_lock:
+                    self._in_flight += 1
+                started = time.perf_counter()
+                try:
+                    if conn is not None and time.monotonic() - last_used > self.IDLE_CHECK_SECONDS:
+                        # the server may have dropped an idle connection
+                        try:
+                            if conn.noop()[0] != 250:
+                                raise smtplib.SMTPServerDisconnected("NOOP failed")
+                        except (smtplib.SMTPException, OSError):
+                            self._close(conn)
+                            conn = None
+                    if conn is None:
+                        conn = self._connect()
+                    conn.sendmail(self.sender, item.to, item.message.as_string())
+                    last_used = time.monotonic()
+                except Exception as e:
+                    permanent = isinstance(e, smtplib.SMTPResponseException) and e.smtp_code >= 500
+                    if isinstance(e, (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused)):
+                        permanent = True
+                    if not permanent:
+                        # the connection state is unknown after a transient error
+                        self._close(conn)
+                        conn = None
+                    self._retry_or_fail(item, e, permanent)
+                else:
+                    self._sent.inc()
+                    self._send_ms.observe((time.perf_counter() - started) * 1000.0)
+                    logger.info(f"Email sent successfully to {item.to}")
+                    item.future.set_result(None)
+                finally:
+                    with self._count_lock:
+                        self._in_flight -= 1
+        finally:
+            self._close(conn)
+
+    def _fail(self, item: _Outbound, error: Exception) -> None:
+        self._failed.inc()
+        logger.error(f"Failed to send email {item.message['Subject']!r} to {item.to}: {error}")
+        item.future.set_exception(error)
+
+    def _retry_or_fail(self, item: _Outbound, error: Exception, permanent: bool) -> None:
+        item.attempts += 1
+        delay = min(60.0, 2.0 ** (item.attempts - 1))
+
+        def requeue() -> None:
+            with self._count_lock:
+                # stop() may have taken it already
+                if self._timers.pop(timer, None) is None:
+                    return
+                self._retrying -= 1
+            self._queue.put(item)
+
+        timer = threading.Timer(delay, requeue)
+        timer.daemon = True
+        with self._count_lock:
+            give_up = permanent or self._stopping or item.attempts > item.max_retries
+            if not give_up:
+                self._timers[timer] = item
+                self._retrying += 1
+        if give_up:
+            self._fail(item, error)
+            return
+        logger.warning(f"Email to {item.to} failed ({error}); retry {item.attempts} in {delay:.0f}s")
+        self._retried.inc()
+        timer.start()
+
+
+mail_queue = MailQueue()
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+from loguru import logger
+
+from app.utils import metrics
+from app.utils.config import EMBED_MAX_BATCH, EMBED_MAX_WAIT_MS
+
+
+class _Pending:
+    __slots__ = ("text", "future", "enqueued_at")
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.future: Future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+class EmbeddingBatcher:
+    """Coalesce concurrent ``encode`` calls into one model call.
+
+    Each caller blocks on its own future. A single worker thread takes the first
+    waiting text, then keeps collecting until ``max_batch_size`` texts are queued
+    or ``max_wait_ms`` has passed since that first text arrived, and encodes them
+    all in one call. Batch sizes, queue waits and encode times are recorded under
+    ``<name>.*`` in ``app.utils.metrics``.
+    """
+
+    def __init__(
+        self,
+        encode: Callable[[List[str]], np.ndarray],
+        max_batch_size: int = EMBED_MAX_BATCH,
+        max_wait_ms: float = EMBED_MAX_WAIT_MS,
+        name: str = "embedding",
+    ) -> None:
+        self._encode = encode
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._queue: "queue.Queue[Optional[_Pending]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._closed = False
+        self._batch_size = metrics.histogram(f"{name}.batch_size", metrics.SIZE_BUCKETS)
+        self._queue_wait = metrics.histogram(f"{name}.queue_wait_ms")
+        self._encode_time = metrics.histogram(f"{name}.encode_ms")
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None:
+            return
+        with self._start_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                self._worker.start()
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        """Embed ``texts`` (rows in the same order), sharing a model call with concurrent callers."""
+        if self._closed:
+            raise RuntimeError("EmbeddingBatcher is closed")
+        self._ensure_worker()
+        pending = [_Pending(t) for t in texts]
+        for p in pending:
+            self._queue.put(p)
+        return np.stack([p.future.result() for p in pending])
+
+    def encode_one(self, text: str) -> np.ndarray:
+        return self.encode([text])[0]
+
+    def close(self) -> None:
+        self._closed = True
+        if self._worker is not None:
+            self._queue.put(None)
+            self._worker.join(timeout=5)
+
+    def _collect(self) -> List[_Pending]:
+        first = self._queue.get()
+        if first is None:
+            return []
+        batch = [first]
+        deadline = first.enqueued_at + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)  # finish this batch, then stop
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            if not batch:
+                return
+            started = time.perf_counter()
+            for p in batch:
+                self._queue_wait.observe((started - p.enqueued_at) * 1000.0)
+            self._batch_size.observe(len(batch))
+            try:
+                vectors = self._encode([p.text for p in batch])
+            except Exception as e:
+                logger.error(f"Batched encode of {len(batch)} texts failed: {e}")
+                for p in batch:
+                    p.future.set_exception(e)
+                continue
+            self._encode_time.observe((time.perf_counter() - started) * 1000.0)
+            for p, vector in zip(batch, vectors):
+                p.future.set_result(vector)
@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+import shutil
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from loguru import logger
+
+from app.utils.config import EMBED_BACKEND, EMBED_MODEL, EMBED_ONNX_DIR, EMBED_PARITY_TOLERANCE
+
+TORCH = "torch"
+TORCH_INT8 = "torch-int8"
+ONNX = "onnx"
+ONNX_INT8 = "onnx-int8"
+BACKENDS = (TORCH, TORCH_INT8, ONNX, ONNX_INT8)
+
+# fixed sample for parity checks: short and long, on- and off-topic, so both the
+# embeddings and the similarities between them are compared
+PARITY_TEXTS = [
+    "We agreed to ship the release on Friday.",
+    "Alice will write the release notes before the launch.",
+    "QA found two blocking bugs in the payment flow; Bob owns the fixes.",
+    "The database migration is scheduled for next Tuesday night and needs a rollback plan.",
+    "Hiring: two backend engineers start in March.",
+    "The contractor budget was cut by twenty percent for the next quarter.",
+    "Can everyone hear me? I think my microphone was muted.",
+    "Action items: update the roadmap, review the security audit, and schedule a follow-up with the customer.",
+]
+
+
+def parity(reference, candidate, texts: Sequence[str] = PARITY_TEXTS) -> Dict[str, float]:
+    """How far ``candidate`` embeddings drift from ``reference`` on the same texts.
+
+    ``max_similarity_error`` is the largest change in cosine similarity between
+    any two texts, which is what retrieval ranks by; ``min_self_cosine`` is the
+    lowest cosine between a text's two embeddings.
+    """
+    a = reference.encode(list(texts), normalize_embeddings=True)
+    b = candidate.encode(list(texts), normalize_embeddings=True)
+    return {
+        "min_self_cosine": float((a * b).sum(axis=1).min()),
+        "max_similarity_error": float(np.abs(a @ a.T - b @ b.T).max()),
+    }
+
+
+def within_tolerance(report: Dict[str, float], tolerance: float = EMBED_PARITY_TOLERANCE) -> bool:
+    return report["max_similarity_error"] <= tolerance and 1.0 - report["min_self_cosine"] <= tolerance
+
+
+class OnnxEncoder:
+    """A sentence-transformers model exported to ONNX, run with onnxruntime.
+
+    Same ``encode``/``get_sentence_embedding_dimension`` interface as
+    ``SentenceTransformer``, so ``VectorStore`` does not care which one it
+    has. Tokenizing uses the model's fast tokenizer and pooling is done in
+    numpy; torch is not imported. Texts are encoded sorted by length so each
+    batch pads to about its own longest text.
+    """
+
+    def __init__(self, model_dir: str, quantized: bool = False) -> None:
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        with open(os.path.join(model_dir, "encoder.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(self.meta["max_seq_length"])
+        self.tokenizer.enable_padding(pad_id=self.meta["pad_id"], pad_token=self.meta["pad_token"])
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        path = os.path.join(model_dir, "model.int8.onnx" if quantized else "model.onnx")
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self._inputs = [i.name for i in self.session.get_inputs()]
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.meta["dimension"]
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        feed = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        hidden = self.session.run(None, {name: feed[name] for name in self._inputs})[0]
+        if self.meta["pooling"] == "cls":
+            return hidden[:, 0]
+        mask = feed["attention_mask"][:, :, None].astype(np.float32)
+        return (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+
+    def encode(self, texts, normalize_embeddings: bool = False, batch_size: int = 32, **_) -> np.ndarray:
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+        out = np.empty((len(texts), self.meta["dimension"]), dtype=np.float32)
+        order = np.argsort([len(t) for t in texts], kind="stable")
+        batch_size = max(1, batch_size)
+        for start in range(0, len(texts), batch_size):
+            idx = order[start:start + batch_size]
+            out[idx] = self._encode_batch([texts[i] for i in idx])
+        if normalize_embeddings:
+            out /= np.maximum(np.linalg.norm(out, axis=1, keepdims=True), 1e-12)
+        return out[0] if single else out
+
+
+def _model_dir(model_name: str) -> str:
+    return os.path.join(EMBED_ONNX_DIR, re.sub(r"[^\w.-]+", "_", model_name))
+
+
+def _exported(model_dir: str) -> bool:
+    """True once an export has finished, parity reports included."""
+    try:
+        with open(os.path.join(model_dir, "encoder.json"), encoding="utf-8") as f:
+            return "parity" in json.load(f)
+    except (OSError, ValueError):
+        return False
+
+
+def _pooling(model) -> str:
+    pooling = model[1]
+    if getattr(pooling, "pooling_mode_mean_tokens", False):
+        return "mean"
+    if getattr(pooling, "pooling_mode_cls_token", False):
+        return "cls"
+    raise ValueError(f"Unsupported pooling for ONNX export: {pooling}")
+
+
+def export_onnx(model, model_dir: str) -> None:
+    """Export ``model`` (a loaded ``SentenceTransformer``) and an int8 copy of it to ``model_dir``.
+
+    ``encoder.json`` is written last, and ``load_encoder`` adds the parity
+    reports to it; until those are there the export counts as unfinished
+    and is redone.
+    """
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    pooling = _pooling(model)
+    os.makedirs(model_dir, exist_ok=True)
+    tokenizer = model.tokenizer
+    tokenizer.backend_tokenizer.save(os.path.join(model_dir, "tokenizer.json"))
+    sample = tokenizer(["export sample", "a second, longer export sample"], padding=True, return_tensors="pt")
+    names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in sample]
+    axes = {n: {0: "batch", 1: "tokens"} for n in names}
+    axes["last_hidden_state"] = {0: "batch", 1: "tokens"}
+    path = os.path.join(model_dir, "model.onnx")
+    with torch.no_grad():
+        torch.onnx.export(
+            model[0].auto_model.eval(),
+            tuple(sample[n] for n in names),
+            path,
+            input_names=names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=axes,
+            opset_version=14,
+        )
+    quantize_dynamic(path, os.path.join(model_dir, "model.int8.onnx"), weight_type=QuantType.QInt8)
+    meta = {
+        "dimension": model.get_sentence_embedding_dimension(),
+        "max_seq_length": model.max_seq_length,
+        "pooling": pooling,
+        "pad_id": tokenizer.pad_token_id,
+        "pad_token": tokenizer.pad_token,
+    }
+    with open(os.path.join(model_dir, "encoder.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+
+def load_torch(model_name: str):
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError:
+        return None
+    return SentenceTransformer(model_name, device="cpu")
+
+
+def quantize_torch(model):
+    import torch
+
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _record_parity(reference, model_dir: str) -> None:
+    """Check both exported variants against the torch model and keep the reports in ``encoder.json``."""
+    path = os.path.join(model_dir, "encoder.json")
+    with open(path, encoding="utf-8") as f:
+        meta = json.load(f)
+    meta["parity"] = {
+        ONNX: parity(reference, OnnxEncoder(model_dir)),
+        ONNX_INT8: parity(reference, OnnxEncoder(model_dir, quantized=True)),
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+
+def load_encoder(backend: Optional[str] = None, model_name: str = EMBED_MODEL):
+    """The embedding model for ``backend`` (``EMBED_BACKEND`` by default), or None if none can be loaded.
+
+    ``torch`` is the sentence-transformers model as published. ``torch-int8``
+    quantizes its linear layers to int8 after loading. ``onnx`` and
+    ``onnx-int8`` run an export kept under ``EMBED_ONNX_DIR``, made from the
+    torch model on first use. A quantized or exported model is only used if
+    its ``parity`` with the torch model is within ``EMBED_PARITY_TOLERANCE``;
+    otherwise, or if onnxruntime/torch is missing, this falls back to ``torch``.
+    """
+    backend = (backend or EMBED_BACKEND).lower()
+    if backend not in BACKENDS:
+        logger.warning(f"Unknown EMBED_BACKEND {backend!r}; using {TORCH}")
+        backend = TORCH
+
+    if backend in (ONNX, ONNX_INT8):
+        model_dir = _model_dir(model_name)
+        exporting = not _exported(model_dir)
+        try:
+            if exporting:
+                reference = load_torch(model_name)
+                if reference is None:
+                    logger.warning(f"EMBED_BACKEND={backend} needs sentence-transformers once to export the model")
+                    return None
+                export_onnx(reference, model_dir)
+                _record_parity(reference, model_dir)
+            model = OnnxEncoder(model_dir, quantized=backend == ONNX_INT8)
+        except Exception as e:
+            logger.warning(f"ONNX encoder unavailable ({e}); using {TORCH}")
+            if exporting:
+                shutil.rmtree(model_dir, ignore_errors=True)
+            return load_torch(model_name)
+        report = model.meta["parity"][backend]
+        if not within_tolerance(report):
+            logger.warning(f"Embedding backend {backend} is outside the parity tolerance ({report}); using {TORCH}")
+            return load_torch(model_name)
+        logger.info(f"Embedding backend {backend}: parity {report}")
+        return model
+
+    model = load_torch(model_name)
+    if model is None or backend == TORCH:
+        return model
+    try:
+        # quantize_dynamic copies the model, so the fp32 one is still there to compare with
+        candidate = quantize_torch(model)
+    except Exception as e:
+        logger.warning(f"int8 quantization failed ({e}); using {TORCH}")
+        return model
+    report = parity(model, candidate)
+    if not within_tolerance(report):
+        logger.warning(f"Embedding backend {backend} is outside the parity tolerance ({report}); using {TORCH}")
+        return model
+    logger.info(f"Embedding backend {backend}: parity {report}")
+    return candidate
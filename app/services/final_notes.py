@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+
+from app.db.session import db_session
+from app.models.event import MeetingEvent
+from app.models.job import Job
+from app.models.meeting import Meeting, MeetingSummary
+from app.services import jobs
+from app.services.activity import activity
+from app.services.emailer import send_email
+from app.services.notifier import publish_summary, summary_to_dict
+from app.services.summarizer import discard_summarizer, summarizer_for
+from app.services.vector_store import get_vector_store
+
+FINAL_NOTES = "final_notes"
+INDEX_NOTES = "index_notes"
+EMAIL_NOTES = "email_notes"
+
+
+def final_notes_job(session, meeting_id: int) -> Optional[Job]:
+    """The notes job of the meeting's latest end."""
+    return session.scalar(
+        select(Job).where(Job.kind == FINAL_NOTES, Job.meeting_id == meeting_id).order_by(Job.id.desc()).limit(1)
+    )
+
+
+def enqueue_final_notes(session, meeting: Meeting) -> Job:
+    """Queue notes generation for a meeting that just ended, in the caller's transaction.
+
+    A meeting can be restarted, so every end gets its own job, which covers
+    the session from ``actual_start`` to ``actual_end``.
+    """
+    window_start = meeting.actual_start or meeting.created_at
+    window_end = meeting.actual_end or datetime.utcnow()
+    return jobs.enqueue(
+        session,
+        FINAL_NOTES,
+        meeting_id=meeting.id,
+        payload={"window_start": window_start.isoformat(), "window_end": window_end.isoformat()},
+    )
+
+
+def _window(payload: Dict[str, Any], meeting: Meeting) -> Tuple[datetime, datetime]:
+    if "window_start" in payload:
+        return datetime.fromisoformat(payload["window_start"]), datetime.fromisoformat(payload["window_end"])
+    return meeting.actual_start or meeting.created_at, meeting.actual_end or datetime.utcnow()
+
+
+def _follow_ups(session, job_id: int, summary_id: int) -> List[Tuple[str, Dict[str, Any]]]:
+    """Indexing and email for the notes, less any step this job already queued."""
+    queued = set(session.scalars(
+        select(Job.kind).where(Job.parent_id == job_id, Job.kind.in_((INDEX_NOTES, EMAIL_NOTES)))
+    ))
+    return [(kind, {"summary_id": summary_id}) for kind in (INDEX_NOTES, EMAIL_NOTES) if kind not in queued]
+
+
+@jobs.job_handler(FINAL_NOTES)
+def build_final_notes(job_id: int, meeting_id: Optional[int], payload: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+    with db_session() as session:
+        meeting = session.get(Meeting, meeting_id)
+        if meeting is None:
+            return []
+        window_start, window_end = _window(payload, meeting)
+        # a retry after a crash must not write this session's notes twice
+        existing = session.scalar(
+            select(MeetingSummary).where(
+                MeetingSummary.meeting_id == meeting_id,
+                MeetingSummary.kind == "final",
+                MeetingSummary.window_start == window_start,
+                MeetingSummary.window_end == window_end,
+            )
+        )
+        if existing is not None:
+            return _follow_ups(session, job_id, existing.id)
+
+        # the running summarizer has already tokenized everything the rolling
+        # summaries saw, so only fetch the rest
+        state = summarizer_for(meeting_id)
+        with state.lock:
+            events_stmt = select(MeetingEvent).where(
+                MeetingEvent.meeting_id == meeting_id,
+                MeetingEvent.id > state.last_event_id,
+            ).order_by(MeetingEvent.id.asc())
+            new_events = list(session.scalars(events_stmt).all())
+            if new_events:
+                state.observe([e.content for e in new_events], last_event_id=new_events[-1].id)
+            final_notes = state.summarize(max_sentences=12)
+        if not final_notes:
+            discard_summarizer(meeting_id)
+            activity.discard(meeting_id)
+            return []
+        final_summary = MeetingSummary(
+            meeting_id=meeting_id,
+            window_start=window_start,
+            window_end=window_end,
+            summary_text=final_notes,
+            kind="final",
+        )
+        session.add(final_summary)
+        session.flush()
+        summary_id = final_summary.id
+        pushed = summary_to_dict(final_summary)
+    publish_summary(meeting_id, pushed)
+    discard_summarizer(meeting_id)
+    activity.discard(meeting_id)
+    # indexing and email are independent steps: one being slow or failing does not hold up the other
+    return [(INDEX_NOTES, {"summary_id": summary_id}), (EMAIL_NOTES, {"summary_id": summary_id})]
+
+
+@jobs.job_handler(INDEX_NOTES)
+def index_final_notes(job_id: int, meeting_id: Optional[int], payload: Dict[str, Any]) -> None:
+    with db_session() as session:
+        summary = session.get(MeetingSummary, payload["summary_id"])
+        if summary is None:
+            return
+        text, summary_id = summary.summary_text, summary.id
+    get_vector_store().add_texts([text], meeting_id=meeting_id, kind="final", ref=f"summary:{summary_id}")
+
+
+@jobs.job_handler(EMAIL_NOTES)
+def email_final_notes(job_id: int, meeting_id: Optional[int], payload: Dict[str, Any]) -> None:
+    with db_session() as session:
+        summary = session.get(MeetingSummary, payload["summary_id"])
+        meeting = session.get(Meeting, meeting_id)
+        if summary is None or meeting is None:
+            return
+        recipients = [p.email for p in meeting.participants]
+        title, notes = meeting.title, summary.summary_text
+    if recipients:
+        # raises on SMTP failure, which makes the runner retry with backoff
+        send_email(recipients, f"Notes: {title}", f"<p>{notes}</p>")
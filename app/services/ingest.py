@@ -0,0 +1,264 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, Iterable, List, Optional, Set
+
+from loguru import logger
+from sqlalchemy import insert, select
+
+from app.db.session import db_session
+from app.models.event import MeetingEvent
+from app.models.meeting import Meeting
+from app.services.activity import activity
+from app.utils import metrics
+from app.utils.config import STREAM_FLUSH_MS, STREAM_FLUSH_SIZE, STREAM_MAX_PENDING
+
+
+def existing_meeting_ids(session, meeting_ids: Iterable[int]) -> Set[int]:
+    """Which of ``meeting_ids`` exist, in one query."""
+    ids = set(meeting_ids)
+    if not ids:
+        return set()
+    return set(session.scalars(select(Meeting.id).where(Meeting.id.in_(ids))).all())
+
+
+def insert_events(session, rows: List[Dict]) -> List[int]:
+    """Insert event rows as one executemany; returns their ids in input order.
+
+    Each row needs ``meeting_id`` and ``content``; ``author`` and ``created_at``
+    are optional. Callers check that the meetings exist.
+    """
+    if not rows:
+        return []
+    now = datetime.utcnow()
+    params = [
+        {
+            "meeting_id": r["meeting_id"],
+            "content": r["content"],
+            "author": r.get("author"),
+            "created_at": r.get("created_at") or now,
+            "updated_at": now,
+        }
+        for r in rows
+    ]
+    stmt = insert(MeetingEvent).returning(MeetingEvent.id, sort_by_parameter_order=True)
+    return list(session.scalars(stmt, params).all())
+
+
+class StreamClosed(Exception):
+    """The meeting has ended; its stream takes no more fragments."""
+
+
+class _Fragment:
+    __slots__ = ("row", "seq", "received_at")
+
+    def __init__(self, row: Dict, seq: int) -> None:
+        self.row = row
+        self.seq = seq
+        self.received_at = time.perf_counter()
+
+
+class EventWriteBuffer:
+    """In-memory buffer of streamed transcript fragments, written to the DB in batches.
+
+    A writer thread flushes once ``flush_size`` fragments are waiting or the
+    oldest has waited ``flush_interval_ms``, so a live captioning feed becomes a
+    few large transactions instead of one per utterance. The buffer is bounded:
+    ``try_put`` refuses new fragments while ``max_pending`` are unwritten, which
+    is the signal for stream handlers to stop reading from their clients until
+    the database catches up. A failed flush keeps its rows and retries.
+
+    Ending a meeting goes through ``close_meeting`` and ``wait_written``: the
+    meeting's streams stop taking fragments, and what they already sent is in
+    the database before the final notes read the transcript. Once the end is
+    recorded, ``release_meeting`` lets the meeting go; it is forgotten when its
+    last stream detaches, since the meeting's status turns new streams away.
+    """
+
+    def __init__(
+        self,
+        max_pending: int = STREAM_MAX_PENDING,
+        flush_size: int = STREAM_FLUSH_SIZE,
+        flush_interval_ms: float = STREAM_FLUSH_MS,
+    ) -> None:
+        self.max_pending = max_pending
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval_ms / 1000.0
+        self._pending: Deque[_Fragment] = deque()
+        self._in_flush = 0
+        self._batch: List[_Fragment] = []
+        # fragments are numbered as accepted and committed in that order, so one
+        # number says how far the writer has got
+        self._seq = 0
+        self._written_seq = 0
+        # closed meeting -> whether its end is recorded, so it can go once no stream is attached
+        self._closed: Dict[int, bool] = {}
+        self._streams: Dict[int, int] = {}
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._ingested = metrics.counter("stream.ingested")
+        self._rejected = metrics.counter("stream.backpressure")
+        self._flush_ms = metrics.histogram("stream.flush_ms")
+        self._flush_rows = metrics.histogram("stream.flush_rows", metrics.SIZE_BUCKETS)
+        self._commit_latency = metrics.histogram("stream.commit_latency_ms")
+        self._pending_gauge = metrics.gauge("stream.pending")
+
+    @property
+    def pending(self) -> int:
+        """Fragments accepted but not yet committed."""
+        return len(self._pending) + self._in_flush
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._cond:
+            if self._thread is None:
+                self._stopping = False
+                self._thread = threading.Thread(target=self._run, name="event-writer", daemon=True)
+                self._thread.start()
+
+    def try_put(self, row: Dict) -> bool:
+        """Queue a row for writing; False means the buffer is full and the caller should wait.
+
+        Raises ``StreamClosed`` once the row's meeting has been closed.
+        """
+        self._ensure_started()
+        with self._cond:
+            if row["meeting_id"] in self._closed:
+                raise StreamClosed(row["meeting_id"])
+            if self.pending >= self.max_pending:
+                self._rejected.inc()
+                return False
+            self._seq += 1
+            self._pending.append(_Fragment(row, self._seq))
+            self._pending_gauge.set(self.pending)
+            # the first fragment starts the flush timer; a full batch flushes now
+            if len(self._pending) == 1 or len(self._pending) >= self.flush_size:
+                self._cond.notify_all()
+        return True
+
+    def is_closed(self, meeting_id: int) -> bool:
+        with self._cond:
+            return meeting_id in self._closed
+
+    def attach(self, meeting_id: int) -> None:
+        """Register an open stream for ``meeting_id``; raises ``StreamClosed`` if the meeting is ending."""
+        with self._cond:
+            if meeting_id in self._closed:
+                raise StreamClosed(meeting_id)
+            self._streams[meeting_id] = self._streams.get(meeting_id, 0) + 1
+
+    def detach(self, meeting_id: int) -> None:
+        with self._cond:
+            left = self._streams.get(meeting_id, 0) - 1
+            if left > 0:
+                self._streams[meeting_id] = left
+                return
+            self._streams.pop(meeting_id, None)
+            if self._closed.get(meeting_id):
+                del self._closed[meeting_id]
+
+    def close_meeting(self, meeting_id: int) -> None:
+        """Refuse further fragments for a meeting that is ending."""
+        with self._cond:
+            self._closed[meeting_id] = False
+
+    def release_meeting(self, meeting_id: int) -> None:
+        """The meeting's end is recorded: forget it as soon as no stream is attached."""
+        with self._cond:
+            if meeting_id not in self._closed:
+                return
+            if self._streams.get(meeting_id):
+                self._closed[meeting_id] = True
+            else:
+                del self._closed[meeting_id]
+
+    def open_meeting(self, meeting_id: int) -> None:
+        """Take fragments again, e.g. for a meeting started after it had ended."""
+        with self._cond:
+            self._closed.pop(meeting_id, None)
+
+    def wait_written(self, meeting_id: int, timeout: float = 10.0) -> bool:
+        """Block until every fragment accepted for ``meeting_id`` is committed; False on timeout."""
+        deadline = time.perf_counter() + timeout
+        with self._cond:
+            target = max(
+                (f.seq for f in (*self._batch, *self._pending) if f.row["meeting_id"] == meeting_id), default=0
+            )
+            while self._written_seq < target:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Flush what is buffered, then stop the writer."""
+        with self._cond:
+            if self._thread is None:
+                return
+            self._stopping = True
+            self._cond.notify_all()
+        self._thread.join(timeout=timeout)
+        self._thread = None
+
+    def _take_batch(self) -> List[_Fragment]:
+        with self._cond:
+            while True:
+                if self._pending:
+                    if self._stopping or len(self._pending) >= self.flush_size:
+                        break
+                    wait = self._pending[0].received_at + self.flush_interval - time.perf_counter()
+                    if wait <= 0:
+                        break
+                    self._cond.wait(wait)
+                elif self._stopping:
+                    return []
+                else:
+                    self._cond.wait()
+            batch = [self._pending.popleft() for _ in range(min(self.flush_size, len(self._pending)))]
+            self._in_flush = len(batch)
+            self._batch = batch
+            return batch
+
+    def _run(self) -> None:
+        failures = 0
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                return
+            started = time.perf_counter()
+            try:
+                with db_session() as session:
+                    insert_events(session, [f.row for f in batch])
+            except Exception as e:
+                failures += 1
+                logger.error(f"Flushing {len(batch)} streamed events failed (attempt {failures}): {e}")
+                with self._cond:
+                    # put them back in order; nothing new is accepted past max_pending meanwhile
+                    self._pending.extendleft(reversed(batch))
+                    self._in_flush = 0
+                    self._batch = []
+                time.sleep(min(5.0, 0.1 * 2 ** failures))
+                continue
+            failures = 0
+            done = time.perf_counter()
+            activity.record_rows(f.row for f in batch)
+            self._flush_ms.observe((done - started) * 1000.0)
+            self._flush_rows.observe(len(batch))
+            self._ingested.inc(len(batch))
+            for f in batch:
+                self._commit_latency.observe((done - f.received_at) * 1000.0)
+            with self._cond:
+                self._in_flush = 0
+                self._batch = []
+                self._written_seq = batch[-1].seq
+                self._pending_gauge.set(self.pending)
+                self._cond.notify_all()
+
+
+event_buffer = EventWriteBuffer()
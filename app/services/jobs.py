@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import json
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy import select, update
+
+from app.db.session import db_session
+from app.models.job import Job, JobStatus
+from app.utils.config import JOB_POLL_SECONDS, JOB_WORKERS
+
+# a handler gets (job_id, meeting_id, payload) and may return follow-up jobs as (kind, payload)
+Handler = Callable[[int, Optional[int], Dict[str, Any]], Optional[List[Tuple[str, Dict[str, Any]]]]]
+
+_handlers: Dict[str, Handler] = {}
+
+
+def register_handler(kind: str, handler: Handler) -> None:
+    _handlers[kind] = handler
+
+
+def job_handler(kind: str) -> Callable[[Handler], Handler]:
+    def decorator(fn: Handler) -> Handler:
+        register_handler(kind, fn)
+        return fn
+    return decorator
+
+
+def enqueue(
+    session,
+    kind: str,
+    meeting_id: Optional[int] = None,
+    payload: Optional[Dict[str, Any]] = None,
+    parent_id: Optional[int] = None,
+    max_attempts: int = 5,
+) -> Job:
+    """Add a job in the caller's transaction, so it is durable exactly when the caller commits."""
+    job = Job(
+        kind=kind,
+        meeting_id=meeting_id,
+        parent_id=parent_id,
+        payload=json.dumps(payload or {}),
+        max_attempts=max_attempts,
+    )
+    session.add(job)
+    session.flush()
+    return job
+
+
+def backoff(attempts: int) -> timedelta:
+    return timedelta(seconds=min(300, 2 ** attempts))
+
+
+def job_to_dict(job: Job, children: Optional[List[Job]] = None) -> Dict[str, Any]:
+    data = {
+        "id": job.id,
+        "kind": job.kind,
+        "meeting_id": job.meeting_id,
+        "status": job.status,
+        "attempts": job.attempts,
+        "last_error": job.last_error,
+        "created_at": job.created_at,
+        "finished_at": job.finished_at,
+    }
+    if children is not None:
+        data["steps"] = [job_to_dict(c) for c in children]
+    return data
+
+
+class JobRunner:
+    """Runs queued jobs from the ``job`` table on a small thread pool.
+
+    Jobs are rows, so they survive restarts: anything left ``running`` by a
+    crash is requeued on ``start``. A failed attempt is retried with
+    exponential backoff until ``max_attempts``. Independent steps (e.g. indexing
+    and emailing the same notes) are separate jobs and run in parallel.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, poll_interval: float = JOB_POLL_SECONDS) -> None:
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._threads: List[threading.Thread] = []
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        with db_session() as session:
+            session.execute(
+                update(Job).where(Job.status == JobStatus.RUNNING).values(status=JobStatus.PENDING)
+            )
+        self._stop.clear()
+        for i in range(self.workers):
+            t = threading.Thread(target=self._loop, name=f"job-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        for t in self._threads:
+            t.join(timeout=5)
+        self._threads = []
+
+    def wake(self) -> None:
+        """Pick up newly enqueued work now instead of at the next poll."""
+        self._wake.set()
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                claimed = self._claim()
+            except Exception as e:
+                logger.error(f"Job queue poll failed: {e}")
+                claimed = None
+            if claimed is None:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+                continue
+            self._run(*claimed)
+
+    def _claim(self) -> Optional[Tuple[int, str, Optional[int], Dict[str, Any]]]:
+        now = datetime.utcnow()
+        with db_session() as session:
+            candidates = session.execute(
+                select(Job.id, Job.kind, Job.meeting_id, Job.payload)
+                .where(Job.status == JobStatus.PENDING, Job.run_after <= now)
+                .order_by(Job.run_after, Job.id)
+                .limit(self.workers)
+            ).all()
+            for job_id, kind, meeting_id, payload in candidates:
+                # another worker may have taken it since the select
+                result = session.execute(
+                    update(Job)
+                    .where(Job.id == job_id, Job.status == JobStatus.PENDING)
+                    .values(status=JobStatus.RUNNING, attempts=Job.attempts + 1)
+                )
+                if result.rowcount == 1:
+                    return job_id, kind, meeting_id, json.loads(payload or "{}")
+        return None
+
+    def _run(self, job_id: int, kind: str, meeting_id: Optional[int], payload: Dict[str, Any]) -> None:
+        handler = _handlers.get(kind)
+        try:
+            if handler is None:
+                raise LookupError(f"No handler registered for job kind {kind!r}")
+            follow_ups = handler(job_id, meeting_id, payload) or []
+        except Exception as e:
+            logger.warning(f"Job {job_id} ({kind}) failed: {e}")
+            with db_session() as session:
+                job = session.get(Job, job_id)
+                job.last_error = str(e)
+                if job.attempts >= job.max_attempts:
+                    job.status = JobStatus.FAILED
+                    job.finished_at = datetime.utcnow()
+                    logger.error(f"Job {job_id} ({kind}) gave up after {job.attempts} attempts")
+                else:
+                    job.status = JobStatus.PENDING
+                    job.run_after = datetime.utcnow() + backoff(job.attempts)
+            return
+        with db_session() as session:
+            job = session.get(Job, job_id)
+            job.status = JobStatus.SUCCEEDED
+            job.finished_at = datetime.utcnow()
+            job.last_error = None
+            for child_kind, child_payload in follow_ups:
+                enqueue(session, child_kind, meeting_id=meeting_id, payload=child_payload, parent_id=job_id)
+        if follow_ups:
+            self.wake()
+
+
+runner = JobRunner()
@@ -0,0 +1,527 @@
+from __future__ import annotations
+
+import functools
+import json
+import math
+import os
+import re
+import shutil
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+from sqlalchemy import func, select
+
+from app.db.session import read_session
+from app.models.event import MeetingEvent
+from app.models.meeting import MeetingSummary
+from app.utils import metrics
+from app.utils.config import LEXICAL_INDEX_PATH, LEXICAL_MERGE_DOCS, LEXICAL_SYNC_BATCH
+from app.utils.locks import ReadWriteLock
+from app.utils.watermark import IdWatermark
+
+CURRENT = "CURRENT.json"
+# BM25 parameters, as in Lucene/Elasticsearch
+K1 = 1.2
+B = 0.75
+
+# where an indexed document came from; events are indexed under this kind
+SUMMARY, EVENT = 0, 1
+EVENT_KIND = "transcript"
+
+# same tokens as the summarizer's vectorizers: lowercased words of 2+ characters, minus stop words
+_TOKEN = re.compile(r"(?u)\b\w\w+\b")
+
+
+@functools.lru_cache(maxsize=None)
+def _stop_words() -> frozenset:
+    # importing sklearn takes about a second; only pay for it once something is indexed or searched
+    from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+
+    return ENGLISH_STOP_WORDS
+
+
+def tokenize(text: str) -> List[str]:
+    stop_words = _stop_words()
+    return [t for t in _TOKEN.findall(text.lower()) if t not in stop_words]
+
+
+@dataclass
+class LexicalHit:
+    score: float
+    source: int  # SUMMARY or EVENT
+    row_id: int  # MeetingSummary.id or MeetingEvent.id
+    meeting_id: int
+    kind: str
+
+    @property
+    def ref(self) -> str:
+        return f"{'summary' if self.source == SUMMARY else 'event'}:{self.row_id}"
+
+
+class _Column:
+    """Append-only numpy column, grown by doubling."""
+
+    def __init__(self, dtype) -> None:
+        self._data = np.empty(1024, dtype=dtype)
+        self.size = 0
+
+    def extend(self, values) -> None:
+        values = np.asarray(values, dtype=self._data.dtype)
+        need = self.size + len(values)
+        if need > len(self._data):
+            grown = np.empty(max(need, 2 * len(self._data)), dtype=self._data.dtype)
+            grown[: self.size] = self._data[: self.size]
+            self._data = grown
+        self._data[self.size:need] = values
+        self.size = need
+
+    @property
+    def values(self) -> np.ndarray:
+        return self._data[: self.size]
+
+
+# per-document columns, persisted as <name>.npy
+_DOC_COLUMNS = {
+    "doc_len": np.int32,
+    "doc_meeting": np.int64,
+    "doc_kind": np.uint8,
+    "doc_source": np.uint8,
+    "doc_row": np.int64,
+}
+# per-meeting document lists, CSR-style like the postings: the documents of meeting_keys[i]
+# are meeting_docs[meeting_offsets[i]:meeting_offsets[i + 1]], in id order
+_MEETING_ARRAYS = ("meeting_keys", "meeting_offsets", "meeting_docs")
+
+
+def _by_meeting(doc_meeting: np.ndarray) -> Dict[str, np.ndarray]:
+    order = np.argsort(doc_meeting, kind="stable").astype(np.int32)
+    keys, counts = np.unique(doc_meeting[order], return_counts=True)
+    offsets = np.zeros(len(keys) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    return {"meeting_keys": keys.astype(np.int64), "meeting_offsets": offsets, "meeting_docs": order}
+
+
+def _intersect(docs: np.ndarray, tfs: np.ndarray, candidates: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """The postings among the sorted doc ids ``candidates``, by binary search from the shorter side."""
+    if len(candidates) < len(docs):
+        at = np.searchsorted(docs, candidates)
+        found = at < len(docs)
+        found[found] = docs[at[found]] == candidates[found]
+        return candidates[found], tfs[at[found]]
+    at = np.searchsorted(candidates, docs)
+    found = at < len(candidates)
+    found[found] = candidates[at[found]] == docs[found]
+    return docs[found], tfs[found]
+
+
+class LexicalIndex:
+    """BM25 over summary and transcript text: an inverted index that needs no model.
+
+    The index is a persisted base plus an in-memory delta. The base is a
+    CSR-style posting list (``offsets`` per term into ``postings_doc`` and
+    ``postings_tf``) and per-document columns, all ``.npy`` files opened with
+    ``mmap_mode="r"``, so loading costs no more than reading the vocabulary.
+    ``sync`` appends rows added to ``MeetingSummary`` and ``MeetingEvent``
+    past the stored ``IdWatermark``s to the delta; once the delta holds
+    ``LEXICAL_MERGE_DOCS`` documents it is merged into a new base generation
+    on disk and swapped in. Each meeting's documents are listed too, so a
+    meeting-scoped query only looks its own documents up in the postings.
+    Queries take a read lock; only the swap and delta appends are exclusive.
+    Nothing is searched until the first ``sync``, which the scheduler runs at
+    startup, has loaded the index.
+    """
+
+    def __init__(self, index_dir: Optional[str] = None) -> None:
+        self.index_dir = index_dir or LEXICAL_INDEX_PATH
+        self._lock = ReadWriteLock()
+        self._sync_lock = threading.Lock()  # one writer: sync and merge
+        self._terms: Dict[str, int] = {}
+        self._kinds: List[str] = []
+        self._generation: Optional[str] = None
+        self._base: Dict[str, np.ndarray] = {}
+        self._base_docs = 0
+        self._base_terms = 0
+        self._delta_postings: Dict[int, Tuple[List[int], List[int]]] = {}
+        self._delta_cols = {name: _Column(dtype) for name, dtype in _DOC_COLUMNS.items()}
+        self._delta_meetings: Dict[int, List[int]] = {}
+        self._total_len = 0
+        self.summaries = IdWatermark()
+        self.events = IdWatermark()
+        self._loaded = False
+        self._search_ms = metrics.histogram("lexical.search_ms")
+        self._indexed = metrics.counter("lexical.indexed")
+        metrics.register("lexical", self)
+
+    # -- state -------------------------------------------------------------
+
+    @property
+    def size(self) -> int:
+        return self._base_docs + self._delta_cols["doc_len"].size
+
+    def _kind_code(self, kind: str) -> int:
+        try:
+            return self._kinds.index(kind)
+        except ValueError:
+            self._kinds.append(kind)
+            return len(self._kinds) - 1
+
+    def _doc_values(self, name: str, docs: np.ndarray) -> np.ndarray:
+        """Column ``name`` for global doc ids ``docs``, from the base or the delta."""
+        delta = self._delta_cols[name].values
+        if not self._base_docs:
+            return delta[docs]
+        out = np.empty(len(docs), dtype=_DOC_COLUMNS[name])
+        in_base = docs < self._base_docs
+        out[in_base] = self._base[name][docs[in_base]]
+        out[~in_base] = delta[docs[~in_base] - self._base_docs]
+        return out
+
+    def _posting_parts(self, term_id: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """(docs, tfs) of ``term_id`` in the base and in the delta; slices of the memmaps, nothing read yet."""
+        parts = []
+        if term_id < self._base_terms:
+            lo, hi = self._base["offsets"][term_id], self._base["offsets"][term_id + 1]
+            parts.append((self._base["postings_doc"][lo:hi], self._base["postings_tf"][lo:hi]))
+        delta = self._delta_postings.get(term_id)
+        if delta is not None:
+            parts.append((np.asarray(delta[0], dtype=np.int32), np.asarray(delta[1], dtype=np.uint16)))
+        return parts
+
+    def _postings(self, term_id: int, candidates: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Postings of ``term_id``, only those among the sorted doc ids ``candidates`` if given."""
+        parts = self._posting_parts(term_id)
+        if candidates is not None:
+            parts = [_intersect(docs, tfs, candidates) for docs, tfs in parts]
+        if not parts:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.uint16)
+        if len(parts) == 1:
+            return parts[0]
+        return np.concatenate([d for d, _ in parts]), np.concatenate([t for _, t in parts])
+
+    def _meeting_docs(self, meeting_ids: Iterable[int]) -> np.ndarray:
+        """Sorted doc ids of the given meetings' documents."""
+        parts = []
+        keys = self._base.get("meeting_keys")
+        for meeting_id in set(meeting_ids):
+            if keys is not None and len(keys):
+                i = int(np.searchsorted(keys, meeting_id))
+                if i < len(keys) and keys[i] == meeting_id:
+                    lo, hi = self._base["meeting_offsets"][i], self._base["meeting_offsets"][i + 1]
+                    parts.append(self._base["meeting_docs"][lo:hi])
+            delta = self._delta_meetings.get(meeting_id)
+            if delta:
+                parts.append(np.asarray(delta, dtype=np.int32))
+        if not parts:
+            return np.empty(0, dtype=np.int32)
+        return np.sort(np.concatenate(parts))
+
+    # -- persistence -------------------------------------------------------
+
+    def _reset(self) -> None:
+        """Forget everything indexed; call with ``_sync_lock`` and the write lock held."""
+        self._terms, self._kinds = {}, []
+        self._base, self._base_docs, self._base_terms = {}, 0, 0
+        self._delta_postings = {}
+        self._delta_cols = {name: _Column(dtype) for name, dtype in _DOC_COLUMNS.items()}
+        self._delta_meetings = {}
+        self._total_len = 0
+        self.summaries, self.events = IdWatermark(), IdWatermark()
+
+    def _check_watermarks(self) -> None:
+        """Rebuild if the database is behind the index, e.g. it was recreated under a kept index."""
+        with read_session() as session:
+            max_summary = session.scalar(select(func.coalesce(func.max(MeetingSummary.id), 0)))
+            max_event = session.scalar(select(func.coalesce(func.max(MeetingEvent.id), 0)))
+        if max_summary < self.summaries.last_id or max_event < self.events.last_id:
+            logger.warning("Lexical index is ahead of the database; rebuilding it")
+            with self._lock.write():
+                self._reset()
+
+    def _gen_dir(self, generation: str) -> str:
+        return os.path.join(self.index_dir, generation)
+
+    def load(self) -> None:
+        """Open the newest persisted generation, if any."""
+        with self._sync_lock, self._lock.write():
+            self._loaded = True
+            current = os.path.join(self.index_dir, CURRENT)
+            if not os.path.exists(current):
+                return
+            try:
+                with open(current, "r", encoding="utf-8") as f:
+                    generation = json.load(f)["generation"]
+                directory = self._gen_dir(generation)
+                with open(os.path.join(directory, "meta.json"), "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+                with open(os.path.join(directory, "terms.json"), "r", encoding="utf-8") as f:
+                    terms = json.load(f)
+                base = {
+                    name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+                    for name in ("offsets", "postings_doc", "postings_tf", *_DOC_COLUMNS)
+                }
+                if all(os.path.exists(os.path.join(directory, f"{name}.npy")) for name in _MEETING_ARRAYS):
+                    base.update(
+                        (name, np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")) for name in _MEETING_ARRAYS
+                    )
+                else:
+                    # written before meetings were listed; the next merge persists them
+                    base.update(_by_meeting(np.asarray(base["doc_meeting"])))
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Lexical index at {self.index_dir} is unreadable ({e}); rebuilding from the database")
+                return
+            self._generation = generation
+            self._terms = {t: i for i, t in enumerate(terms)}
+            self._kinds = meta["kinds"]
+            self._base = base
+            self._base_docs = meta["docs"]
+            self._base_terms = len(terms)
+            self._total_len = meta["total_len"]
+            self.summaries = IdWatermark.from_dict(meta.get("summaries") or {"last_id": meta["last_summary_id"]})
+            self.events = IdWatermark.from_dict(meta.get("events") or {"last_id": meta["last_event_id"]})
+        logger.info(f"Loaded lexical index {generation}: {self._base_docs} documents, {self._base_terms} terms")
+
+    def _merge(self) -> None:
+        """Write base + delta as a new generation and swap it in. Call with ``_sync_lock`` held."""
+        t0 = time.perf_counter()
+        n_terms = len(self._terms)
+        base_counts = np.zeros(n_terms, dtype=np.int64)
+        if self._base_terms:
+            base_counts[: self._base_terms] = np.diff(self._base["offsets"])
+        delta_counts = np.zeros(n_terms, dtype=np.int64)
+        for term_id, (docs, _) in self._delta_postings.items():
+            delta_counts[term_id] = len(docs)
+        offsets = np.zeros(n_terms + 1, dtype=np.int64)
+        np.cumsum(base_counts + delta_counts, out=offsets[1:])
+        postings_doc = np.empty(offsets[-1], dtype=np.int32)
+        postings_tf = np.empty(offsets[-1], dtype=np.uint16)
+        if self._base_terms:
+            # base postings keep their order and move by the delta postings of earlier terms
+            old_offsets = np.asarray(self._base["offsets"])
+            term_of = np.repeat(np.arange(self._base_terms), base_counts[: self._base_terms])
+            dest = offsets[term_of] + np.arange(len(term_of)) - old_offsets[term_of]
+            postings_doc[dest] = self._base["postings_doc"]
+            postings_tf[dest] = self._base["postings_tf"]
+        for term_id, (docs, tfs) in self._delta_postings.items():
+            at = offsets[term_id] + base_counts[term_id]
+            postings_doc[at:at + len(docs)] = docs
+            postings_tf[at:at + len(tfs)] = tfs
+        columns = {
+            name: np.concatenate([np.asarray(self._base[name]) if self._base_docs else np.empty(0, dtype=dtype),
+                                  self._delta_cols[name].values])
+            for name, dtype in _DOC_COLUMNS.items()
+        }
+        terms = [None] * n_terms
+        for term, term_id in self._terms.items():
+            terms[term_id] = term
+
+        generation = f"g{int(self._generation[1:]) + 1 if self._generation else 1:08d}"
+        directory = self._gen_dir(generation)
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory)
+        arrays = {
+            "offsets": offsets, "postings_doc": postings_doc, "postings_tf": postings_tf,
+            **columns, **_by_meeting(columns["doc_meeting"]),
+        }
+        for name, array in arrays.items():
+            np.save(os.path.join(directory, f"{name}.npy"), array)
+        meta = {
+            "version": 1,
+            "docs": len(columns["doc_len"]),
+            "total_len": self._total_len,
+            "kinds": self._kinds,
+            "summaries": self.summaries.to_dict(),
+            "events": self.events.to_dict(),
+        }
+        with open(os.path.join(directory, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        with open(os.path.join(directory, "terms.json"), "w", encoding="utf-8") as f:
+            json.dump(terms, f)
+        for name in os.listdir(directory):
+            with open(os.path.join(directory, name), "rb") as f:
+                os.fsync(f.fileno())
+        tmp = os.path.join(self.index_dir, CURRENT + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"generation": generation}, f)
+            f.flush()
+            os.fsync(f.fileno())
+
+        previous = self._generation
+        with self._lock.write():
+            os.replace(tmp, os.path.join(self.index_dir, CURRENT))
+            self._base = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r") for name in arrays}
+            self._base_docs = meta["docs"]
+            self._base_terms = n_terms
+            self._generation = generation
+            self._delta_postings = {}
+            self._delta_cols = {name: _Column(dtype) for name, dtype in _DOC_COLUMNS.items()}
+            self._delta_meetings = {}
+        if previous:
+            # open memmaps keep the old files readable until queries drop them
+            shutil.rmtree(self._gen_dir(previous), ignore_errors=True)
+        logger.info(
+            f"Merged lexical index into {generation}: {meta['docs']} documents, {n_terms} terms "
+            f"in {time.perf_counter() - t0:.2f}s"
+        )
+
+    # -- writes ------------------------------------------------------------
+
+    def _append(self, docs: List[Tuple[int, int, int, str, str]]) -> None:
+        """Index ``(source, row_id, meeting_id, kind, text)`` documents; call with ``_sync_lock`` held."""
+        tokenized = [tokenize(text) for *_, text in docs]
+        with self._lock.write():
+            first = self.size
+            for offset, ((source, row_id, meeting_id, kind, _), tokens) in enumerate(zip(docs, tokenized)):
+                counts: Dict[int, int] = {}
+                for token in tokens:
+                    term_id = self._terms.get(token)
+                    if term_id is None:
+                        term_id = self._terms[token] = len(self._terms)
+                    counts[term_id] = counts.get(term_id, 0) + 1
+                for term_id, tf in counts.items():
+                    entry = self._delta_postings.get(term_id)
+                    if entry is None:
+                        entry = self._delta_postings[term_id] = ([], [])
+                    entry[0].append(first + offset)
+                    entry[1].append(min(tf, 65535))
+                self._delta_meetings.setdefault(meeting_id, []).append(first + offset)
+                self._total_len += len(tokens)
+            self._delta_cols["doc_len"].extend([len(t) for t in tokenized])
+            self._delta_cols["doc_meeting"].extend([d[2] for d in docs])
+            self._delta_cols["doc_kind"].extend([self._kind_code(d[3]) for d in docs])
+            self._delta_cols["doc_source"].extend([d[0] for d in docs])
+            self._delta_cols["doc_row"].extend([d[1] for d in docs])
+            self.summaries.advance(d[1] for d in docs if d[0] == SUMMARY)
+            self.events.advance(d[1] for d in docs if d[0] == EVENT)
+        self._indexed.inc(len(docs))
+
+    def sync(self) -> int:
+        """Index summaries and events the watermarks have not seen; returns how many."""
+        if not self._loaded:
+            self.load()
+            with self._sync_lock:
+                self._check_watermarks()
+        added = 0
+        with self._sync_lock:
+            while True:
+                with read_session() as session:
+                    summaries = session.execute(
+                        select(MeetingSummary.id, MeetingSummary.meeting_id, MeetingSummary.kind, MeetingSummary.summary_text)
+                        .where(self.summaries.condition(MeetingSummary.id))
+                        .order_by(MeetingSummary.id)
+                        .limit(LEXICAL_SYNC_BATCH)
+                    ).all()
+                    events = session.execute(
+                        select(MeetingEvent.id, MeetingEvent.meeting_id, MeetingEvent.content)
+                        .where(self.events.condition(MeetingEvent.id))
+                        .order_by(MeetingEvent.id)
+                        .limit(LEXICAL_SYNC_BATCH)
+                    ).all()
+                docs = [(SUMMARY, r.id, r.meeting_id, r.kind, r.summary_text) for r in summaries]
+                docs += [(EVENT, r.id, r.meeting_id, EVENT_KIND, r.content) for r in events]
+                if not docs:
+                    break
+                self._append(docs)
+                added += len(docs)
+                if self._delta_cols["doc_len"].size >= LEXICAL_MERGE_DOCS:
+                    self._merge()
+        return added
+
+    def flush(self) -> None:
+        """Merge whatever is in the delta, so a restart does not re-read it from the database."""
+        with self._sync_lock:
+            if self._delta_cols["doc_len"].size:
+                self._merge()
+
+    # -- queries -----------------------------------------------------------
+
+    def search(
+        self,
+        question: str,
+        k: int = 10,
+        meeting_ids: Optional[Iterable[int]] = None,
+        kinds: Optional[Iterable[str]] = None,
+    ) -> List[LexicalHit]:
+        """Top-``k`` documents for ``question`` by BM25, optionally within meetings and kinds."""
+        if not self._loaded:
+            # the scheduler's first sync loads it, off the request path; until then retrieval is dense-only
+            return []
+        started = time.perf_counter()
+        with self._lock.read():
+            n_docs = self.size
+            term_ids = {self._terms[t] for t in tokenize(question) if t in self._terms}
+            if not n_docs or not term_ids:
+                return []
+            kind_codes = None
+            if kinds is not None:
+                kind_codes = [self._kinds.index(kd) for kd in set(kinds) if kd in self._kinds]
+                if not kind_codes:
+                    return []
+            candidates = None
+            if meeting_ids is not None:
+                candidates = self._meeting_docs(meeting_ids)
+                if not len(candidates):
+                    return []
+            avg_len = self._total_len / n_docs
+            all_docs, all_scores = [], []
+            for term_id in term_ids:
+                # df over the whole corpus, before filtering, like a global idf
+                df = sum(len(docs) for docs, _ in self._posting_parts(term_id))
+                if not df:
+                    continue
+                idf = math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+                docs, tfs = self._postings(term_id, candidates)
+                if kind_codes is not None and len(docs):
+                    keep = np.isin(self._doc_values("doc_kind", docs), kind_codes)
+                    docs, tfs = docs[keep], tfs[keep]
+                if not len(docs):
+                    continue
+                tf = tfs.astype(np.float32)
+                norm = K1 * (1.0 - B + B * self._doc_values("doc_len", docs) / avg_len)
+                all_docs.append(docs)
+                all_scores.append(idf * tf * (K1 + 1.0) / (tf + norm))
+            if not all_docs:
+                return []
+            docs = np.concatenate(all_docs)
+            unique, inverse = np.unique(docs, return_inverse=True)
+            scores = np.bincount(inverse, weights=np.concatenate(all_scores))
+            if k < len(scores):
+                top = np.argpartition(-scores, k)[:k]
+            else:
+                top = np.arange(len(scores))
+            top = top[np.argsort(-scores[top], kind="stable")]
+            best = unique[top]
+            sources = self._doc_values("doc_source", best)
+            rows = self._doc_values("doc_row", best)
+            meetings = self._doc_values("doc_meeting", best)
+            kind_of = self._doc_values("doc_kind", best)
+            hits = [
+                LexicalHit(float(scores[t]), int(s), int(r), int(m), self._kinds[int(c)])
+                for t, s, r, m, c in zip(top, sources, rows, meetings, kind_of)
+            ]
+        self._search_ms.observe((time.perf_counter() - started) * 1000.0)
+        return hits
+
+    def snapshot(self) -> Dict[str, int]:
+        return {
+            "documents": self.size,
+            "delta": self._delta_cols["doc_len"].size,
+            "terms": len(self._terms),
+        }
+
+
+_index: Optional[LexicalIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_lexical_index() -> LexicalIndex:
+    """Return the process-wide index; opened lazily, caught up by ``sync``."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = LexicalIndex()
+    return _index
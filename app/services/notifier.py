@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+from loguru import logger
+
+from app.utils import metrics
+from app.utils.config import FEED_HISTORY, FEED_QUEUE_SIZE
+
+MEETINGS_TOPIC = "meetings"
+
+
+def meeting_topic(meeting_id: int) -> str:
+    return f"meeting:{meeting_id}"
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _frame(seq: int, event: str, data: Dict[str, Any]) -> bytes:
+    return f"id: {seq}\nevent: {event}\ndata: {json.dumps(data, default=_default)}\n\n".encode("utf-8")
+
+
+class Subscription:
+    """One connected client: a bounded queue of SSE frames, filled from any thread."""
+
+    def __init__(self, topic: str, loop: asyncio.AbstractEventLoop, maxsize: int) -> None:
+        self.topic = topic
+        self.loop = loop
+        self.queue: "asyncio.Queue[bytes]" = asyncio.Queue(maxsize)
+
+    def _deliver(self, frame: bytes) -> None:
+        # runs on the subscriber's loop
+        if self.queue.full():
+            # a client this far behind reloads instead of replaying every frame
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(b"event: resync\ndata: {}\n\n")
+            return
+        self.queue.put_nowait(frame)
+
+
+class Broadcaster:
+    """Fan-out of meeting events to SSE subscribers.
+
+    Publishers (request threads, the scheduler, job workers) call ``publish``
+    after their transaction commits. Each event is serialized once and handed
+    to every subscriber of its topic on that subscriber's event loop, so an
+    idle feed costs nothing and N open tabs cost N queue puts rather than N
+    queries. The last ``history`` frames per topic are kept so a reconnecting
+    ``EventSource`` resumes from ``Last-Event-ID`` without refetching.
+    """
+
+    def __init__(self, history: int = FEED_HISTORY, queue_size: int = FEED_QUEUE_SIZE) -> None:
+        self.history = history
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._history: Dict[str, Deque[Tuple[int, bytes]]] = {}
+        self._seq = itertools.count(1)
+        self._last_seq = 0
+        self._lock = threading.Lock()
+        self._published = metrics.counter("feed.published")
+        metrics.register("feed", self)
+
+    def subscribe(self, topic: str, last_event_id: Optional[int] = None) -> Subscription:
+        """Register a subscriber; call from the event loop that will read its queue."""
+        sub = Subscription(topic, asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            if last_event_id is not None:
+                past = self._history.get(topic, ())
+                # replay only if nothing newer has aged out of the history and the
+                # id comes from this process (ids restart with the server)
+                complete = len(past) < self.history or past[0][0] <= last_event_id
+                if complete and last_event_id <= self._last_seq:
+                    for seq, frame in past:
+                        if seq > last_event_id:
+                            sub._deliver(frame)
+                else:
+                    sub._deliver(b"event: resync\ndata: {}\n\n")
+            self._subscribers.setdefault(topic, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            subs = self._subscribers.get(sub.topic)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subscribers[sub.topic]
+
+    def publish(self, topics: List[str], event: str, data: Dict[str, Any]) -> None:
+        with self._lock:
+            seq = self._last_seq = next(self._seq)
+            frame = _frame(seq, event, data)
+            targets: List[Subscription] = []
+            for topic in topics:
+                self._history.setdefault(topic, deque(maxlen=self.history)).append((seq, frame))
+                targets.extend(self._subscribers.get(topic, ()))
+        self._published.inc()
+        for sub in targets:
+            try:
+                sub.loop.call_soon_threadsafe(sub._deliver, frame)
+            except RuntimeError:
+                # the subscriber's loop has shut down
+                self.unsubscribe(sub)
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "topics": len(self._subscribers),
+                "subscribers": sum(len(s) for s in self._subscribers.values()),
+            }
+
+
+broadcaster = Broadcaster()
+
+
+def publish_meeting(meeting: Dict[str, Any]) -> None:
+    """A meeting was created or changed status; goes to the list feed and its own feed."""
+    try:
+        broadcaster.publish([MEETINGS_TOPIC, meeting_topic(meeting["id"])], "meeting", meeting)
+    except Exception as e:
+        logger.warning(f"Failed to publish meeting {meeting.get('id')}: {e}")
+
+
+def publish_summary(meeting_id: int, summary: Dict[str, Any]) -> None:
+    try:
+        broadcaster.publish([meeting_topic(meeting_id)], "summary", summary)
+    except Exception as e:
+        logger.warning(f"Failed to publish summary for meeting {meeting_id}: {e}")
+
+
+def summary_to_dict(summary) -> Dict[str, Any]:
+    """The shape ``GET /meetings/{id}/summaries`` returns for each row."""
+    return {
+        "id": summary.id,
+        "kind": summary.kind,
+        "window_start": summary.window_start.isoformat(),
+        "window_end": summary.window_end.isoformat(),
+        "summary_text": summary.summary_text,
+    }
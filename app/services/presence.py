@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set
+
+from loguru import logger
+from sqlalchemy import select, update
+
+from app.db.session import db_session
+from app.models.meeting import Meeting, Participant
+from app.utils import metrics
+from app.utils.config import PRESENCE_ONLINE_SECONDS
+
+
+class _Presence:
+    __slots__ = ("participant_id", "name", "joined_at", "last_seen_at", "dirty")
+
+    def __init__(self, participant_id: int, name: str, joined_at: Optional[datetime], last_seen_at: Optional[datetime]) -> None:
+        self.participant_id = participant_id
+        self.name = name
+        self.joined_at = joined_at
+        self.last_seen_at = last_seen_at
+        self.dirty = False
+
+
+class PresenceTracker:
+    """Who joined each meeting and when they were last seen, kept in memory.
+
+    A meeting's roster (participant ids and emails) is loaded from the
+    database once; after that ``join`` and ``heartbeat`` are dictionary
+    updates. ``flush`` writes the changed ``joined_at``/``last_seen_at``
+    values back to ``Participant`` in one executemany, so a heartbeat costs
+    no query of its own. Between flushes this map, not the table, is the
+    source of truth for presence.
+    """
+
+    def __init__(self, online_seconds: float = PRESENCE_ONLINE_SECONDS) -> None:
+        self.online = timedelta(seconds=online_seconds)
+        self._rosters: Dict[int, Dict[str, _Presence]] = {}
+        self._retired: Set[int] = set()
+        self._lock = threading.Lock()
+        self._pings = metrics.counter("presence.pings")
+        self._flush_rows = metrics.histogram("presence.flush_rows", metrics.SIZE_BUCKETS)
+        self._flush_ms = metrics.histogram("presence.flush_ms")
+        metrics.register("presence", self)
+
+    def has_roster(self, meeting_id: int) -> bool:
+        with self._lock:
+            return meeting_id in self._rosters
+
+    def load(self, meeting_id: int, participants: Iterable, replace: bool = False) -> None:
+        """Install a roster from rows with ``id``, ``email``, ``name``, ``joined_at`` and ``last_seen_at``.
+
+        An existing roster is kept unless ``replace``: it may hold presence
+        not yet flushed.
+        """
+        roster = {p.email: _Presence(p.id, p.name, p.joined_at, p.last_seen_at) for p in participants}
+        with self._lock:
+            if replace or meeting_id not in self._rosters:
+                self._rosters[meeting_id] = roster
+            self._retired.discard(meeting_id)
+
+    def ensure_loaded(self, session, meeting_ids: Iterable[int]) -> None:
+        """Load the rosters of any of ``meeting_ids`` not in memory yet.
+
+        Ids of meetings that do not exist get no roster, so requests for made-up
+        ids cannot grow the map; they are looked up again each time.
+        """
+        with self._lock:
+            missing = [m for m in set(meeting_ids) if m not in self._rosters]
+        if not missing:
+            return
+        missing = list(session.scalars(select(Meeting.id).where(Meeting.id.in_(missing))))
+        if not missing:
+            return
+        rows = session.execute(
+            select(
+                Participant.meeting_id, Participant.id, Participant.email, Participant.name,
+                Participant.joined_at, Participant.last_seen_at,
+            ).where(Participant.meeting_id.in_(missing))
+        ).all()
+        by_meeting: Dict[int, List] = {m: [] for m in missing}
+        for row in rows:
+            by_meeting[row.meeting_id].append(row)
+        for meeting_id, participants in by_meeting.items():
+            self.load(meeting_id, participants)
+
+    def _touch(self, meeting_id: int, email: str, at: datetime, join: bool) -> bool:
+        with self._lock:
+            entry = self._rosters.get(meeting_id, {}).get(email)
+            if entry is None:
+                return False
+            if join:
+                entry.joined_at = at
+            entry.last_seen_at = at
+            entry.dirty = True
+        self._pings.inc()
+        return True
+
+    def join(self, meeting_id: int, email: str, at: Optional[datetime] = None) -> bool:
+        """Mark a participant as joined; False if they are not on the meeting's roster."""
+        return self._touch(meeting_id, email, at or datetime.utcnow(), join=True)
+
+    def heartbeat(self, meeting_id: int, email: str, at: Optional[datetime] = None) -> bool:
+        return self._touch(meeting_id, email, at or datetime.utcnow(), join=False)
+
+    def participants(self, meeting_id: int, now: Optional[datetime] = None) -> List[Dict]:
+        """Presence of everyone on a loaded roster; ``online`` if seen in the last ``online`` window."""
+        now = now or datetime.utcnow()
+        with self._lock:
+            roster = list(self._rosters.get(meeting_id, {}).items())
+        return [
+            {
+                "email": email,
+                "name": p.name,
+                "joined_at": p.joined_at,
+                "last_seen_at": p.last_seen_at,
+                "online": p.last_seen_at is not None and now - p.last_seen_at <= self.online,
+            }
+            for email, p in sorted(roster)
+        ]
+
+    def absentees(self, meeting_id: int) -> List[str]:
+        """Emails on a loaded roster that have not joined."""
+        with self._lock:
+            return sorted(email for email, p in self._rosters.get(meeting_id, {}).items() if p.joined_at is None)
+
+    def retire(self, meeting_id: int) -> None:
+        """The meeting ended; drop its roster after the next flush has written it."""
+        with self._lock:
+            if meeting_id in self._rosters:
+                self._retired.add(meeting_id)
+
+    def _take_dirty(self) -> List[Dict]:
+        with self._lock:
+            rows = []
+            for roster in self._rosters.values():
+                for p in roster.values():
+                    if p.dirty:
+                        p.dirty = False
+                        rows.append({"id": p.participant_id, "joined_at": p.joined_at, "last_seen_at": p.last_seen_at})
+            return rows
+
+    def _drop_retired(self) -> None:
+        with self._lock:
+            for meeting_id in list(self._retired):
+                roster = self._rosters.get(meeting_id, {})
+                if not any(p.dirty for p in roster.values()):
+                    self._rosters.pop(meeting_id, None)
+                    self._retired.discard(meeting_id)
+
+    def _restore(self, rows: List[Dict]) -> None:
+        # a failed flush is retried with the next one; newer pings already marked their entries
+        ids = {r["id"] for r in rows}
+        with self._lock:
+            for roster in self._rosters.values():
+                for p in roster.values():
+                    if p.participant_id in ids:
+                        p.dirty = True
+
+    def flush(self) -> int:
+        """Write changed presence to ``Participant`` in one batch; returns the number of rows."""
+        rows = self._take_dirty()
+        if not rows:
+            self._drop_retired()
+            return 0
+        started = time.perf_counter()
+        try:
+            with db_session() as session:
+                # UPDATE ... WHERE id = :id, executemany
+                session.execute(update(Participant), rows)
+        except Exception as e:
+            logger.warning(f"Presence flush of {len(rows)} participants failed: {e}")
+            self._restore(rows)
+            return 0
+        self._drop_retired()
+        self._flush_ms.observe((time.perf_counter() - started) * 1000.0)
+        self._flush_rows.observe(len(rows))
+        return len(rows)
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "meetings": len(self._rosters),
+                "participants": sum(len(r) for r in self._rosters.values()),
+                "dirty": sum(p.dirty for r in self._rosters.values() for p in r.values()),
+            }
+
+
+presence = PresenceTracker()
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select
+
+from app.db.session import read_session
+from app.models.event import MeetingEvent
+from app.models.meeting import MeetingSummary
+from app.services.lexical_index import SUMMARY, LexicalHit, get_lexical_index
+from app.services.vector_store import VectorHit, get_vector_store
+from app.utils.config import RAG_CANDIDATES, RAG_RRF_K
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[Hashable]], k: int = RAG_RRF_K) -> List[Tuple[Hashable, float]]:
+    """Merge ranked lists by ``sum(1 / (k + rank))``, best first.
+
+    Only ranks are used, so BM25 and cosine scores need no calibration
+    against each other; ``k`` damps how much the very top of one list
+    outweighs agreement between lists.
+    """
+    fused: Dict[Hashable, float] = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking, 1):
+            fused[key] = fused.get(key, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda kv: kv[1], reverse=True)
+
+
+def _hydrate(hits: List[LexicalHit]) -> Dict[str, VectorHit]:
+    """Text and timestamps for lexical hits, which the index does not store; one query per table."""
+    summary_ids = [h.row_id for h in hits if h.source == SUMMARY]
+    event_ids = [h.row_id for h in hits if h.source != SUMMARY]
+    rows: Dict[str, Tuple[str, str, Optional[str]]] = {}
+    with read_session() as session:
+        if summary_ids:
+            for row_id, text, created_at in session.execute(
+                select(MeetingSummary.id, MeetingSummary.summary_text, MeetingSummary.created_at)
+                .where(MeetingSummary.id.in_(summary_ids))
+            ):
+                rows[f"summary:{row_id}"] = (text, created_at.isoformat(), None)
+        if event_ids:
+            for row_id, text, created_at, author in session.execute(
+                select(MeetingEvent.id, MeetingEvent.content, MeetingEvent.created_at, MeetingEvent.author)
+                .where(MeetingEvent.id.in_(event_ids))
+            ):
+                rows[f"event:{row_id}"] = (text, created_at.isoformat(), author)
+    hydrated = {}
+    for h in hits:
+        if h.ref in rows:
+            text, created_at, author = rows[h.ref]
+            hydrated[h.ref] = VectorHit(
+                text=text, score=h.score, meeting_id=h.meeting_id, kind=h.kind, created_at=created_at, ref=h.ref,
+                event_ids=[h.row_id] if h.source != SUMMARY else None,
+                authors=[author] if author else None,
+            )
+    return hydrated
+
+
+def retrieve(
+    question: str,
+    k: int = 5,
+    meeting_ids: Optional[Iterable[int]] = None,
+    kinds: Optional[Iterable[str]] = None,
+) -> List[VectorHit]:
+    """Top-``k`` passages for ``question`` from BM25 and, when a model is loaded, dense search.
+
+    Each retriever contributes its best ``RAG_CANDIDATES``; with both, the
+    lists are merged with reciprocal-rank fusion and ``score`` is the fused
+    score. Without embeddings the BM25 ranking is returned as is.
+    """
+    meeting_ids = list(meeting_ids) if meeting_ids is not None else None
+    kinds = list(kinds) if kinds else None
+    depth = max(k, RAG_CANDIDATES)
+    lexical = get_lexical_index().search(question, depth, meeting_ids, kinds)
+    vs = get_vector_store()
+    dense = vs.query(question, k=depth, meeting_ids=meeting_ids, kinds=kinds) if vs.model is not None else []
+    if not lexical:
+        return dense[:k]
+    if not dense:
+        hydrated = _hydrate(lexical[:k])
+        return [hydrated[h.ref] for h in lexical[:k] if h.ref in hydrated]
+
+    # dense records without a source row fall back to their text as the key
+    dense_by_key = {h.ref or f"text:{h.text}": h for h in dense}
+    lexical_by_key = {h.ref: h for h in lexical}
+    fused = reciprocal_rank_fusion([list(dense_by_key), list(lexical_by_key)])[:k]
+    hydrated = _hydrate([lexical_by_key[key] for key, _ in fused if key not in dense_by_key])
+    hits = []
+    for key, score in fused:
+        hit = dense_by_key.get(key) or hydrated.get(key)
+        if hit is None:
+            continue  # the row was deleted since it was indexed
+        hits.append(VectorHit(
+            text=hit.text, score=score, meeting_id=hit.meeting_id, kind=hit.kind, created_at=hit.created_at, ref=hit.ref,
+            event_ids=hit.event_ids, authors=hit.authors,
+        ))
+    return hits
@@ -1,89 +1,303 @@
 from __future__ import annotations
 
+import functools
+import threading
+import time
 from datetime import datetime, timedelta
-from typing import List
+from typing import Callable, Dict, List, Optional, Set, Tuple
 
 from apscheduler.schedulers.background import BackgroundScheduler
-from sqlalchemy import select
+from loguru import logger
+from sqlalchemy import and_, func, insert, or_, select, update
 
 from app.db.session import db_session
-from app.models.meeting import Meeting, MeetingStatus, MeetingSummary, Participant
+from app.models.meeting import Meeting, MeetingStatus, MeetingSummary, SummaryWatermark
 from app.models.event import MeetingEvent
-from app.services.summarizer import summarize_text
-from app.services.emailer import send_email
+from app.services.activity import activity
+from app.services.notifier import publish_summary, summary_to_dict
+from app.services.presence import presence
+from app.services.summarizer import discard_summarizer, summarizer_for, tokenize_many
+from app.services.emailer import queue_email
+from app.services.lexical_index import get_lexical_index
+from app.utils import metrics
+from app.utils.config import (
+    LEXICAL_SYNC_SECONDS,
+    PRESENCE_FLUSH_SECONDS,
+    ROLLING_BATCH_EVENTS,
+    ROLLING_CHECK_SECONDS,
+    ROLLING_MAX_STALENESS_SECONDS,
+)
 
 
 scheduler = BackgroundScheduler()
 
+ROLLING_MAX_STALENESS = timedelta(seconds=ROLLING_MAX_STALENESS_SECONDS)
+ROLLING_CHECK_INTERVAL = timedelta(seconds=ROLLING_CHECK_SECONDS)
+ABSENTEE_INTERVAL = timedelta(minutes=3)
+PRESENCE_FLUSH_INTERVAL = timedelta(seconds=PRESENCE_FLUSH_SECONDS)
+LEXICAL_SYNC_INTERVAL = timedelta(seconds=LEXICAL_SYNC_SECONDS)
 
-def summarize_active_meetings() -> None:
+
+def timed_job(name: str, interval: timedelta) -> Callable[[Callable[[], None]], Callable[[], None]]:
+    """Record each run's duration as ``scheduler.<name>_ms`` and warn when it overruns its interval."""
+    hist = metrics.histogram(f"scheduler.{name}_ms")
+    overruns = metrics.counter(f"scheduler.{name}_overruns")
+
+    def decorator(fn: Callable[[], None]) -> Callable[[], None]:
+        @functools.wraps(fn)
+        def wrapper() -> None:
+            started = time.perf_counter()
+            try:
+                fn()
+            finally:
+                elapsed = time.perf_counter() - started
+                hist.observe(elapsed * 1000.0)
+                if elapsed > interval.total_seconds():
+                    overruns.inc()
+                    logger.warning(f"{name} took {elapsed:.1f}s, longer than its {interval} interval")
+        return wrapper
+    return decorator
+
+
+def fetch_new_events(session, seen: Dict[int, int]) -> Dict[int, List[Tuple[int, str, datetime]]]:
+    """``(id, content, created_at)`` of events after each meeting's ``seen`` id, in one query.
+
+    Rows below a meeting's own mark but above the lowest one are dropped
+    here; in steady state all marks sit near the previous run, so that
+    overlap is small. Meetings with no state yet fetch their whole history.
+    """
+    if not seen:
+        return {}
+    fresh = [m for m, w in seen.items() if w == 0]
+    known = [m for m, w in seen.items() if w > 0]
+    scope = []
+    if fresh:
+        scope.append(MeetingEvent.meeting_id.in_(fresh))
+    if known:
+        scope.append(and_(
+            MeetingEvent.meeting_id.in_(known),
+            MeetingEvent.id > min(seen[m] for m in known),
+        ))
+    stmt = (
+        select(MeetingEvent.meeting_id, MeetingEvent.id, MeetingEvent.content, MeetingEvent.created_at)
+        .where(or_(*scope))
+        .order_by(MeetingEvent.meeting_id, MeetingEvent.id)
+    )
+    events: Dict[int, List[Tuple[int, str, datetime]]] = {}
+    for meeting_id, event_id, content, created_at in session.execute(stmt):
+        if event_id > seen[meeting_id]:
+            events.setdefault(meeting_id, []).append((event_id, content, created_at))
+    return events
+
+
+def load_watermarks(session, meeting_ids: List[int]) -> Dict[int, int]:
+    """Persisted watermarks for ``meeting_ids``, creating any that are missing.
+
+    A meeting summarized before watermarks existed starts at the last event
+    its newest rolling summary covered, so it is not summarized again.
+    """
+    marks = dict(session.execute(
+        select(SummaryWatermark.meeting_id, SummaryWatermark.last_event_id)
+        .where(SummaryWatermark.meeting_id.in_(meeting_ids))
+    ).all())
+    missing = [m for m in meeting_ids if m not in marks]
+    if not missing:
+        return marks
+    covered = dict(session.execute(
+        select(MeetingSummary.meeting_id, func.max(MeetingSummary.window_end))
+        .where(MeetingSummary.meeting_id.in_(missing), MeetingSummary.kind == "rolling")
+        .group_by(MeetingSummary.meeting_id)
+    ).all())
+    for meeting_id in missing:
+        start = 0
+        if meeting_id in covered:
+            start = session.scalar(
+                select(func.coalesce(func.max(MeetingEvent.id), 0))
+                .where(MeetingEvent.meeting_id == meeting_id, MeetingEvent.created_at <= covered[meeting_id])
+            )
+        session.add(SummaryWatermark(meeting_id=meeting_id, last_event_id=start))
+        marks[meeting_id] = start
+    session.flush()
+    return marks
+
+
+# the startup sweep and the trigger tick must not summarize the same events concurrently
+_summarize_lock = threading.Lock()
+
+
+def summarize_meetings(meeting_ids: Optional[List[int]] = None) -> None:
+    """Write rolling summaries for the unsummarized events of ``meeting_ids`` (default: every live meeting).
+
+    Events up to a meeting's persisted watermark only feed its term
+    statistics (needed after a restart); everything after it is summarized
+    in order, ``ROLLING_BATCH_EVENTS`` events per summary, and the watermark
+    moves in the same transaction that writes those summaries.
+    """
+    with _summarize_lock:
+        _summarize_meetings(meeting_ids)
+
+
+def _summarize_meetings(meeting_ids: Optional[List[int]]) -> None:
     now = datetime.utcnow()
-    window_start = now - timedelta(minutes=5)
     with db_session() as session:
-        stmt = select(Meeting).where(Meeting.status == MeetingStatus.LIVE)
-        live_meetings: List[Meeting] = list(session.scalars(stmt).all())
-        for meeting in live_meetings:
-            events_stmt = select(MeetingEvent).where(
-                MeetingEvent.meeting_id == meeting.id,
-                MeetingEvent.created_at >= window_start,
-                MeetingEvent.created_at < now,
-            )
-            events = list(session.scalars(events_stmt).all())
-            if not events:
-                continue
-            content_chunks = [e.content for e in events]
-            summary = summarize_text(content_chunks, max_sentences=5)
-            if not summary:
+        live_stmt = select(Meeting.id).where(Meeting.status == MeetingStatus.LIVE)
+        if meeting_ids is not None:
+            live_stmt = live_stmt.where(Meeting.id.in_(meeting_ids))
+        live_ids = list(session.scalars(live_stmt).all())
+        if not live_ids:
+            return
+        marks = load_watermarks(session, live_ids)
+        states = {mid: summarizer_for(mid) for mid in live_ids}
+        seen = {mid: state.last_event_id for mid, state in states.items()}
+        new_events = fetch_new_events(session, seen)
+    if not new_events:
+        return
+
+    # per meeting: one statistics-only segment, then one segment per summary
+    plan = []
+    batches: List[List[str]] = []
+    for meeting_id, events in new_events.items():
+        mark = marks[meeting_id]
+        covered = [e for e in events if e[0] <= mark]
+        pending = [e for e in events if e[0] > mark]
+        segments = []
+        if covered:
+            segments.append((covered, False))
+        for i in range(0, len(pending), ROLLING_BATCH_EVENTS):
+            segments.append((pending[i:i + ROLLING_BATCH_EVENTS], True))
+        plan.append((meeting_id, len(batches), segments))
+        batches.extend([e[1] for e in segment] for segment, _ in segments)
+    tokenized = tokenize_many(batches)
+
+    rows = []
+    advances: Dict[int, int] = {}
+    for meeting_id, offset, segments in plan:
+        state = states[meeting_id]
+        with state.lock:
+            if state.last_event_id != seen[meeting_id]:
+                # the final notes job got here first; its state already has these events
                 continue
-            ms = MeetingSummary(
-                meeting_id=meeting.id,
-                window_start=window_start,
-                window_end=now,
-                summary_text=summary,
-                kind="rolling",
-            )
-            session.add(ms)
+            for j, (segment, summarize) in enumerate(segments):
+                start, end = state.observe_tokens(*tokenized[offset + j], last_event_id=segment[-1][0])
+                if not summarize:
+                    continue
+                advances[meeting_id] = segment[-1][0]
+                summary = state.summarize(max_sentences=5, start=start, end=end)
+                if summary:
+                    rows.append({
+                        "meeting_id": meeting_id,
+                        "window_start": segment[0][2],
+                        "window_end": segment[-1][2],
+                        "summary_text": summary,
+                        "kind": "rolling",
+                        "created_at": now,
+                        "updated_at": now,
+                    })
+    if not advances:
+        return
+
+    created = []
+    lost: Set[int] = set()
+    try:
+        with db_session() as session:
+            for meeting_id, last_event_id in advances.items():
+                # conditional, so a second scheduler process cannot summarize the same events
+                result = session.execute(
+                    update(SummaryWatermark)
+                    .where(SummaryWatermark.meeting_id == meeting_id, SummaryWatermark.last_event_id == marks[meeting_id])
+                    .values(last_event_id=last_event_id, updated_at=now)
+                )
+                if result.rowcount != 1:
+                    lost.add(meeting_id)
+            rows = [r for r in rows if r["meeting_id"] not in lost]
+            if rows:
+                stmt = insert(MeetingSummary).returning(MeetingSummary, sort_by_parameter_order=True)
+                created = [(s.meeting_id, summary_to_dict(s)) for s in session.scalars(stmt, rows).all()]
+    except Exception:
+        lost = set(advances)
+        raise
+    finally:
+        # their in-memory state ran ahead of the watermark; rebuild it from the DB next time
+        for meeting_id in lost:
+            discard_summarizer(meeting_id)
+    # only once committed, so a client that refetches sees the same rows
+    for meeting_id, data in created:
+        publish_summary(meeting_id, data)
+
+
+@timed_job("rolling_summaries", ROLLING_CHECK_INTERVAL)
+def summarize_due_meetings() -> None:
+    """Summarize only the meetings whose new transcript volume or age calls for it."""
+    due = activity.take_due(ROLLING_MAX_STALENESS.total_seconds())
+    if due:
+        summarize_meetings(due)
+
+
+@timed_job("rolling_catchup", ROLLING_MAX_STALENESS)
+def summarize_active_meetings() -> None:
+    """Sweep every live meeting; run once at startup for events ingested before this process."""
+    summarize_meetings(None)
 
 
+@timed_job("check_absentees", ABSENTEE_INTERVAL)
 def check_absentees() -> None:
     """Check for participants who haven't joined and notify them"""
     now = datetime.utcnow()
     # Check meetings that started 2-5 minutes ago (give grace period)
     grace_period_start = now - timedelta(minutes=5)
     grace_period_end = now - timedelta(minutes=2)
-    
+
     with db_session() as session:
-        stmt = select(Meeting).where(
-            Meeting.status == MeetingStatus.LIVE,
-            Meeting.actual_start >= grace_period_start,
-            Meeting.actual_start <= grace_period_end,
-        )
-        live_meetings: List[Meeting] = list(session.scalars(stmt).all())
-        
-        for meeting in live_meetings:
-            # Get participants who haven't joined
-            participants_stmt = select(Participant).where(
-                Participant.meeting_id == meeting.id,
-                Participant.joined_at.is_(None),
+        stmt = (
+            select(Meeting.id, Meeting.title, Meeting.actual_start)
+            .where(
+                Meeting.status == MeetingStatus.LIVE,
+                Meeting.actual_start >= grace_period_start,
+                Meeting.actual_start <= grace_period_end,
             )
-            absentees = list(session.scalars(participants_stmt).all())
-            
-            if absentees:
-                absentee_emails = [p.email for p in absentees]
-                absentee_names = [p.name for p in absentees]
-                subject = f"Reminder: Join {meeting.title}"
-                body = f"""
-                <p>Hello,</p>
-                <p>This is a reminder that the meeting <strong>{meeting.title}</strong> has started and you haven't joined yet.</p>
-                <p>Please join the meeting as soon as possible.</p>
-                <p>Meeting started at: {meeting.actual_start.strftime('%Y-%m-%d %H:%M:%S UTC') if meeting.actual_start else 'N/A'}</p>
-                """
-                send_email(absentee_emails, subject, body)
+            .order_by(Meeting.id)
+        )
+        meetings = session.execute(stmt).all()
+        # joins may not be flushed yet, so who is absent comes from the presence map
+        presence.ensure_loaded(session, [m.id for m in meetings])
+
+    for meeting_id, title, actual_start in meetings:
+        absentee_emails = presence.absentees(meeting_id)
+        if not absentee_emails:
+            continue
+        subject = f"Reminder: Join {title}"
+        body = f"""
+        <p>Hello,</p>
+        <p>This is a reminder that the meeting <strong>{title}</strong> has started and you haven't joined yet.</p>
+        <p>Please join the meeting as soon as possible.</p>
+        <p>Meeting started at: {actual_start.strftime('%Y-%m-%d %H:%M:%S UTC') if actual_start else 'N/A'}</p>
+        """
+        queue_email(absentee_emails, subject, body)
+
+
+@timed_job("presence_flush", PRESENCE_FLUSH_INTERVAL)
+def flush_presence() -> None:
+    presence.flush()
+
+
+@timed_job("lexical_sync", LEXICAL_SYNC_INTERVAL)
+def sync_lexical_index() -> None:
+    """Index new summaries and transcript events for BM25 retrieval."""
+    get_lexical_index().sync()
 
 
 def start_scheduler() -> None:
     if scheduler.state == 1:  # already running
         return
-    scheduler.add_job(summarize_active_meetings, "interval", minutes=5, id="rolling_summaries", replace_existing=True)
-    scheduler.add_job(check_absentees, "interval", minutes=3, id="check_absentees", replace_existing=True)
+    scheduler.add_job(summarize_due_meetings, "interval", seconds=ROLLING_CHECK_INTERVAL.total_seconds(), id="rolling_summaries", replace_existing=True)
+    scheduler.add_job(summarize_active_meetings, id="rolling_catchup", replace_existing=True)  # runs once, now
+    scheduler.add_job(check_absentees, "interval", seconds=ABSENTEE_INTERVAL.total_seconds(), id="check_absentees", replace_existing=True)
+    scheduler.add_job(sync_lexical_index, "interval", seconds=LEXICAL_SYNC_INTERVAL.total_seconds(), id="lexical_sync", replace_existing=True, next_run_time=datetime.now())
+    scheduler.add_job(flush_presence, "interval", seconds=PRESENCE_FLUSH_INTERVAL.total_seconds(), id="presence_flush", replace_existing=True)
     scheduler.start()
+
+
+def stop_scheduler() -> None:
+    """Stop scheduling jobs and wait for running ones, so shutdown steps after this do not race them."""
+    if scheduler.running:
+        scheduler.shutdown(wait=True)
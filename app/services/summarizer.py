@@ -1,29 +1,278 @@
 from __future__ import annotations
 
-from typing import List
+import functools
+import multiprocessing
+import re
+import string
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import compress
+from operator import itemgetter
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
 
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+import numpy as np
+from loguru import logger
+
+from app.utils.config import SUMMARY_POOL_MIN_CHUNKS, SUMMARY_WORKERS
+
+# scipy and scikit-learn take about a second to import; they are imported where
+# they are used, so importing the app (and every worker that boots it) does not
+# pay for them until the first summary
+if TYPE_CHECKING:
+    import scipy.sparse as sp
+
+
+# abbreviations whose period does not end a sentence; dotted ones (e.g., i.e., U.S., a.m.)
+# are recognized by the single letter before their last period
+_ABBREVIATIONS = ("approx", "cf", "dr", "etc", "inc", "jr", "ltd", "mr", "mrs", "ms", "prof", "sr", "vs")
+# letters none of the abbreviations end with: a period after two such letters ends a
+# sentence without looking further back, which is most periods
+_PLAIN_ENDINGS = "".join(sorted(set(string.ascii_lowercase) - {a[-1] for a in _ABBREVIATIONS}))
+# a period followed by whitespace or the end of the text ends a sentence, so decimals and
+# versions ("1.5", "v1.2") stay whole; the pattern starts with a literal period, so the
+# regex engine jumps from period to period like str.split does
+_SENTENCE_END = re.compile(
+    rf"\.(?:(?<=[a-z][{_PLAIN_ENDINGS}]\.)|"
+    + "".join(
+        rf"(?<!\b(?:{'|'.join(a for a in _ABBREVIATIONS if len(a) == n)})\.)"
+        for n in sorted({len(a) for a in _ABBREVIATIONS})
+    )
+    # a single letter, but not "I"
+    + r"(?<![\s.][a-hj-z]\.))\.*(?:\s+|$)",
+    re.IGNORECASE,
+)
+_last = itemgetter(slice(-1, None))
 
 
 def split_sentences(text: str) -> List[str]:
-    # very simple splitter; replace with nltk/spacy if needed
-    parts = [s.strip() for s in text.replace("\n", " ").split(".")]
-    return [p for p in parts if p]
+    """Sentences of ``text`` without their final period."""
+    return list(filter(None, _SENTENCE_END.split(text.replace("\n", " ").strip())))
+
+
+def split_chunks(chunks: List[str]) -> List[str]:
+    """Sentences of all chunks in order; one split instead of one per chunk.
+
+    A chunk ends a sentence unless it stops mid-sentence, as streamed caption
+    fragments do: no closing punctuation, and the next chunk goes on in lowercase.
+    """
+    chunks = list(chunks)
+    # most chunks end with a period and are joined as they are
+    for i in compress(range(len(chunks)), map(".".__ne__, map(_last, chunks))):
+        chunk = chunks[i].rstrip()
+        following = chunks[i + 1].lstrip()[:1] if i + 1 < len(chunks) else ""
+        if chunk[-1:] in ("!", "?") or (chunk[-1:] not in ("", ".") and not following.islower()):
+            chunk += "."
+        chunks[i] = chunk
+    return split_sentences(" ".join(chunks))
+
+
+def top_sentence_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the ``k`` highest scores, in document order.
+
+    Ties at the cut-off go to the earlier sentence, as a stable sort would.
+    Runs in O(n) with ``np.partition`` instead of sorting every sentence.
+    """
+    n = len(scores)
+    if k >= n:
+        return np.arange(n)
+    if k <= 0:
+        return np.arange(0)
+    kth = np.partition(scores, n - k)[n - k]
+    above = np.flatnonzero(scores > kth)
+    ties = np.flatnonzero(scores == kth)[: k - len(above)]
+    return np.sort(np.concatenate([above, ties]))
 
 
 def summarize_text(chunks: List[str], max_sentences: int = 5) -> str:
     if not chunks:
         return ""
-    sentences: List[str] = []
-    for c in chunks:
-        sentences.extend(split_sentences(c))
+    sentences = split_chunks(chunks)
     if not sentences:
         return ""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
     vectorizer = TfidfVectorizer(stop_words="english")
     X = vectorizer.fit_transform(sentences)
-    centroid = X.mean(axis=0)
-    sims = cosine_similarity(X, centroid)
-    ranked = sorted(range(len(sentences)), key=lambda i: sims[i, 0], reverse=True)
-    top = sorted(ranked[: max_sentences], key=lambda i: i)
+    # rows are L2-normalized, so X @ centroid ranks exactly like cosine similarity;
+    # X.T @ weights gives the mean row as a 1-d array without a dense np.matrix
+    centroid = X.T @ np.full(X.shape[0], 1.0 / X.shape[0])
+    sims = X @ centroid
+    top = top_sentence_indices(sims, max_sentences)
     return ". ".join(sentences[i] for i in top).strip() + "."
+
+
+@functools.lru_cache(maxsize=None)
+def _hasher():
+    # Same tokenization as the TfidfVectorizer above, but stateless: new text can be
+    # vectorized without refitting on everything seen before.
+    from sklearn.feature_extraction.text import HashingVectorizer
+
+    return HashingVectorizer(stop_words="english", alternate_sign=False, norm=None, n_features=2 ** 20)
+
+
+def tokenize(chunks: List[str]) -> Tuple[List[str], sp.csr_matrix]:
+    """Sentences of ``chunks`` and their hashed term counts; needs no meeting state."""
+    import scipy.sparse as sp
+
+    hasher = _hasher()
+    sentences = split_chunks(chunks)
+    if not sentences:
+        return sentences, sp.csr_matrix((0, hasher.n_features))
+    return sentences, hasher.transform(sentences).tocsr()
+
+
+def _tokenize_all(batches: Sequence[List[str]]) -> List[Tuple[List[str], sp.csr_matrix]]:
+    return [tokenize(chunks) for chunks in batches]
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> Optional[ProcessPoolExecutor]:
+    global _pool
+    if SUMMARY_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: the server process has live threads and DB connections
+            _pool = ProcessPoolExecutor(SUMMARY_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def tokenize_many(batches: List[List[str]]) -> List[Tuple[List[str], sp.csr_matrix]]:
+    """``tokenize`` each batch, spread over the process pool when there is enough text.
+
+    Tokenizing is the CPU-heavy, stateless half of summarizing; the results
+    are folded into per-meeting state with ``MeetingSummarizer.observe_tokens``
+    in this process. Small runs stay inline, where pickling would cost more
+    than it saves.
+    """
+    pool = _get_pool()
+    if pool is None or sum(len(b) for b in batches) < SUMMARY_POOL_MIN_CHUNKS:
+        return _tokenize_all(batches)
+    # one task per worker-sized slice, so many small meetings do not mean many round trips
+    step = max(1, -(-len(batches) // (SUMMARY_WORKERS * 4)))
+    slices = [batches[i:i + step] for i in range(0, len(batches), step)]
+    try:
+        results: List[Tuple[List[str], sp.csr_matrix]] = []
+        for part in pool.map(_tokenize_all, slices):
+            results.extend(part)
+        return results
+    except BrokenProcessPool as e:
+        logger.warning(f"Summarizer pool failed ({e}); tokenizing inline")
+        shutdown_pool()
+        return _tokenize_all(batches)
+
+
+class MeetingSummarizer:
+    """Running TF-IDF state for one meeting's transcript.
+
+    ``observe`` tokenizes only the new chunks and folds them into per-meeting
+    document frequencies; hashed features are remapped to a compact per-meeting
+    vocabulary so the statistics stay small. Summaries use the same centroid
+    similarity ranking as ``summarize_text``, with IDF computed over every
+    sentence seen so far, so the final notes match a TfidfVectorizer fit over
+    the whole meeting without re-tokenizing it.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.sentences: List[str] = []
+        self.last_event_id = 0  # highest MeetingEvent.id observed
+        self._vocab: Dict[int, int] = {}
+        self._df = np.zeros(1024, dtype=np.int64)
+        self._blocks: List[sp.csr_matrix] = []  # term counts, columns in local vocabulary
+        self._matrix: Optional[sp.csr_matrix] = None
+
+    def observe(self, chunks: List[str], last_event_id: Optional[int] = None) -> Tuple[int, int]:
+        """Add new transcript chunks; returns the ``[start, end)`` range of their sentences."""
+        new_sentences, counts = tokenize(chunks)
+        return self.observe_tokens(new_sentences, counts, last_event_id)
+
+    def observe_tokens(
+        self, new_sentences: List[str], counts: sp.csr_matrix, last_event_id: Optional[int] = None
+    ) -> Tuple[int, int]:
+        """``observe`` for chunks already run through ``tokenize`` (e.g. in a worker process)."""
+        import scipy.sparse as sp
+
+        start = len(self.sentences)
+        if last_event_id is not None:
+            self.last_event_id = max(self.last_event_id, last_event_id)
+        if not new_sentences:
+            return start, start
+
+        features, inverse = np.unique(counts.indices, return_inverse=True)
+        local = np.empty(len(features), dtype=np.int64)
+        for i, feature in enumerate(features.tolist()):
+            col = self._vocab.get(feature)
+            if col is None:
+                col = self._vocab[feature] = len(self._vocab)
+            local[i] = col
+        if len(self._vocab) > len(self._df):
+            self._df = np.concatenate([self._df, np.zeros(max(len(self._vocab), len(self._df)), dtype=np.int64)])
+        # each row lists a feature at most once, so counting columns gives document frequency
+        np.add.at(self._df, local[inverse], 1)
+
+        block = sp.csr_matrix(
+            (counts.data, local[inverse], counts.indptr), shape=(len(new_sentences), len(self._vocab))
+        )
+        self._blocks.append(block)
+        self._matrix = None
+        self.sentences.extend(new_sentences)
+        return start, len(self.sentences)
+
+    def _counts(self) -> sp.csr_matrix:
+        import scipy.sparse as sp
+
+        if self._matrix is None or self._matrix.shape != (len(self.sentences), len(self._vocab)):
+            width = len(self._vocab)
+            blocks = [sp.csr_matrix((b.data, b.indices, b.indptr), shape=(b.shape[0], width)) for b in self._blocks]
+            self._matrix = sp.vstack(blocks, format="csr") if blocks else sp.csr_matrix((0, width))
+            self._blocks = [self._matrix]
+        return self._matrix
+
+    def summarize(self, max_sentences: int = 5, start: int = 0, end: Optional[int] = None) -> str:
+        """Top sentences of ``sentences[start:end]`` by similarity to their TF-IDF centroid."""
+        import scipy.sparse as sp
+
+        end = len(self.sentences) if end is None else end
+        if end <= start:
+            return ""
+        n_docs = len(self.sentences)
+        idf = np.log((1 + n_docs) / (1 + self._df[: len(self._vocab)])) + 1.0  # smooth_idf, as sklearn
+        X = self._counts()[start:end].multiply(idf).tocsr()
+        norms = np.sqrt(np.asarray(X.multiply(X).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        X = sp.diags(1.0 / norms) @ X
+        centroid = X.T @ np.full(X.shape[0], 1.0 / X.shape[0])
+        sims = X @ centroid
+        top = top_sentence_indices(sims, max_sentences)
+        return ". ".join(self.sentences[start + i] for i in top).strip() + "."
+
+
+_states: Dict[int, MeetingSummarizer] = {}
+_states_lock = threading.Lock()
+
+
+def summarizer_for(meeting_id: int) -> MeetingSummarizer:
+    """The running summarizer for a meeting; a new one starts empty (e.g. after a restart)."""
+    with _states_lock:
+        state = _states.get(meeting_id)
+        if state is None:
+            state = _states[meeting_id] = MeetingSummarizer()
+        return state
+
+
+def discard_summarizer(meeting_id: int) -> None:
+    with _states_lock:
+        _states.pop(meeting_id, None)
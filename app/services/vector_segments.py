@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+from loguru import logger
+
+MANIFEST = "MANIFEST.json"
+_DTYPE = np.dtype("float32")
+
+
+def _fsync_dir(path: str) -> None:
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:  # not supported on this platform
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+@dataclass
+class Segment:
+    """One pair of segment files: raw float32 rows and one JSON record per line."""
+    name: str
+    vectors: np.ndarray  # read-only memmap, shape (n, dimension)
+    records: List[dict]
+    start: int  # global position of the first row
+
+    @property
+    def size(self) -> int:
+        return len(self.records)
+
+
+class SegmentLog:
+    """Append-only, crash-safe storage for vectors and their records.
+
+    ``append`` writes new rows to the end of the active segment and fsyncs them;
+    nothing already on disk is rewritten. The manifest lists the live segments and
+    is only ever replaced atomically, so a crash leaves either the old or the new
+    set of segments. A torn tail (vectors written but not their records, or half a
+    line) is trimmed when the log is opened. Sealed segments are immutable, which
+    lets ``compact`` merge them without blocking appends.
+    """
+
+    def __init__(self, directory: str, dimension: int, segment_rows: int = 4096) -> None:
+        self.directory = directory
+        self.dimension = dimension
+        self.segment_rows = segment_rows
+        self.segments: List[Segment] = []
+        self._next_seq = 1
+        self._compact_lock = threading.Lock()
+        self._seq_lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    # -- paths -------------------------------------------------------------
+
+    def _vec_path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{name}.vec")
+
+    def _rec_path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{name}.jsonl")
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.directory, MANIFEST)
+
+    def exists(self) -> bool:
+        return os.path.exists(self.manifest_path)
+
+    @property
+    def size(self) -> int:
+        return sum(s.size for s in self.segments)
+
+    # -- manifest ----------------------------------------------------------
+
+    def _write_manifest(self, names: List[str]) -> None:
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "dimension": self.dimension, "segments": names, "next_seq": self._next_seq}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.manifest_path)
+        _fsync_dir(self.directory)
+
+    def _new_name(self) -> str:
+        with self._seq_lock:
+            name = f"{self._next_seq:08d}"
+            self._next_seq += 1
+            return name
+
+    # -- open / recovery ---------------------------------------------------
+
+    def _map(self, name: str, rows: int) -> np.ndarray:
+        if rows == 0:
+            return np.empty((0, self.dimension), dtype=_DTYPE)
+        return np.memmap(self._vec_path(name), dtype=_DTYPE, mode="r", shape=(rows, self.dimension))
+
+    def _recover(self, name: str) -> List[dict]:
+        """Load a segment's records and trim both files to the rows they agree on."""
+        vec_path, rec_path = self._vec_path(name), self._rec_path(name)
+        for path in (vec_path, rec_path):
+            if not os.path.exists(path):
+                open(path, "ab").close()
+        row_bytes = self.dimension * _DTYPE.itemsize
+        vec_rows = os.path.getsize(vec_path) // row_bytes
+
+        records: List[dict] = []
+        good_bytes = 0
+        with open(rec_path, "rb") as f:
+            for line in f:
+                if len(records) >= vec_rows or not line.endswith(b"\n"):
+                    break
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    break
+                good_bytes += len(line)
+
+        rows = len(records)
+        if os.path.getsize(vec_path) != rows * row_bytes or os.path.getsize(rec_path) != good_bytes:
+            logger.warning(f"Vector segment {name} has a torn tail; keeping {rows} complete rows")
+            with open(vec_path, "r+b") as f:
+                f.truncate(rows * row_bytes)
+                os.fsync(f.fileno())
+            with open(rec_path, "r+b") as f:
+                f.truncate(good_bytes)
+                os.fsync(f.fileno())
+        return records
+
+    def open(self) -> List[Segment]:
+        if self.exists():
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest["dimension"] != self.dimension:
+                raise ValueError(
+                    f"Vector index at {self.directory} has dimension {manifest['dimension']}, "
+                    f"model produces {self.dimension}"
+                )
+            names = manifest["segments"]
+            self._next_seq = manifest["next_seq"]
+        else:
+            names = []
+        if not names:
+            names = [self._new_name()]
+            self._write_manifest(names)
+        self._remove_orphans(names)
+
+        self.segments = []
+        start = 0
+        for name in names:
+            records = self._recover(name)
+            self.segments.append(Segment(name, self._map(name, len(records)), records, start))
+            start += len(records)
+        return self.segments
+
+    def _remove_orphans(self, live: List[str]) -> None:
+        """Delete files left behind by a compaction that crashed before or after its manifest swap."""
+        keep = set(live)
+        for fname in os.listdir(self.directory):
+            stem, ext = os.path.splitext(fname)
+            if ext in (".vec", ".jsonl", ".tmp") and stem not in keep:
+                try:
+                    os.remove(os.path.join(self.directory, fname))
+                except OSError:
+                    pass
+
+    # -- writes ------------------------------------------------------------
+
+    def append(self, vectors: np.ndarray, records: List[dict]) -> None:
+        """Durably append rows to the active segment. Callers serialize appends."""
+        vectors = np.ascontiguousarray(vectors, dtype=_DTYPE)
+        active = self.segments[-1]
+        if active.size and active.size + len(records) > self.segment_rows:
+            # seal the active segment; it becomes eligible for compaction
+            name = self._new_name()
+            self._write_manifest([s.name for s in self.segments] + [name])
+            active = Segment(name, self._map(name, 0), [], active.start + active.size)
+            self.segments.append(active)
+
+        # vectors first: rows without a record line are trimmed on recovery
+        with open(self._vec_path(active.name), "ab") as f:
+            f.write(vectors.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        with open(self._rec_path(active.name), "ab") as f:
+            f.write("".join(json.dumps(r) + "\n" for r in records).encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+
+        active.records.extend(records)
+        active.vectors = self._map(active.name, active.size)
+
+    def sealed(self) -> List[Segment]:
+        return self.segments[:-1]
+
+    def compact(self, on_swap=None) -> bool:
+        """Merge all sealed segments into one.
+
+        The merged files are written and fsynced before the manifest swap, so a
+        crash at any point leaves a readable log. ``on_swap`` runs around the
+        in-memory swap and should hold the caller's write lock.
+        Returns False when there was nothing to merge.
+        """
+        with self._compact_lock:
+            sealed = self.sealed()
+            if len(sealed) < 2:
+                return False
+            name = self._new_name()
+            rows = 0
+            with open(self._vec_path(name), "wb") as vf, open(self._rec_path(name), "wb") as rf:
+                for seg in sealed:
+                    # stream from the memmaps rather than materializing everything
+                    for offset in range(0, seg.size, 4096):
+                        vf.write(np.ascontiguousarray(seg.vectors[offset:offset + 4096]).tobytes())
+                    rf.write("".join(json.dumps(r) + "\n" for r in seg.records).encode("utf-8"))
+                    rows += seg.size
+                vf.flush()
+                os.fsync(vf.fileno())
+                rf.flush()
+                os.fsync(rf.fileno())
+            merged = Segment(name, self._map(name, rows), [r for s in sealed for r in s.records], sealed[0].start)
+
+            def swap() -> None:
+                remaining = self.segments[len(sealed):]
+                self._write_manifest([name] + [s.name for s in remaining])
+                self.segments = [merged] + remaining
+
+            if on_swap is not None:
+                on_swap(swap)
+            else:
+                swap()
+            for seg in sealed:
+                for path in (self._vec_path(seg.name), self._rec_path(seg.name)):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+            logger.info(f"Compacted {len(sealed)} vector segments into {name} ({rows} rows)")
+            return True
+
+    def vector(self, pos: int) -> np.ndarray:
+        seg = self.segment_for(pos)
+        return seg.vectors[pos - seg.start]
+
+    def segment_for(self, pos: int) -> Segment:
+        lo, hi = 0, len(self.segments) - 1
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if self.segments[mid].start <= pos:
+                lo = mid
+            else:
+                hi = mid - 1
+        return self.segments[lo]
+
+    def record(self, pos: int) -> Optional[dict]:
+        if pos < 0 or pos >= self.size:
+            return None
+        seg = self.segment_for(pos)
+        return seg.records[pos - seg.start]
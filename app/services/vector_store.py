@@ -1,100 +1,488 @@
 from __future__ import annotations
 
+import json
 import os
-from dataclasses import dataclass
-from typing import List, Tuple
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
 
-try:
-    import faiss
-    FAISS_AVAILABLE = True
-except ImportError:
-    FAISS_AVAILABLE = False
-
-try:
-    from sentence_transformers import SentenceTransformer
-    SENTENCE_TRANSFORMERS_AVAILABLE = True
-except ImportError:
-    SENTENCE_TRANSFORMERS_AVAILABLE = False
+import numpy as np
 
 from loguru import logger
-from app.utils.config import VECTOR_INDEX_PATH
+from app.services import ann_index
+from app.services.embedding import EmbeddingBatcher
+from app.services.encoders import load_encoder
+from app.services.vector_segments import SegmentLog
+from app.utils.cache import TTLCache, normalize_question
+from app.utils.config import (
+    EMBED_CACHE_SIZE,
+    EMBED_CACHE_TTL_S,
+    RAG_CACHE_SIZE,
+    RAG_CACHE_TTL_S,
+    VECTOR_ANN_THRESHOLD,
+    VECTOR_COMPACT_SEGMENTS,
+    VECTOR_INDEX_MODE,
+    VECTOR_INDEX_PATH,
+    VECTOR_SEGMENT_ROWS,
+)
+from app.utils.locks import ReadWriteLock
+
+
+@dataclass
+class VectorRecord:
+    """Text stored alongside each vector, plus what it can be filtered on."""
+    text: str
+    meeting_id: Optional[int] = None
+    kind: str = "final"  # rolling, final, ...
+    created_at: str = field(default_factory=lambda: datetime.utcnow().isoformat())
+    ref: Optional[str] = None  # source row, e.g. "summary:42"
+    # transcript chunks: the MeetingEvent ids they span, who spoke, and when the first event was
+    event_ids: Optional[List[int]] = None
+    authors: Optional[List[str]] = None
+    started_at: Optional[str] = None
 
 
 @dataclass
 class VectorHit:
     text: str
     score: float
+    meeting_id: Optional[int] = None
+    kind: Optional[str] = None
+    created_at: Optional[str] = None
+    ref: Optional[str] = None
+    event_ids: Optional[List[int]] = None
+    authors: Optional[List[str]] = None
+
+
+class _Partition:
+    """Rows of a single meeting, searched instead of the whole corpus when filtering."""
+
+    def __init__(self) -> None:
+        self.ids: List[int] = []  # global row positions
+        # vectors of ids[:_gathered], gathered on first query and extended by later ones;
+        # capacity doubles so an add does not restack the whole partition
+        self._rows: Optional[np.ndarray] = None
+        self._gathered = 0
+        # queries share the store's read lock, so two of them may extend the rows at once
+        self._guard = threading.Lock()
+
+    def matrix(self, log: SegmentLog) -> np.ndarray:
+        """Vectors of ``ids``, in order; call with the store's read or write lock held."""
+        n = len(self.ids)
+        with self._guard:
+            if self._gathered < n:
+                new = np.stack([log.vector(pos) for pos in self.ids[self._gathered:n]]).astype("float32")
+                if self._rows is None or len(self._rows) < n:
+                    # readers may still hold views of the old buffer; copy into a new one
+                    rows = np.empty((max(n, 2 * self._gathered), new.shape[1]), dtype="float32")
+                    if self._rows is not None:
+                        rows[:self._gathered] = self._rows[:self._gathered]
+                    self._rows = rows
+                self._rows[self._gathered:n] = new
+                self._gathered = n
+            return self._rows[:n]
+
+
+def _top(scores: np.ndarray, n: int) -> np.ndarray:
+    """Indices of the ``n`` highest scores, best first."""
+    if n >= len(scores):
+        return np.argsort(-scores)
+    idx = np.argpartition(-scores, n)[:n]
+    return idx[np.argsort(-scores[idx])]
 
 
 class VectorStore:
-    def __init__(self, index_dir: str | None = None) -> None:
-        if not FAISS_AVAILABLE or not SENTENCE_TRANSFORMERS_AVAILABLE:
+    """Embedding model plus an append-only vector log (see ``SegmentLog``).
+
+    Build one per process (see ``get_vector_store``): loading the embedding model
+    takes seconds. Segment files are memory-mapped, so opening the store does not
+    read every vector into RAM. Queries share a read lock; ``add_records`` takes
+    the write lock while it appends.
+
+    Rows are also partitioned by meeting so a query scoped to one meeting (or a
+    handful) only touches those meetings' rows.
+
+    Unscoped queries scan every row until the corpus reaches
+    ``VECTOR_ANN_THRESHOLD``; then, if ``VECTOR_INDEX_MODE`` is ``ivfpq`` or
+    ``hnsw``, an approximate index is trained in a background thread and swapped
+    in once it has caught up with the rows added meanwhile.
+    """
+
+    def __init__(self, index_dir: str | None = None, index_mode: str | None = None) -> None:
+        self._lock = ReadWriteLock()
+        self._partitions: Dict[int, _Partition] = {}
+        self._log: Optional[SegmentLog] = None
+        self._ann = None
+        self._ann_building = False
+        self._ann_guard = threading.Lock()
+        # bumped under the write lock whenever results could change: for the whole index, and per
+        # meeting for its partition; a cached result is only used while its generations are current
+        self._generation = 0
+        self._meeting_generations: Dict[int, int] = {}
+        self._embedding_cache = TTLCache("cache.query_embedding", EMBED_CACHE_SIZE, EMBED_CACHE_TTL_S)
+        self._result_cache = TTLCache("cache.rag_results", RAG_CACHE_SIZE, RAG_CACHE_TTL_S)
+        self.index_dir = index_dir or VECTOR_INDEX_PATH
+        self.index_mode = (index_mode or VECTOR_INDEX_MODE).lower()
+        if self.index_mode not in ann_index.MODES:
+            logger.warning(f"Unknown VECTOR_INDEX_MODE {self.index_mode!r}; using flat")
+            self.index_mode = ann_index.FLAT
+        elif self.index_mode != ann_index.FLAT and ann_index.load_faiss() is None:
+            logger.warning(f"VECTOR_INDEX_MODE={self.index_mode} needs faiss-cpu; using flat")
+            self.index_mode = ann_index.FLAT
+        # sentence-transformers, or an ONNX/int8 export of the same model (EMBED_BACKEND)
+        self.model = load_encoder()
+        if self.model is None:
             logger.warning(
                 "Vector store dependencies not available. "
-                "Install faiss-cpu and sentence-transformers for full functionality. "
+                "Install sentence-transformers for full functionality. "
                 "RAG queries will return empty results."
             )
-            self.model = None
-            self.index = None
-            self.texts: List[str] = []
             self.dimension = 384  # Default dimension for all-MiniLM-L6-v2
-            self.index_dir = index_dir or VECTOR_INDEX_PATH
             return
-        
-        self.index_dir = index_dir or VECTOR_INDEX_PATH
+
         os.makedirs(self.index_dir, exist_ok=True)
-        self.model = SentenceTransformer("all-MiniLM-L6-v2")
-        self.index_path = os.path.join(self.index_dir, "index.faiss")
-        self.texts_path = os.path.join(self.index_dir, "texts.tsv")
         self.dimension = self.model.get_sentence_embedding_dimension()
-        if os.path.exists(self.index_path):
-            self.index = faiss.read_index(self.index_path)
-            self._load_texts()
-        else:
-            self.index = faiss.IndexFlatIP(self.dimension)
-            self.texts: List[str] = []
-
-    def _persist(self) -> None:
-        if not FAISS_AVAILABLE or self.index is None:
+        self._query_batcher = EmbeddingBatcher(
+            lambda texts: self.model.encode(texts, normalize_embeddings=True, batch_size=len(texts)),
+            name="embedding.query",
+        )
+        self._log = SegmentLog(os.path.join(self.index_dir, "segments"), self.dimension, VECTOR_SEGMENT_ROWS)
+        migrate = not self._log.exists()
+        self._log.open()
+        if migrate:
+            self._migrate_legacy()
+        for seg in self._log.segments:
+            self._add_to_partitions(seg.start, seg.records)
+        self._load_ann()
+        self._maybe_upgrade()
+
+    def _migrate_legacy(self) -> None:
+        """Import an index written by the old rewrite-everything layout."""
+        index_path = os.path.join(self.index_dir, "index.faiss")
+        if not os.path.exists(index_path):
             return
-        os.makedirs(self.index_dir, exist_ok=True)
-        faiss.write_index(self.index, self.index_path)
-        with open(self.texts_path, "w", encoding="utf-8") as f:
-            for t in self.texts:
-                f.write(t.replace("\n", " ") + "\n")
-
-    def _load_texts(self) -> None:
-        self.texts = []
-        if os.path.exists(self.texts_path):
-            with open(self.texts_path, "r", encoding="utf-8") as f:
-                self.texts = [line.rstrip("\n") for line in f]
-        else:
-            self.texts = []
-
-    def add_texts(self, texts: List[str]) -> None:
-        if not texts:
+        faiss = ann_index.load_faiss()
+        if faiss is None:
+            logger.warning(f"Found legacy vector index at {index_path} but faiss is not installed; skipping import")
+            return
+        index = faiss.read_index(index_path)
+        records: List[dict] = []
+        records_path = os.path.join(self.index_dir, "records.jsonl")
+        texts_path = os.path.join(self.index_dir, "texts.tsv")
+        if os.path.exists(records_path):
+            with open(records_path, "r", encoding="utf-8") as f:
+                records = [json.loads(line) for line in f if line.strip()]
+        elif os.path.exists(texts_path):
+            with open(texts_path, "r", encoding="utf-8") as f:
+                records = [asdict(VectorRecord(text=line.rstrip("\n"))) for line in f]
+        n = min(index.ntotal, len(records))
+        if n:
+            self._log.append(index.reconstruct_n(0, n), records[:n])
+        logger.info(f"Imported {n} vectors from legacy index at {index_path}")
+
+    @property
+    def _ann_path(self) -> str:
+        return os.path.join(self.index_dir, f"ann-{self.index_mode}.faiss")
+
+    def _iter_rows(self, segments, start: int, stop: int, chunk: int = 4096):
+        """Yield rows ``[start, stop)`` from ``segments`` in order, in bounded chunks."""
+        for seg in segments:
+            lo, hi = max(start, seg.start), min(stop, seg.start + seg.size)
+            for offset in range(lo, hi, chunk):
+                yield np.asarray(seg.vectors[offset - seg.start:min(offset + chunk, hi) - seg.start])
+
+    def _load_ann(self) -> None:
+        if self.index_mode == ann_index.FLAT or not os.path.exists(self._ann_path):
+            return
+        index = ann_index.load_faiss().read_index(self._ann_path)
+        size = self._log.size
+        if index.ntotal > size:
+            # the log lost a torn tail the ANN index had already seen; rebuild from scratch
+            logger.warning("ANN index is ahead of the vector log; discarding it")
+            return
+        for rows in self._iter_rows(self._log.segments, index.ntotal, size):
+            index.add(np.ascontiguousarray(rows, dtype="float32"))
+        self._ann = index
+
+    def _maybe_upgrade(self) -> None:
+        if self.index_mode == ann_index.FLAT or self._ann is not None or self._ann_building:
+            return
+        if self._log is None or self._log.size < VECTOR_ANN_THRESHOLD:
+            return
+        with self._ann_guard:
+            if self._ann_building:
+                return
+            self._ann_building = True
+        threading.Thread(target=self._build_ann, name="vector-ann-build", daemon=True).start()
+
+    def _build_ann(self) -> None:
+        """Train and fill the ANN index from a snapshot, then catch up and swap it in."""
+        try:
+            t0 = time.perf_counter()
+            with self._lock.read():
+                segments = list(self._log.segments)
+                n0 = self._log.size
+            # rows below n0 are immutable, so the build itself needs no lock
+            rng = np.random.default_rng(0)
+            sample_size = ann_index.train_size(n0)
+            sample_pos = np.sort(rng.choice(n0, size=sample_size, replace=False))
+            sample = np.stack([self._log.vector(int(p)) for p in sample_pos])
+            index = ann_index.build_index(
+                self.index_mode, self.dimension, self._iter_rows(segments, 0, n0), n0, sample
+            )
+            with self._lock.write():
+                for rows in self._iter_rows(self._log.segments, n0, self._log.size):
+                    index.add(np.ascontiguousarray(rows, dtype="float32"))
+                self._ann = index
+                self._invalidate()
+            logger.info(
+                f"Switched vector index to {self.index_mode} at {index.ntotal} rows "
+                f"in {time.perf_counter() - t0:.1f}s"
+            )
+            with self._lock.read():
+                tmp = self._ann_path + ".tmp"
+                ann_index.load_faiss().write_index(index, tmp)
+                os.replace(tmp, self._ann_path)
+        except Exception as e:
+            logger.error(f"Building {self.index_mode} vector index failed; staying on flat search: {e}")
+            self.index_mode = ann_index.FLAT
+        finally:
+            self._ann_building = False
+
+    def _exact_top(self, q: np.ndarray, k: int) -> List[int]:
+        candidates: List[Tuple[float, int]] = []
+        for seg in self._log.segments:
+            if not seg.size:
+                continue
+            scores = np.asarray(seg.vectors @ q)
+            candidates.extend((float(scores[i]), seg.start + int(i)) for i in _top(scores, k))
+        candidates.sort(key=lambda c: c[0], reverse=True)
+        return [pos for _, pos in candidates[:k]]
+
+    def recall_report(self, k: int = 10, sample: int = 200, values: Optional[List[int]] = None) -> List[dict]:
+        """Recall@k against exact search, and latency, per ``nprobe``/``efSearch`` value.
+
+        Uses stored vectors as queries. The report runs on a copy of the ANN index,
+        since it changes the search parameter that live queries use; when the
+        index has not been built yet (corpus below the threshold), a temporary
+        one is built for the report.
+        """
+        if self._log is None or not self._log.size:
+            return []
+        if self.index_mode == ann_index.FLAT:
+            raise ValueError("recall report needs VECTOR_INDEX_MODE=ivfpq or hnsw")
+        with self._lock.read():
+            segments = list(self._log.segments)
+            n = self._log.size
+            index = ann_index.load_faiss().clone_index(self._ann) if self._ann is not None else None
+        if index is None:
+            rng = np.random.default_rng(0)
+            sample_pos = rng.choice(n, size=ann_index.train_size(n), replace=False)
+            train = np.stack([self._log.vector(int(p)) for p in np.sort(sample_pos)])
+            index = ann_index.build_index(self.index_mode, self.dimension, self._iter_rows(segments, 0, n), n, train)
+        rng = np.random.default_rng(1)
+        query_pos = rng.choice(n, size=min(sample, n), replace=False)
+        queries = np.stack([self._log.vector(int(p)) for p in query_pos])
+        with self._lock.read():
+            return ann_index.recall_report(index, self._exact_top, queries, k=k, values=values)
+
+    @property
+    def records(self) -> List[VectorRecord]:
+        if self._log is None:
+            return []
+        return [VectorRecord(**r) for seg in self._log.segments for r in seg.records]
+
+    @property
+    def texts(self) -> List[str]:
+        return [r.text for r in self.records]
+
+    def _add_to_partitions(self, start: int, records: List[dict]) -> None:
+        for offset, record in enumerate(records):
+            meeting_id = record.get("meeting_id")
+            if meeting_id is None:
+                continue
+            part = self._partitions.get(meeting_id)
+            if part is None:
+                part = self._partitions[meeting_id] = _Partition()
+            # the next query gathers only the new rows' vectors
+            part.ids.append(start + offset)
+
+    def add_texts(
+        self,
+        texts: List[str],
+        meeting_id: Optional[int] = None,
+        kind: str = "final",
+        ref: Optional[str] = None,
+    ) -> None:
+        self.add_records([VectorRecord(text=t, meeting_id=meeting_id, kind=kind, ref=ref) for t in texts])
+
+    def add_records(self, records: List[VectorRecord]) -> None:
+        if not records:
             return
-        if not FAISS_AVAILABLE or not SENTENCE_TRANSFORMERS_AVAILABLE or self.model is None or self.index is None:
+        if self.model is None or self._log is None:
             logger.warning("Vector store not available. Text not indexed.")
             return
-        embeddings = self.model.encode(texts, normalize_embeddings=True)
-        self.index.add(embeddings)
-        if not hasattr(self, "texts"):
-            self.texts = []
-        self.texts.extend(texts)
-        self._persist()
-
-    def query(self, question: str, k: int = 5) -> List[VectorHit]:
-        if not FAISS_AVAILABLE or not SENTENCE_TRANSFORMERS_AVAILABLE or self.model is None or self.index is None:
+        # encode outside the lock; only the append is exclusive
+        embeddings = self.model.encode([r.text for r in records], normalize_embeddings=True)
+        embeddings = np.asarray(embeddings, dtype="float32")
+        rows = [asdict(r) for r in records]
+        with self._lock.write():
+            start = self._log.size
+            self._log.append(embeddings, rows)
+            self._add_to_partitions(start, rows)
+            if self._ann is not None:
+                self._ann.add(embeddings)
+            self._invalidate({r["meeting_id"] for r in rows if r.get("meeting_id") is not None})
+            compact = len(self._log.sealed()) >= VECTOR_COMPACT_SEGMENTS
+        if compact:
+            threading.Thread(target=self.compact, name="vector-compaction", daemon=True).start()
+        self._maybe_upgrade()
+
+    def _invalidate(self, meeting_ids: Iterable[int] = ()) -> None:
+        """Outdate cached results of unscoped queries and of queries on ``meeting_ids``; call with the write lock held.
+
+        Question embeddings do not depend on the index and stay cached.
+        """
+        self._generation += 1
+        for meeting_id in meeting_ids:
+            self._meeting_generations[meeting_id] = self._meeting_generations.get(meeting_id, 0) + 1
+
+    def _stamp(self, meeting_ids: Optional[Tuple[int, ...]]) -> Tuple[int, ...]:
+        """The generations a result for this scope depends on."""
+        if meeting_ids is None:
+            return (self._generation,)
+        return tuple(self._meeting_generations.get(m, 0) for m in meeting_ids)
+
+    def compact(self) -> bool:
+        """Merge sealed segments; queries and appends keep running until the final swap."""
+        if self._log is None:
+            return False
+
+        def locked_swap(swap) -> None:
+            with self._lock.write():
+                swap()
+
+        return self._log.compact(on_swap=locked_swap)
+
+    def query(
+        self,
+        question: str,
+        k: int = 5,
+        meeting_ids: Optional[Iterable[int]] = None,
+        kinds: Optional[Iterable[str]] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> List[VectorHit]:
+        """Top-``k`` records for ``question``.
+
+        ``meeting_ids`` restricts the search to those meetings' partitions;
+        ``kinds``, ``since`` and ``until`` filter on the stored metadata.
+        """
+        if self.model is None or self._log is None:
             logger.warning("Vector store not available. RAG query returning empty results.")
             return []
-        if not getattr(self, "texts", []):
+        if not self._log.size:
             return []
-        q = self.model.encode([question], normalize_embeddings=True)
-        scores, idxs = self.index.search(q, k)
+        normalized = normalize_question(question)
+        kind_set = set(kinds) if kinds else None
+        scope = (
+            tuple(sorted(set(meeting_ids))) if meeting_ids is not None else None,
+            tuple(sorted(kind_set)) if kind_set else None,
+            since.isoformat() if since else None,
+            until.isoformat() if until else None,
+        )
+        cache_key = (scope, normalized, k)
+        cached = self._result_cache.get(cache_key)
+        if cached is not None and cached[0] == self._stamp(scope[0]):
+            return list(cached[1])
+        q = self._embedding_cache.get(normalized)
+        if q is None:
+            q = np.asarray(self._query_batcher.encode_one(question), dtype="float32")
+            self._embedding_cache.put(normalized, q)
+        since_s = since.isoformat() if since else None
+        until_s = until.isoformat() if until else None
+        has_filter = kind_set is not None or since_s is not None or until_s is not None
+
+        def keep(record: dict) -> bool:
+            if kind_set is not None and record.get("kind") not in kind_set:
+                return False
+            if since_s is not None and record.get("created_at", "") < since_s:
+                return False
+            if until_s is not None and record.get("created_at", "") >= until_s:
+                return False
+            return True
+
+        def ranked(n: int) -> Tuple[List[Tuple[float, int]], bool]:
+            """The best ``n`` rows of each source, best first, and whether that was every row."""
+            candidates: List[Tuple[float, int]] = []
+            if sources is None:
+                scores, idxs = self._ann.search(q.reshape(1, -1), n)
+                candidates.extend((float(s), int(i)) for i, s in zip(idxs[0], scores[0]) if i >= 0)
+                complete = n >= self._ann.ntotal
+            else:
+                for scores, ids, start in sources:
+                    for i in _top(scores, n):
+                        candidates.append((float(scores[i]), ids[i] if ids is not None else start + int(i)))
+                complete = all(n >= len(scores) for scores, _, _ in sources)
+            candidates.sort(key=lambda c: c[0], reverse=True)
+            return candidates, complete
+
         hits: List[VectorHit] = []
-        for i, score in zip(idxs[0], scores[0]):
-            if i < 0 or i >= len(self.texts):
-                continue
-            hits.append(VectorHit(text=self.texts[i], score=float(score)))
+        with self._lock.read():
+            stamp = self._stamp(scope[0])
+            # (scores, row positions or None, first position) per partition or segment; None for ANN search
+            sources: Optional[List[Tuple[np.ndarray, Optional[List[int]], int]]] = None
+            if meeting_ids is not None:
+                sources = []
+                for meeting_id in scope[0]:
+                    part = self._partitions.get(meeting_id)
+                    if part is not None and part.ids:
+                        sources.append((part.matrix(self._log) @ q, part.ids, 0))
+            elif self._ann is None:
+                sources = [(np.asarray(seg.vectors @ q), None, seg.start) for seg in self._log.segments if seg.size]
+            # over-fetch when metadata filters may drop rows, and widen only if too few pass
+            n = max(k * 10, 100) if has_filter else k
+            dropped = set()
+            while True:
+                candidates, complete = ranked(n)
+                hits = []
+                for score, pos in candidates:
+                    if pos in dropped:
+                        continue
+                    record = self._log.record(pos)
+                    if record is None or not keep(record):
+                        dropped.add(pos)
+                        continue
+                    hits.append(VectorHit(
+                        text=record["text"],
+                        score=score,
+                        meeting_id=record.get("meeting_id"),
+                        kind=record.get("kind"),
+                        created_at=record.get("created_at"),
+                        ref=record.get("ref"),
+                        event_ids=record.get("event_ids"),
+                        authors=record.get("authors"),
+                    ))
+                    if len(hits) >= k:
+                        break
+                if len(hits) >= k or complete or not has_filter:
+                    break
+                n *= 4
+            self._result_cache.put(cache_key, (stamp, list(hits)))
         return hits
+
+
+_store: Optional[VectorStore] = None
+_store_lock = threading.Lock()
+
+
+def get_vector_store() -> VectorStore:
+    """Return the process-wide store, loading the model and index on first use."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = VectorStore()
+    return _store
@@ -18,8 +18,123 @@ SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
 SMTP_USER = os.getenv("SMTP_USER", "")
 SMTP_PASSWORD = os.getenv("SMTP_PASSWORD", "")
 SMTP_FROM = os.getenv("SMTP_FROM", "meetings@example.com")
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "true").lower() in ("1", "true", "yes")
+# outbound queue: persistent connections, sends per second to the host, retries per message
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", "4"))
+SMTP_RATE_PER_SEC = float(os.getenv("SMTP_RATE_PER_SEC", "10"))
+SMTP_MAX_RETRIES = int(os.getenv("SMTP_MAX_RETRIES", "5"))
 
 VECTOR_INDEX_PATH = os.getenv("VECTOR_INDEX_PATH", ".vector_index")
+# embedding model and how it runs: torch (as published), torch-int8, onnx or onnx-int8; ONNX exports
+# are made on first use under EMBED_ONNX_DIR, and a quantized/exported model is only used if cosine
+# similarities stay within EMBED_PARITY_TOLERANCE of the torch model's
+EMBED_MODEL = os.getenv("EMBED_MODEL", "all-MiniLM-L6-v2")
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", "torch").lower()
+EMBED_ONNX_DIR = os.getenv("EMBED_ONNX_DIR", ".onnx_models")
+EMBED_PARITY_TOLERANCE = float(os.getenv("EMBED_PARITY_TOLERANCE", "0.02"))
+# rows per append-only segment, and how many sealed segments trigger a compaction
+VECTOR_SEGMENT_ROWS = int(os.getenv("VECTOR_SEGMENT_ROWS", "4096"))
+VECTOR_COMPACT_SEGMENTS = int(os.getenv("VECTOR_COMPACT_SEGMENTS", "8"))
+# flat, ivfpq or hnsw; non-flat modes switch over once the corpus reaches the threshold
+VECTOR_INDEX_MODE = os.getenv("VECTOR_INDEX_MODE", "flat").lower()
+VECTOR_ANN_THRESHOLD = int(os.getenv("VECTOR_ANN_THRESHOLD", "50000"))
+VECTOR_NPROBE = int(os.getenv("VECTOR_NPROBE", "16"))
+VECTOR_EF_SEARCH = int(os.getenv("VECTOR_EF_SEARCH", "64"))
+VECTOR_HNSW_M = int(os.getenv("VECTOR_HNSW_M", "32"))
+VECTOR_PQ_M = int(os.getenv("VECTOR_PQ_M", "16"))
+# concurrent RAG questions are embedded together: up to this many per call, waiting at most this long
+EMBED_MAX_BATCH = int(os.getenv("EMBED_MAX_BATCH", "32"))
+EMBED_MAX_WAIT_MS = float(os.getenv("EMBED_MAX_WAIT_MS", "5"))
+# repeated questions: cached embeddings, and cached hits until rows are added to the meetings searched
+EMBED_CACHE_SIZE = int(os.getenv("EMBED_CACHE_SIZE", "4096"))
+EMBED_CACHE_TTL_S = float(os.getenv("EMBED_CACHE_TTL_S", "3600"))
+RAG_CACHE_SIZE = int(os.getenv("RAG_CACHE_SIZE", "1024"))
+RAG_CACHE_TTL_S = float(os.getenv("RAG_CACHE_TTL_S", "300"))
+# BM25 index over summaries and transcript events: kept in sync every LEXICAL_SYNC_SECONDS,
+# LEXICAL_SYNC_BATCH rows per query; the in-memory delta is merged to disk at LEXICAL_MERGE_DOCS
+LEXICAL_INDEX_PATH = os.getenv("LEXICAL_INDEX_PATH", ".lexical_index")
+LEXICAL_SYNC_SECONDS = float(os.getenv("LEXICAL_SYNC_SECONDS", "5"))
+LEXICAL_SYNC_BATCH = int(os.getenv("LEXICAL_SYNC_BATCH", "2000"))
+LEXICAL_MERGE_DOCS = int(os.getenv("LEXICAL_MERGE_DOCS", "5000"))
+# Transcript chunks for dense retrieval: windows of CHUNK_TOKENS words sharing CHUNK_OVERLAP_TOKENS,
+# a meeting's partial window is indexed once it has been quiet for CHUNK_FLUSH_SECONDS.
+# The indexer wakes every CHUNK_INDEX_SECONDS, reads CHUNK_FETCH_BATCH events at a time and embeds
+# at most CHUNK_MAX_PER_CYCLE chunks per cycle, CHUNK_EMBED_BATCH per model call, using at most
+# CHUNK_EMBED_DUTY of a core
+CHUNK_TOKENS = int(os.getenv("CHUNK_TOKENS", "200"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "50"))
+CHUNK_FLUSH_SECONDS = float(os.getenv("CHUNK_FLUSH_SECONDS", "60"))
+CHUNK_INDEX_SECONDS = float(os.getenv("CHUNK_INDEX_SECONDS", "2"))
+CHUNK_FETCH_BATCH = int(os.getenv("CHUNK_FETCH_BATCH", "2000"))
+CHUNK_MAX_PER_CYCLE = int(os.getenv("CHUNK_MAX_PER_CYCLE", "256"))
+CHUNK_EMBED_BATCH = int(os.getenv("CHUNK_EMBED_BATCH", "32"))
+CHUNK_EMBED_DUTY = float(os.getenv("CHUNK_EMBED_DUTY", "0.5"))
+# RAG: candidates taken from each retriever before reciprocal-rank fusion, and the fusion constant
+RAG_CANDIDATES = int(os.getenv("RAG_CANDIDATES", "50"))
+RAG_RRF_K = int(os.getenv("RAG_RRF_K", "60"))
+# RAG answers: up to RAG_ANSWER_SENTENCES sentences picked from the hits by MMR, trading relevance
+# against redundancy with RAG_MMR_LAMBDA; at most RAG_ANSWER_MAX_INPUT sentences are considered and
+# selection stops once RAG_ANSWER_BUDGET_MS has been spent
+RAG_ANSWER_SENTENCES = int(os.getenv("RAG_ANSWER_SENTENCES", "3"))
+RAG_MMR_LAMBDA = float(os.getenv("RAG_MMR_LAMBDA", "0.5"))
+RAG_ANSWER_MAX_INPUT = int(os.getenv("RAG_ANSWER_MAX_INPUT", "300"))
+RAG_ANSWER_BUDGET_MS = float(os.getenv("RAG_ANSWER_BUDGET_MS", "50"))
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./meeting_helper.db")
+# optional replica for read-only queries; SQLite files get query_only connections without it
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL", "")
+# connection pool for server databases (Postgres etc.), per engine
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT_SECONDS = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "30"))
+DB_POOL_RECYCLE_SECONDS = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800"))
+# ids are taken at insert but become visible at commit, so on Postgres they can appear out of
+# order; readers that follow a table by id look again for rows among the last ID_GAP_WINDOW ids
+ID_GAP_WINDOW = int(os.getenv("ID_GAP_WINDOW", "1000"))
+# SQLite connections always run in WAL mode; these tune durability, page cache and
+# memory-mapped reads, and how long a writer waits for the lock before failing
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "normal")
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+EVENTS_BULK_MAX = int(os.getenv("EVENTS_BULK_MAX", "5000"))
+# /meetings/{id}/stream: flush after this many fragments or this long, whichever first;
+# past STREAM_MAX_PENDING unwritten fragments, streams stop reading until the DB catches up
+STREAM_FLUSH_SIZE = int(os.getenv("STREAM_FLUSH_SIZE", "200"))
+STREAM_FLUSH_MS = float(os.getenv("STREAM_FLUSH_MS", "250"))
+STREAM_MAX_PENDING = int(os.getenv("STREAM_MAX_PENDING", "5000"))
+
+# SSE feeds: frames kept per topic for Last-Event-ID resume, and per-client queue bound
+FEED_HISTORY = int(os.getenv("FEED_HISTORY", "100"))
+FEED_QUEUE_SIZE = int(os.getenv("FEED_QUEUE_SIZE", "256"))
+FEED_KEEPALIVE_SECONDS = float(os.getenv("FEED_KEEPALIVE_SECONDS", "15"))
+
+# GET /meetings/ and /meetings/{id}/summaries: rows per page when no ?limit, and the cap
+PAGE_SIZE_DEFAULT = int(os.getenv("PAGE_SIZE_DEFAULT", "100"))
+PAGE_SIZE_MAX = int(os.getenv("PAGE_SIZE_MAX", "500"))
+
+# Rolling summaries: worker processes for tokenizing transcripts (0 = inline), and the
+# number of new chunks in one run below which the pool is not worth the pickling
+SUMMARY_WORKERS = int(os.getenv("SUMMARY_WORKERS", str(min(4, os.cpu_count() or 1))))
+SUMMARY_POOL_MIN_CHUNKS = int(os.getenv("SUMMARY_POOL_MIN_CHUNKS", "2000"))
+# A live meeting gets a rolling summary once this many events or characters arrive
+# since its last one, or once its oldest unsummarized event is this many seconds old;
+# the trigger is checked every ROLLING_CHECK_SECONDS
+ROLLING_TRIGGER_EVENTS = int(os.getenv("ROLLING_TRIGGER_EVENTS", "40"))
+ROLLING_TRIGGER_CHARS = int(os.getenv("ROLLING_TRIGGER_CHARS", "6000"))
+ROLLING_MAX_STALENESS_SECONDS = float(os.getenv("ROLLING_MAX_STALENESS_SECONDS", "300"))
+ROLLING_CHECK_SECONDS = float(os.getenv("ROLLING_CHECK_SECONDS", "10"))
+# at most this many events per rolling summary; a backlog (e.g. after downtime) is
+# caught up as consecutive summaries of this size
+ROLLING_BATCH_EVENTS = int(os.getenv("ROLLING_BATCH_EVENTS", "200"))
+
+# join/heartbeat presence is kept in memory and written to the participant table every
+# PRESENCE_FLUSH_SECONDS; a participant counts as online if seen within PRESENCE_ONLINE_SECONDS
+PRESENCE_FLUSH_SECONDS = float(os.getenv("PRESENCE_FLUSH_SECONDS", "15"))
+PRESENCE_ONLINE_SECONDS = float(os.getenv("PRESENCE_ONLINE_SECONDS", "60"))
+
+# background jobs (final notes, indexing, email)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "2"))
 
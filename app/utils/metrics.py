@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import bisect
+import threading
+from typing import Dict, List, Optional, Sequence, Union
+
+# milliseconds: covers sub-ms cache hits up to multi-second jobs
+LATENCY_BUCKETS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000, 60000)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+
+class Histogram:
+    """Cumulative bucket counts plus sum; percentiles are bucket upper bounds."""
+
+    def __init__(self, name: str, buckets: Sequence[float] = LATENCY_BUCKETS_MS) -> None:
+        self.name = name
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self._sum = 0.0
+        self._count = 0
+        self._max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[i] += 1
+            self._sum += value
+            self._count += 1
+            if value > self._max:
+                self._max = value
+
+    def percentile(self, q: float) -> Optional[float]:
+        with self._lock:
+            if not self._count:
+                return None
+            target = q / 100.0 * self._count
+            seen = 0
+            for i, c in enumerate(self._counts):
+                seen += c
+                if seen >= target:
+                    return self.buckets[i] if i < len(self.buckets) else self._max
+            return self._max
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = list(self._counts)
+            total, count, peak = self._sum, self._count, self._max
+        cumulative: Dict[str, int] = {}
+        running = 0
+        for bound, c in zip(list(self.buckets) + ["+Inf"], counts):
+            running += c
+            cumulative[str(bound)] = running
+        return {
+            "count": count,
+            "sum": total,
+            "mean": total / count if count else None,
+            "max": peak if count else None,
+            "p50": self.percentile(50),
+            "p99": self.percentile(99),
+            "buckets": cumulative,
+        }
+
+
+class Counter:
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, n: int = 1) -> None:
+        with self._lock:
+            self._value += n
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+    def snapshot(self) -> int:
+        return self._value
+
+
+class Gauge:
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._value: float = 0
+        self._lock = threading.Lock()
+
+    def set(self, value: float) -> None:
+        self._value = value
+
+    def inc(self, n: float = 1) -> None:
+        with self._lock:
+            self._value += n
+
+    def dec(self, n: float = 1) -> None:
+        with self._lock:
+            self._value -= n
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+    def snapshot(self) -> float:
+        return self._value
+
+
+Metric = Union[Histogram, Counter, Gauge]  # or anything else with a snapshot()
+_registry: Dict[str, Metric] = {}
+_registry_lock = threading.Lock()
+
+
+def _get_or_create(name: str, factory, kind: type) -> Metric:
+    metric = _registry.get(name)
+    if metric is None:
+        with _registry_lock:
+            metric = _registry.get(name)
+            if metric is None:
+                metric = _registry[name] = factory()
+    if not isinstance(metric, kind):
+        raise TypeError(f"metric {name!r} is a {type(metric).__name__}, not a {kind.__name__}")
+    return metric
+
+
+def register(name: str, metric) -> None:
+    """Expose an object with a ``snapshot()`` method (e.g. a cache) under ``name``."""
+    with _registry_lock:
+        _registry[name] = metric
+
+
+def histogram(name: str, buckets: Sequence[float] = LATENCY_BUCKETS_MS) -> Histogram:
+    return _get_or_create(name, lambda: Histogram(name, buckets), Histogram)
+
+
+def counter(name: str) -> Counter:
+    return _get_or_create(name, lambda: Counter(name), Counter)
+
+
+def gauge(name: str) -> Gauge:
+    return _get_or_create(name, lambda: Gauge(name), Gauge)
+
+
+def snapshot(prefix: str = "") -> dict:
+    """Current value of every registered metric whose name starts with ``prefix``."""
+    with _registry_lock:
+        items: List = sorted(_registry.items())
+    return {name: metric.snapshot() for name, metric in items if name.startswith(prefix)}
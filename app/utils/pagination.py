@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import Request
+
+
+def encode_cursor(at: datetime, row_id: int) -> str:
+    """Opaque cursor for keyset pagination over ``(timestamp, id)`` descending."""
+    raw = f"{at.isoformat()}|{row_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Inverse of ``encode_cursor``; raises ValueError on anything malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        at, row_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(at), int(row_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+
+def etag_for(*parts: Any) -> str:
+    """Weak validator from whatever identifies the response's content."""
+    digest = hashlib.sha1("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def _second_over(last_modified: datetime) -> bool:
+    """True once no later change can share ``last_modified``'s whole second (naive UTC)."""
+    return datetime.utcnow() >= last_modified.replace(microsecond=0) + timedelta(seconds=1)
+
+
+def cache_headers(etag: str, last_modified: Optional[datetime]) -> Dict[str, str]:
+    # no-cache: clients may keep the body but must revalidate, which is a 304 when unchanged
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    # HTTP dates have whole-second precision: a Last-Modified in the current second could
+    # also be the date of a change still to come, so it is only sent once that second is over
+    if last_modified is not None and _second_over(last_modified):
+        headers["Last-Modified"] = format_datetime(last_modified.replace(tzinfo=timezone.utc), usegmt=True)
+    return headers
+
+
+def not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    """Conditional GET: If-None-Match wins over If-Modified-Since, as in RFC 9110."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {t.strip() for t in if_none_match.split(",")}
+        # weak comparison: W/"x" matches "x"
+        return "*" in tags or etag in tags or etag[2:] in tags
+    since = request.headers.get("if-modified-since")
+    if since and last_modified is not None and _second_over(last_modified):
+        try:
+            since_at = parsedate_to_datetime(since)
+        except (TypeError, ValueError):
+            return False
+        if since_at.tzinfo is None:
+            since_at = since_at.replace(tzinfo=timezone.utc)
+        # the second is over, so any later change is at a later whole second
+        return last_modified.replace(tzinfo=timezone.utc, microsecond=0) <= since_at
+    return False
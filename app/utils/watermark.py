@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, Set
+
+from sqlalchemy import or_
+
+from app.utils.config import ID_GAP_WINDOW
+
+
+class IdWatermark:
+    """How far a reader has followed a table in id order, without skipping late commits.
+
+    A plain ``id > last`` cursor loses rows on databases where ids are taken at
+    insert but become visible at commit: id 11 can commit after id 12 was
+    read. Besides the highest id seen this keeps the ids below it that have not
+    been seen yet, and ``condition`` selects those again along with anything
+    newer. An id still missing once it is ``window`` ids behind is assumed to
+    belong to a rolled-back insert and is dropped.
+    """
+
+    def __init__(self, last_id: int = 0, gaps: Iterable[int] = (), window: int = ID_GAP_WINDOW) -> None:
+        self.last_id = last_id
+        self.window = window
+        self.gaps: Set[int] = set(gaps)
+
+    def condition(self, column):
+        if not self.gaps:
+            return column > self.last_id
+        return or_(column > self.last_id, column.in_(sorted(self.gaps)))
+
+    def advance(self, ids: Iterable[int]) -> None:
+        """Record ids as seen."""
+        for row_id in sorted(ids):
+            if row_id > self.last_id:
+                self.gaps.update(range(max(self.last_id + 1, row_id - self.window), row_id))
+                self.last_id = row_id
+            else:
+                self.gaps.discard(row_id)
+        floor = self.last_id - self.window
+        self.gaps = {g for g in self.gaps if g > floor}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"last_id": self.last_id, "gaps": sorted(self.gaps)}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "IdWatermark":
+        return cls(data.get("last_id", 0), data.get("gaps", ()))
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Benchmark for extractive RAG answers
+Compares MMR with plain relevance ranking (lambda 1.0) on redundancy over the
+fixed corpus in tests/test_answer.py (which also checks the answers' facts and
+citations), and times synthesize_answer against RAG_ANSWER_BUDGET_MS on small
+and large hit sets
+Run from the repo root: python benchmarks/bench_answer.py
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services.answer import synthesize_answer  # noqa: E402
+from app.services.vector_store import VectorHit  # noqa: E402
+from app.utils.config import RAG_ANSWER_BUDGET_MS  # noqa: E402
+from tests.test_answer import HITS  # noqa: E402
+
+WORDS = (
+    "deploy docker pipeline testing monitoring alerts budget hiring roadmap release customer "
+    "bug fix database migration api latency security review onboarding design metrics"
+).split()
+
+
+def repeats(answer):
+    # sentences that say the same thing twice, e.g. the Friday ship date from two overlapping summaries
+    return sum("ship the release on Friday" in part for part in answer.text.split(" ["))
+
+
+def large_hits(n_hits, sentences_per_hit):
+    rng = random.Random(42)
+    return [
+        VectorHit(
+            text=". ".join(" ".join(rng.choices(WORDS, k=rng.randint(5, 14))) for _ in range(sentences_per_hit)),
+            score=1.0 / (i + 1), meeting_id=i, kind="final", ref=f"summary:{i}",
+        )
+        for i in range(n_hits)
+    ]
+
+
+def timing(hits, repeat=50):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        synthesize_answer("what is the database migration and release plan", hits)
+        times.append((time.perf_counter() - t0) * 1000.0)
+    times.sort()
+    return times[len(times) // 2], times[min(len(times) - 1, int(0.99 * len(times)))]
+
+
+def main():
+    question = "When will the release ship?"
+    mmr_repeats = repeats(synthesize_answer(question, HITS))
+    plain_repeats = repeats(synthesize_answer(question, HITS, lambda_=1.0))
+    print(f"repeated ship-date sentences: mmr {mmr_repeats}, relevance only {plain_repeats}")
+
+    print(f"\n{'hits':>5} {'sentences':>10} {'p50 (ms)':>9} {'p99 (ms)':>9}  budget {RAG_ANSWER_BUDGET_MS:g} ms")
+    synthesize_answer("warm up", HITS)
+    for n_hits, per_hit in ((5, 3), (5, 20), (20, 50)):
+        p50, p99 = timing(large_hits(n_hits, per_hit))
+        print(f"{n_hits:>5} {n_hits * per_hit:>10} {p50:>9.2f} {p99:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
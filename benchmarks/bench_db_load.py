@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Load test for the async database routes
+Serves the real (async) meeting and event routers and a mirror of the same
+routes written against the sync session, each in its own uvicorn process,
+then drives both with the same mix of reads and writes at several
+concurrency levels over HTTP
+Run from the repo root: python benchmarks/bench_db_load.py [--seconds 5] [--concurrency 1,16,64]
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, HTTPException
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+# the app uses ./meeting_helper.db; keep the benchmark's rows out of the real one
+# (server processes inherit the directory the parent seeded)
+os.chdir(os.environ.setdefault("BENCH_DB_DIR", tempfile.mkdtemp(prefix="bench_db_load_")))
+
+from sqlalchemy import select  # noqa: E402
+
+from app.api import events as events_api, meetings as meetings_api  # noqa: E402
+from app.api.events import EventIn  # noqa: E402
+from app.db.session import db_session, init_db  # noqa: E402
+from app.models.event import MeetingEvent  # noqa: E402
+from app.models.meeting import Meeting, MeetingStatus, MeetingSummary  # noqa: E402
+from app.services.notifier import summary_to_dict  # noqa: E402
+
+N_MEETINGS = 50
+SUMMARIES_PER_MEETING = 40
+
+
+def sync_app():
+    # the routes as they were before the async session, kept here as the baseline
+    app = FastAPI()
+
+    @app.get("/meetings/{meeting_id}")
+    def get_meeting(meeting_id: int):
+        with db_session() as session:
+            meeting = session.get(Meeting, meeting_id)
+            if not meeting:
+                raise HTTPException(status_code=404, detail="Meeting not found")
+            return {"id": meeting.id, "title": meeting.title, "status": meeting.status}
+
+    @app.get("/meetings/{meeting_id}/summaries")
+    def get_summaries(meeting_id: int, limit: int = 20):
+        with db_session() as session:
+            if not session.get(Meeting, meeting_id):
+                raise HTTPException(status_code=404, detail="Meeting not found")
+            stmt = (
+                select(MeetingSummary)
+                .where(MeetingSummary.meeting_id == meeting_id)
+                .order_by(MeetingSummary.window_end.desc(), MeetingSummary.id.desc())
+                .limit(limit)
+            )
+            return {"summaries": [summary_to_dict(s) for s in session.scalars(stmt)]}
+
+    @app.post("/events/")
+    def ingest_event(payload: EventIn):
+        with db_session() as session:
+            if not session.get(Meeting, payload.meeting_id):
+                raise HTTPException(status_code=404, detail="Meeting not found")
+            event = MeetingEvent(meeting_id=payload.meeting_id, content=payload.content, author=payload.author)
+            session.add(event)
+            session.flush()
+            return {"id": event.id}
+
+    return app
+
+
+def async_app():
+    app = FastAPI()
+    app.include_router(meetings_api.router)
+    app.include_router(events_api.router)
+    return app
+
+
+def seed():
+    init_db()
+    now = datetime.utcnow()
+    with db_session() as session:
+        meetings = [Meeting(title=f"bench {i}", status=MeetingStatus.LIVE) for i in range(N_MEETINGS)]
+        session.add_all(meetings)
+        session.flush()
+        for m in meetings:
+            session.add_all(
+                MeetingSummary(
+                    meeting_id=m.id,
+                    window_start=now + timedelta(minutes=j),
+                    window_end=now + timedelta(minutes=j + 1),
+                    summary_text="We agreed to ship on Friday. Alice writes the release notes.",
+                    kind="rolling",
+                )
+                for j in range(SUMMARIES_PER_MEETING)
+            )
+        return [m.id for m in meetings]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+APPS = {"sync": sync_app, "async": async_app}
+
+
+def serve(name):
+    """Start ``name`` in a separate process, so client and server do not share a GIL."""
+    port = free_port()
+    proc = subprocess.Popen([sys.executable, __file__, "--serve", name, "--port", str(port)])
+    base = f"http://127.0.0.1:{port}"
+    for _ in range(200):
+        try:
+            httpx.get(f"{base}/docs", timeout=1)
+            return proc, base
+        except httpx.TransportError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError(f"{name} server did not start")
+
+
+async def drive(base, meeting_ids, concurrency, seconds):
+    """Mixed traffic: 50% meeting reads, 30% summary pages, 20% event writes."""
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + seconds
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base, limits=limits, timeout=30) as client:
+        async def worker(seed_):
+            nonlocal errors
+            rng = random.Random(seed_)
+            while time.perf_counter() < deadline:
+                mid = rng.choice(meeting_ids)
+                roll = rng.random()
+                t0 = time.perf_counter()
+                if roll < 0.5:
+                    r = await client.get(f"/meetings/{mid}")
+                elif roll < 0.8:
+                    r = await client.get(f"/meetings/{mid}/summaries", params={"limit": 20})
+                else:
+                    r = await client.post("/events/", json={"meeting_id": mid, "content": "Bob will review the budget."})
+                latencies.append(time.perf_counter() - t0)
+                if r.status_code != 200:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    latencies.sort()
+    pct = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000.0  # noqa: E731
+    return len(latencies) / elapsed, pct(0.50), pct(0.99), errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=5.0, help="duration of each run")
+    parser.add_argument("--concurrency", default="1,16,64", help="comma-separated client concurrency levels")
+    parser.add_argument("--serve", choices=sorted(APPS), help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve:
+        uvicorn.run(APPS[args.serve](), host="127.0.0.1", port=args.port, log_level="warning", lifespan="off")
+        return
+    levels = [int(c) for c in args.concurrency.split(",")]
+
+    meeting_ids = seed()
+    print(f"{N_MEETINGS} meetings x {SUMMARIES_PER_MEETING} summaries, {args.seconds:g}s per run")
+    print(f"{'path':>6} {'clients':>8} {'req/s':>9} {'p50 (ms)':>9} {'p99 (ms)':>9} {'errors':>7}")
+    for name in ("sync", "async"):
+        proc, base = serve(name)
+        try:
+            asyncio.run(drive(base, meeting_ids, 4, 1.0))  # warm up connections and caches
+            for c in levels:
+                rps, p50, p99, errors = asyncio.run(drive(base, meeting_ids, c, args.seconds))
+                print(f"{name:>6} {c:>8} {rps:>9.0f} {p50:>9.2f} {p99:>9.2f} {errors:>7}")
+        finally:
+            proc.terminate()
+            proc.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the embedding backends
+Encodes the same texts with the torch model, its int8-quantized copy and the
+ONNX exports (fp32 and int8), reports throughput for single questions and for
+indexing batches, and each backend's parity with torch against
+EMBED_PARITY_TOLERANCE
+Needs sentence-transformers; the ONNX rows also need onnxruntime
+Run from the repo root: python benchmarks/bench_encoders.py [--texts 512]
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services.encoders import (  # noqa: E402
+    OnnxEncoder,
+    export_onnx,
+    load_torch,
+    parity,
+    quantize_torch,
+    within_tolerance,
+)
+from app.utils.config import EMBED_MODEL, EMBED_PARITY_TOLERANCE  # noqa: E402
+
+WORDS = (
+    "deploy docker pipeline testing monitoring alerts budget hiring roadmap release customer "
+    "bug fix database migration api latency security review onboarding design metrics"
+).split()
+
+
+def make_texts(n):
+    # summaries and transcript chunks vary a lot in length; so does padding per batch
+    rng = random.Random(42)
+    return [" ".join(rng.choices(WORDS, k=rng.randint(5, 120))) + "." for _ in range(n)]
+
+
+def throughput(model, texts, batch_size):
+    model.encode(texts[:batch_size], normalize_embeddings=True, batch_size=batch_size)  # warm up
+    t0 = time.perf_counter()
+    if batch_size == 1:
+        for t in texts:
+            model.encode([t], normalize_embeddings=True, batch_size=1)
+    else:
+        model.encode(texts, normalize_embeddings=True, batch_size=batch_size)
+    return len(texts) / (time.perf_counter() - t0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--texts", type=int, default=512, help="texts encoded per batched run")
+    parser.add_argument("--model", default=EMBED_MODEL)
+    args = parser.parse_args()
+
+    reference = load_torch(args.model)
+    if reference is None:
+        sys.exit("sentence-transformers is not installed")
+    backends = [("torch", reference), ("torch-int8", quantize_torch(reference))]
+    export_dir = tempfile.mkdtemp(prefix="bench_encoders_")
+    try:
+        export_onnx(reference, export_dir)
+        backends += [("onnx", OnnxEncoder(export_dir)), ("onnx-int8", OnnxEncoder(export_dir, quantized=True))]
+        for name in ("model.onnx", "model.int8.onnx"):
+            print(f"{name}: {os.path.getsize(os.path.join(export_dir, name)) / 2 ** 20:.1f} MiB")
+    except ImportError as e:
+        print(f"skipping ONNX backends: {e}")
+
+    texts = make_texts(args.texts)
+    singles = texts[:64]
+    print(f"{args.model}, {len(texts)} texts, parity tolerance {EMBED_PARITY_TOLERANCE:g}")
+    print(f"{'backend':>10} {'1/call (t/s)':>13} {'32/call (t/s)':>14} {'speedup':>8} {'sim error':>10} {'self cos':>9}  ok")
+    base = None
+    for name, model in backends:
+        single = throughput(model, singles, 1)
+        batched = throughput(model, texts, 32)
+        base = base or batched
+        report = parity(reference, model)
+        print(
+            f"{name:>10} {single:>13.1f} {batched:>14.1f} {batched / base:>7.2f}x "
+            f"{report['max_similarity_error']:>10.4f} {report['min_self_cosine']:>9.4f}  {within_tolerance(report)}"
+        )
+    shutil.rmtree(export_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
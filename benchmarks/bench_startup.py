@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Cold start benchmark for app.main
+Starts fresh interpreters that import app.main and run the app's startup
+(lifespan) against an empty database, reports the median time of each, and
+fails if the total is over budget or if importing the app loaded any of the
+heavy ML libraries (they should load on first use)
+Run from the repo root: python benchmarks/bench_startup.py [--runs 5] [--budget 2.0]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+HEAVY = ("sklearn", "scipy", "faiss", "sentence_transformers", "torch", "onnxruntime")
+
+# runs in a fresh interpreter, so nothing is cached from a previous run
+CHILD = """
+import asyncio, json, sys, time
+t0 = time.perf_counter()
+import app.main
+t1 = time.perf_counter()
+heavy = [m for m in {heavy!r} if m in sys.modules]
+
+async def start():
+    async with app.main.app.router.lifespan_context(app.main.app):
+        return time.perf_counter()
+
+t2 = asyncio.run(start())
+print(json.dumps({{"import_s": t1 - t0, "startup_s": t2 - t1, "heavy": heavy}}))
+"""
+
+
+def run_once():
+    # each run gets an empty directory: a new database and no indexes on disk
+    with tempfile.TemporaryDirectory(prefix="bench_startup_") as cwd:
+        env = dict(os.environ, PYTHONPATH=str(ROOT))
+        out = subprocess.run(
+            [sys.executable, "-c", CHILD.format(heavy=HEAVY)],
+            cwd=cwd, env=env, capture_output=True, text=True, check=True,
+        ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=2.0, help="seconds for import plus startup (median)")
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.runs)]
+    import_s = statistics.median(r["import_s"] for r in runs)
+    startup_s = statistics.median(r["startup_s"] for r in runs)
+    heavy = sorted({m for r in runs for m in r["heavy"]})
+    total = import_s + startup_s
+    print(f"{'import (s)':>11} {'startup (s)':>12} {'total (s)':>10} {'budget (s)':>11}  heavy imports")
+    print(f"{import_s:>11.3f} {startup_s:>12.3f} {total:>10.3f} {args.budget:>11.3f}  {', '.join(heavy) or 'none'}")
+    if heavy or total > args.budget:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark for summarize_text sentence ranking
+Compares the previous sorted()-based ranking with the argpartition top-k,
+and the previous split-on-every-period loop over chunks with split_chunks
+Run from the repo root: python benchmarks/bench_summarizer.py
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services.summarizer import split_chunks, split_sentences, summarize_text, top_sentence_indices  # noqa: E402
+
+WORDS = (
+    "deploy docker pipeline testing monitoring alerts budget hiring roadmap release customer "
+    "bug fix database migration api latency security review onboarding design metrics"
+).split()
+
+
+def previous_summarize_text(chunks, max_sentences=5):
+    # the implementation before the vectorized ranking, kept here as the baseline
+    sentences = previous_split_chunks(chunks)
+    X = TfidfVectorizer(stop_words="english").fit_transform(sentences)
+    centroid = np.asarray(X.mean(axis=0))  # newer scikit-learn rejects np.matrix here
+    sims = cosine_similarity(X, centroid)
+    ranked = sorted(range(len(sentences)), key=lambda i: sims[i, 0], reverse=True)
+    top = sorted(ranked[:max_sentences], key=lambda i: i)
+    return ". ".join(sentences[i] for i in top).strip() + "."
+
+
+def previous_split_sentences(text):
+    return list(filter(None, map(str.strip, text.replace("\n", " ").split("."))))
+
+
+def previous_split_chunks(chunks):
+    # what summarize_text did before: one str.split(".") per chunk
+    sentences = []
+    for c in chunks:
+        parts = [s.strip() for s in c.replace("\n", " ").split(".")]
+        sentences.extend(p for p in parts if p)
+    return sentences
+
+
+# transcript text the previous splitter cut in the wrong places
+SPLIT_CASES = [
+    ("We shipped v1.2 today. Latency dropped 3.5 percent.", ["We shipped v1.2 today", "Latency dropped 3.5 percent"]),
+    ("Use a cache, e.g. Redis or memcached. It helps.", ["Use a cache, e.g. Redis or memcached", "It helps"]),
+    ("Dr. Lee joins at 9 a.m. tomorrow. Bring the U.S. numbers.", ["Dr. Lee joins at 9 a.m. tomorrow", "Bring the U.S. numbers"]),
+]
+
+
+def make_chunks(n_sentences, per_chunk=3):
+    rng = random.Random(42)
+    sentences = [" ".join(rng.choices(WORDS, k=rng.randint(5, 14))) for _ in range(n_sentences)]
+    return [". ".join(sentences[i:i + per_chunk]) + "." for i in range(0, n_sentences, per_chunk)]
+
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - t0)
+    return min(times), result
+
+
+def main():
+    print(f"{'sentences':>10} {'previous (s)':>14} {'current (s)':>12} {'speedup':>8}  same output")
+    for n in (1_000, 10_000, 100_000):
+        chunks = make_chunks(n)
+        repeat = 5 if n < 100_000 else 2
+        old_t, old_out = best_of(lambda: previous_summarize_text(chunks, 12), repeat)
+        new_t, new_out = best_of(lambda: summarize_text(chunks, 12), repeat)
+        print(f"{n:>10} {old_t:>14.4f} {new_t:>12.4f} {old_t / new_t:>7.2f}x  {old_out == new_out}")
+
+    # ranking stage alone (TF-IDF fitting dominates the end-to-end numbers above)
+    print(f"\n{'sentences':>10} {'sorted (ms)':>12} {'partition (ms)':>15} {'speedup':>8}")
+    rng = np.random.default_rng(0)
+    for n in (1_000, 10_000, 100_000):
+        sims = rng.random(n)
+        old_t, old_top = best_of(lambda: sorted(sorted(range(n), key=lambda i: sims[i], reverse=True)[:12]), 5)
+        new_t, new_top = best_of(lambda: top_sentence_indices(sims, 12), 5)
+        assert list(new_top) == old_top
+        print(f"{n:>10} {old_t * 1000:>12.3f} {new_t * 1000:>15.3f} {old_t / new_t:>7.1f}x")
+
+    # splitting as summarize_text does it: transcript events of one or a few sentences
+    print(f"\n{'sentences':>10} {'per event':>9} {'split (ms)':>11} {'current (ms)':>13} {'speedup':>8}  same output")
+    for per_chunk in (1, 3):
+        for n in (1_000, 10_000, 100_000):
+            chunks = make_chunks(n, per_chunk)
+            old_t, old_out = best_of(lambda: previous_split_chunks(chunks), 7)
+            new_t, new_out = best_of(lambda: split_chunks(chunks), 7)
+            print(f"{n:>10} {per_chunk:>9} {old_t * 1000:>11.2f} {new_t * 1000:>13.2f} {old_t / new_t:>7.2f}x  {old_out == new_out}")
+    print()
+    for text, expected in SPLIT_CASES:
+        print(f"{'ok' if split_sentences(text) == expected else 'WRONG':>5}  {text!r}")
+        print(f"{'':>5}  previous: {previous_split_sentences(text)}")
+
+
+if __name__ == "__main__":
+    main()
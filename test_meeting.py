@@ -93,8 +93,18 @@ def test_meeting_flow():
     meeting_ended = response.json()
     print("✅ Meeting ended")
     print(f"   Final status: {meeting_ended['status']}")
-    print("   Final notes generated and emailed to participants")
-    print("   Notes persisted to vector store")
+
+    # Final notes are generated in the background; wait for the job and its steps
+    job_id = meeting_ended.get("job_id")
+    for _ in range(30):
+        job = requests.get(f"{BASE_URL}/jobs/{job_id}").json()
+        steps = job.get("steps", [])
+        if job["status"] == "failed" or (job["status"] == "succeeded" and all(s["status"] != "pending" and s["status"] != "running" for s in steps)):
+            break
+        time.sleep(1)
+    print(f"   Notes job {job_id}: {job['status']}")
+    for step in job.get("steps", []):
+        print(f"   - {step['kind']}: {step['status']}")
 
     # 8. Test RAG query
     print("\n8. Testing RAG query...")
@@ -0,0 +1,44 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+# the app reads its settings at import time: point the database and indexes at a
+# scratch directory before anything from app is imported
+_scratch = tempfile.mkdtemp(prefix="meeting_helper_tests_")
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{_scratch}/test.db",
+    VECTOR_INDEX_PATH=os.path.join(_scratch, "vector_index"),
+    LEXICAL_INDEX_PATH=os.path.join(_scratch, "lexical_index"),
+    EMBED_ONNX_DIR=os.path.join(_scratch, "onnx"),
+    SUMMARY_WORKERS="0",
+    SMTP_HOST="",
+)
+
+
+@pytest.fixture(scope="session")
+def db():
+    from app.db.session import init_db
+
+    init_db()
+
+
+@pytest.fixture
+def client(db):
+    """The API routers without the lifespan: no scheduler, job runner or model loading."""
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from app.api import events, jobs, meetings
+
+    app = FastAPI()
+    app.include_router(meetings.router)
+    app.include_router(events.router)
+    app.include_router(jobs.router)
+    with TestClient(app) as c:
+        yield c
@@ -0,0 +1,67 @@
+import pytest
+
+from app.services.answer import synthesize_answer
+from app.services.vector_store import VectorHit
+
+# rolling summaries overlap, as they do for a live meeting: the same decision shows up in several
+HITS = [
+    VectorHit(
+        text="The team agreed to ship the release on Friday. Alice will write the release notes. "
+             "QA found two blocking bugs in the payment flow",
+        score=0.9, meeting_id=1, kind="rolling", ref="summary:11",
+    ),
+    VectorHit(
+        text="We agreed to ship the release on Friday. The payment flow bugs must be fixed first. "
+             "Bob owns the payment flow fixes",
+        score=0.8, meeting_id=1, kind="rolling", ref="summary:12",
+    ),
+    VectorHit(
+        text="Hiring: two backend engineers start in March. The budget for contractors was cut by twenty percent",
+        score=0.7, meeting_id=2, kind="final", ref="summary:20",
+    ),
+    VectorHit(
+        text="carol: the database migration is scheduled for next Tuesday night. we need a rollback plan",
+        score=0.6, meeting_id=3, kind="transcript", ref="chunk:301-305", event_ids=[301, 302, 303, 304, 305],
+        authors=["carol"],
+    ),
+    VectorHit(
+        text="The release date is Friday. Marketing wants the announcement ready Thursday",
+        score=0.5, meeting_id=1, kind="final", ref="summary:13",
+    ),
+]
+
+# (question, facts the answer must contain, refs it must cite)
+CASES = [
+    ("When will the release ship?", ["ship the release on Friday"], ["summary:12"]),
+    ("Who owns the payment flow fixes?", ["Bob owns the payment flow fixes"], ["summary:12"]),
+    ("When is the database migration?", ["migration is scheduled for next Tuesday"], ["chunk:301-305"]),
+    ("What happened to the contractor budget?", ["cut by twenty percent"], ["summary:20"]),
+    ("Who writes the release notes and when do we ship?", ["Alice will write the release notes", "Friday"], ["summary:11", "summary:12"]),
+]
+
+
+@pytest.mark.parametrize("question, facts, refs", CASES)
+def test_answer_states_the_facts_and_cites_their_sources(question, facts, refs):
+    answer = synthesize_answer(question, HITS)
+    for fact in facts:
+        assert fact in answer.text
+    assert set(refs) <= {c.ref for c in answer.citations}
+
+
+def test_mmr_drops_the_repeated_ship_date():
+    question = "When will the release ship?"
+
+    def repeats(answer):
+        return sum("ship the release on Friday" in part for part in answer.text.split(" ["))
+
+    assert repeats(synthesize_answer(question, HITS)) == 1
+    assert repeats(synthesize_answer(question, HITS, lambda_=1.0)) > 1
+
+
+def test_rag_rejects_unknown_meeting_ids(client):
+    meeting_id = client.post("/meetings/", json={"title": "Scope"}).json()["id"]
+    ok = client.post(f"/meetings/{meeting_id}/rag", json={"question": "anything", "meeting_ids": [meeting_id]})
+    assert ok.status_code == 200
+    bad = client.post(f"/meetings/{meeting_id}/rag", json={"question": "anything", "meeting_ids": [meeting_id, 10_000_000]})
+    assert bad.status_code == 404
+    assert "10000000" in bad.json()["detail"]
@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+
+from app.db.session import (
+    SessionLocal,
+    async_db_session,
+    async_url,
+    engine,
+    engine_options,
+    read_engine,
+    read_session,
+    sqlite_pragmas,
+)
+from app.models.meeting import Meeting
+from app.utils.config import SQLITE_BUSY_TIMEOUT_MS, SQLITE_CACHE_SIZE_KB
+
+
+def test_async_url_picks_the_asyncio_driver():
+    assert async_url("sqlite:///./meeting_helper.db") == "sqlite+aiosqlite:///./meeting_helper.db"
+    assert async_url("postgresql://u:secret@db/app") == "postgresql+asyncpg://u:secret@db/app"
+    # already async, or a backend without a known driver: left alone
+    assert async_url("sqlite+aiosqlite:///x.db") == "sqlite+aiosqlite:///x.db"
+    assert async_url("oracle://db/app") == "oracle://db/app"
+
+
+def test_async_session_commits_on_exit_and_rolls_back_on_error(db):
+    async def run():
+        async with async_db_session() as session:
+            kept = Meeting(title="Async kept")
+            session.add(kept)
+            await session.flush()
+            kept_id = kept.id
+        with pytest.raises(RuntimeError):
+            async with async_db_session() as session:
+                session.add(Meeting(title="Async dropped"))
+                await session.flush()
+                raise RuntimeError("request failed")
+        return kept_id
+
+    kept_id = asyncio.run(run())
+    with SessionLocal() as session:
+        assert session.get(Meeting, kept_id).title == "Async kept"
+        assert not session.scalars(select(Meeting).where(Meeting.title == "Async dropped")).all()
+
+
+def test_write_pool_connections_get_the_sqlite_profile(db):
+    with engine.connect() as conn:
+        pragma = lambda name: conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+        assert pragma("journal_mode") == "wal"
+        assert pragma("busy_timeout") == SQLITE_BUSY_TIMEOUT_MS
+        assert pragma("cache_size") == -SQLITE_CACHE_SIZE_KB
+        assert pragma("query_only") == 0
+
+
+def test_read_session_sees_commits_but_rejects_writes(db):
+    assert read_engine is not engine
+    with SessionLocal() as session:
+        meeting = Meeting(title="Read pool")
+        session.add(meeting)
+        session.commit()
+        meeting_id = meeting.id
+
+    with read_session() as session:
+        assert session.get(Meeting, meeting_id).title == "Read pool"
+        session.add(Meeting(title="Not allowed"))
+        with pytest.raises(OperationalError, match="readonly"):
+            session.flush()
+
+
+def test_server_databases_get_a_sized_pool():
+    options = engine_options("postgresql://db/app")
+    assert options["pool_pre_ping"] and options["pool_size"] > 0
+    assert "connect_args" in engine_options("sqlite:///x.db")
+    assert "journal_mode" not in sqlite_pragmas(read_only=True)
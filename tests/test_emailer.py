@@ -0,0 +1,121 @@
+import smtplib
+import socket
+import time
+
+import pytest
+
+pytest.importorskip("aiosmtpd")
+from aiosmtpd.controller import Controller  # noqa: E402
+
+from app.services.emailer import MailQueue, build_message  # noqa: E402
+
+
+class Recorder:
+    """Accepts every message after refusing the first ``fail_first`` with a transient 451."""
+
+    def __init__(self, fail_first: int = 0) -> None:
+        self.fail_first = fail_first
+        self.attempts = 0
+        self.received = []  # (peer, subject)
+
+    async def handle_DATA(self, server, session, envelope):
+        self.attempts += 1
+        if self.attempts <= self.fail_first:
+            return "451 try again later"
+        subject = next(l for l in envelope.content.decode().splitlines() if l.startswith("Subject:"))
+        self.received.append((session.peer, subject[len("Subject: "):]))
+        return "250 OK"
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def smtpd():
+    servers = []
+
+    def start(handler):
+        controller = Controller(handler, hostname="127.0.0.1", port=_free_port())
+        controller.start()
+        servers.append(controller)
+        return controller
+
+    yield start
+    for controller in servers:
+        controller.stop()
+
+
+def _queue(controller, **options):
+    options = {"pool_size": 1, "rate_per_sec": 0, "max_retries": 3, **options}
+    return MailQueue(
+        host=controller.hostname, port=controller.port, user="", password="", starttls=False, **options
+    )
+
+
+def _send(mail, subject, **options):
+    return mail.submit(["alice@example.com"], build_message(["alice@example.com"], subject, "<p>hi</p>"), **options)
+
+
+def test_messages_share_one_connection(smtpd):
+    handler = Recorder()
+    mail = _queue(smtpd(handler))
+    futures = [_send(mail, f"message {i}") for i in range(5)]
+    for f in futures:
+        f.result(timeout=10)
+    mail.stop()
+
+    assert [subject for _, subject in handler.received] == [f"message {i}" for i in range(5)]
+    assert len({peer for peer, _ in handler.received}) == 1
+
+
+def test_sends_are_rate_limited(smtpd):
+    handler = Recorder()
+    mail = _queue(smtpd(handler), pool_size=2, rate_per_sec=4)
+    started = time.monotonic()
+    for f in [_send(mail, f"message {i}") for i in range(8)]:
+        f.result(timeout=10)
+    elapsed = time.monotonic() - started
+    mail.stop()
+
+    # a burst of 4, then 4 more at 4 per second
+    assert len(handler.received) == 8
+    assert elapsed >= 0.9
+
+
+def test_transient_failures_are_retried(smtpd):
+    handler = Recorder(fail_first=2)
+    mail = _queue(smtpd(handler))
+    _send(mail, "eventually").result(timeout=10)
+    mail.stop()
+
+    assert handler.attempts == 3
+    assert [subject for _, subject in handler.received] == ["eventually"]
+
+
+def test_no_retries_when_the_caller_retries(smtpd):
+    handler = Recorder(fail_first=1)
+    mail = _queue(smtpd(handler))
+    with pytest.raises(smtplib.SMTPDataError):
+        _send(mail, "once", max_retries=0).result(timeout=10)
+    mail.stop()
+
+    assert handler.attempts == 1
+
+
+def test_stop_retries_messages_waiting_on_backoff(smtpd):
+    handler = Recorder(fail_first=1)
+    mail = _queue(smtpd(handler))
+    future = _send(mail, "before shutdown")
+    deadline = time.monotonic() + 5
+    while mail.stats()["retrying"] == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    # the retry timer has not fired yet; stop must not drop the message
+    mail.stop()
+    assert future.done()
+    future.result()
+    assert [subject for _, subject in handler.received] == ["before shutdown"]
+    assert mail.stats()["retrying"] == 0
@@ -0,0 +1,57 @@
+import threading
+
+import numpy as np
+import pytest
+
+from app.services.embedding import EmbeddingBatcher
+
+
+def _encode_lengths(calls):
+    def encode(texts):
+        calls.append(list(texts))
+        return np.array([[len(t), i] for i, t in enumerate(texts)], dtype=np.float32)
+
+    return encode
+
+
+def test_concurrent_callers_share_one_model_call():
+    calls = []
+    batcher = EmbeddingBatcher(_encode_lengths(calls), max_batch_size=8, max_wait_ms=200, name="test.shared")
+    results = {}
+    texts = ["a", "bb", "ccc", "dddd"]
+
+    def ask(text):
+        results[text] = batcher.encode_one(text)
+
+    threads = [threading.Thread(target=ask, args=(t,)) for t in texts]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+    batcher.close()
+
+    assert len(calls) == 1 and sorted(calls[0]) == sorted(texts)
+    # each caller gets the row of its own text
+    assert {t: float(v[0]) for t, v in results.items()} == {t: float(len(t)) for t in texts}
+
+
+def test_batches_are_capped_and_keep_order():
+    calls = []
+    batcher = EmbeddingBatcher(_encode_lengths(calls), max_batch_size=2, max_wait_ms=50, name="test.capped")
+    vectors = batcher.encode(["a", "bb", "ccc"])
+    batcher.close()
+
+    assert [len(c) for c in calls] == [2, 1]
+    assert vectors[:, 0].tolist() == [1.0, 2.0, 3.0]
+
+
+def test_encode_errors_reach_every_caller_in_the_batch():
+    def fail(texts):
+        raise ValueError("model fell over")
+
+    batcher = EmbeddingBatcher(fail, max_wait_ms=0, name="test.failing")
+    with pytest.raises(ValueError, match="fell over"):
+        batcher.encode(["a"])
+    batcher.close()
+    with pytest.raises(RuntimeError):
+        batcher.encode(["a"])
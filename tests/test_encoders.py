@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from app.services.encoders import (
+    ONNX,
+    ONNX_INT8,
+    TORCH_INT8,
+    OnnxEncoder,
+    export_onnx,
+    load_torch,
+    parity,
+    quantize_torch,
+    within_tolerance,
+)
+from app.utils.config import EMBED_MODEL
+
+
+class _Fixed:
+    """Returns the same embeddings whatever the texts, plus optional noise."""
+
+    def __init__(self, vectors, noise=0.0):
+        self.vectors = vectors + noise * np.random.default_rng(0).standard_normal(vectors.shape)
+
+    def encode(self, texts, normalize_embeddings=False, **_):
+        out = self.vectors[: len(texts)]
+        return out / np.linalg.norm(out, axis=1, keepdims=True) if normalize_embeddings else out
+
+
+def test_parity_tolerance():
+    vectors = np.random.default_rng(1).standard_normal((8, 32))
+    assert parity(_Fixed(vectors), _Fixed(vectors)) == pytest.approx({"min_self_cosine": 1.0, "max_similarity_error": 0.0})
+    assert within_tolerance(parity(_Fixed(vectors), _Fixed(vectors, noise=0.001)))
+    assert not within_tolerance(parity(_Fixed(vectors), _Fixed(vectors, noise=0.5)))
+
+
+@pytest.fixture(scope="module")
+def reference():
+    pytest.importorskip("sentence_transformers")
+    try:
+        return load_torch(EMBED_MODEL)
+    except OSError as e:  # not cached and no network
+        pytest.skip(f"{EMBED_MODEL} unavailable: {e}")
+
+
+@pytest.fixture(scope="module")
+def onnx_dir(reference, tmp_path_factory):
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("tokenizers")
+    directory = str(tmp_path_factory.mktemp("onnx"))
+    export_onnx(reference, directory)
+    return directory
+
+
+@pytest.mark.parametrize("backend", [TORCH_INT8, ONNX, ONNX_INT8])
+def test_backend_parity_with_torch(backend, reference, request):
+    if backend == TORCH_INT8:
+        candidate = quantize_torch(reference)
+    else:
+        candidate = OnnxEncoder(request.getfixturevalue("onnx_dir"), quantized=backend == ONNX_INT8)
+    report = parity(reference, candidate)
+    assert within_tolerance(report), report
@@ -0,0 +1,62 @@
+import json
+
+from sqlalchemy import select
+
+from app.api import events
+from app.db.session import SessionLocal
+from app.models.event import MeetingEvent
+
+
+def _contents(ids):
+    with SessionLocal() as session:
+        rows = session.scalars(select(MeetingEvent).where(MeetingEvent.id.in_(ids))).all()
+        return {row.id: (row.meeting_id, row.content, row.author) for row in rows}
+
+
+def test_bulk_reports_each_item_in_input_order(client):
+    meeting_id = client.post("/meetings/", json={"title": "Bulk"}).json()["id"]
+    items = [
+        {"meeting_id": meeting_id, "content": "first", "author": "ann"},
+        {"meeting_id": meeting_id},  # no content
+        {"meeting_id": 10**9, "content": "nowhere"},
+        "not an event",
+        {"meeting_id": meeting_id, "content": "second"},
+    ]
+
+    body = client.post("/events/bulk", json={"events": items}).json()
+
+    assert body["inserted"] == 2
+    assert [r["index"] for r in body["results"]] == list(range(5))
+    assert body["results"][1]["error"][0]["loc"] == ["content"]
+    assert body["results"][2]["error"] == "Meeting not found"
+    assert "error" in body["results"][3]
+    ids = [body["results"][0]["id"], body["results"][4]["id"]]
+    assert _contents(ids) == {ids[0]: (meeting_id, "first", "ann"), ids[1]: (meeting_id, "second", None)}
+
+
+def test_bulk_accepts_ndjson(client):
+    meeting_id = client.post("/meetings/", json={"title": "Bulk NDJSON"}).json()["id"]
+    lines = [json.dumps({"meeting_id": meeting_id, "content": f"line {i}"}) for i in range(3)]
+
+    response = client.post(
+        "/events/bulk",
+        content="\n".join(lines[:2]) + "\n\n" + lines[2] + "\n",
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+
+    assert response.json()["inserted"] == 3
+    bad = client.post("/events/bulk", content=lines[0] + "\n{oops", headers={"Content-Type": "application/x-ndjson"})
+    assert bad.status_code == 400 and "line 2" in bad.json()["detail"]
+
+
+def test_bulk_over_the_limit_is_rejected_whole(client, monkeypatch):
+    meeting_id = client.post("/meetings/", json={"title": "Bulk limit"}).json()["id"]
+    monkeypatch.setattr(events, "EVENTS_BULK_MAX", 3)
+    items = [{"meeting_id": meeting_id, "content": f"event {i}"} for i in range(4)]
+
+    response = client.post("/events/bulk", json=items)
+
+    assert response.status_code == 413
+    with SessionLocal() as session:
+        assert not session.scalars(select(MeetingEvent).where(MeetingEvent.meeting_id == meeting_id)).all()
+    assert client.post("/events/bulk", json=items[:3]).json()["inserted"] == 3
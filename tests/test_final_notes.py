@@ -0,0 +1,83 @@
+import json
+from datetime import datetime
+
+from sqlalchemy import select
+
+from app.db.session import SessionLocal
+from app.models.job import Job, JobStatus
+from app.models.meeting import Meeting, MeetingSummary
+from app.services import jobs
+from app.services.final_notes import EMAIL_NOTES, FINAL_NOTES, INDEX_NOTES, build_final_notes, enqueue_final_notes
+
+
+def _jobs(meeting_id):
+    with SessionLocal() as session:
+        return list(session.scalars(select(Job.kind).where(Job.meeting_id == meeting_id).order_by(Job.id)))
+
+
+def test_ending_twice_returns_the_same_job(client):
+    meeting_id = client.post("/meetings/", json={"title": "Ended twice"}).json()["id"]
+    client.post(f"/meetings/{meeting_id}/start")
+
+    first = client.post(f"/meetings/{meeting_id}/end").json()
+    again = client.post(f"/meetings/{meeting_id}/end").json()
+
+    assert again["job_id"] == first["job_id"]
+    assert again["actual_end"] == first["actual_end"]
+    assert _jobs(meeting_id) == [FINAL_NOTES]
+
+
+def test_rerun_notes_job_does_not_queue_steps_twice(client):
+    meeting_id = client.post("/meetings/", json={"title": "Notes already written"}).json()["id"]
+    with SessionLocal() as session:
+        meeting = session.get(Meeting, meeting_id)
+        meeting.actual_start, meeting.actual_end = datetime.utcnow(), datetime.utcnow()
+        job = enqueue_final_notes(session, meeting)
+        summary = MeetingSummary(
+            meeting_id=meeting_id,
+            window_start=meeting.actual_start,
+            window_end=meeting.actual_end,
+            summary_text="We agreed to ship on Friday.",
+            kind="final",
+        )
+        session.add(summary)
+        session.flush()
+        job_id, payload, summary_id = job.id, json.loads(job.payload), summary.id
+        jobs.enqueue(session, EMAIL_NOTES, meeting_id=meeting_id, payload={"summary_id": summary_id}, parent_id=job_id)
+        session.commit()
+
+    # email was queued by an earlier run; only indexing is still missing
+    assert build_final_notes(job_id, meeting_id, payload) == [(INDEX_NOTES, {"summary_id": summary_id})]
+
+
+def _run_notes_job(job_id):
+    with SessionLocal() as session:
+        job = session.get(Job, job_id)
+        follow_ups = build_final_notes(job.id, job.meeting_id, json.loads(job.payload))
+        job.status = JobStatus.SUCCEEDED
+        session.commit()
+    return follow_ups
+
+
+def test_restarted_meeting_gets_notes_for_each_session(client):
+    meeting_id = client.post("/meetings/", json={"title": "Two sessions"}).json()["id"]
+    ends = []
+    for text in ("We agreed to ship the beta on Friday.", "We agreed to delay the launch by a week."):
+        client.post(f"/meetings/{meeting_id}/start")
+        client.post("/events/", json={"meeting_id": meeting_id, "content": text})
+        ended = client.post(f"/meetings/{meeting_id}/end").json()
+        assert _run_notes_job(ended["job_id"])
+        ends.append(ended)
+
+    assert ends[1]["job_id"] != ends[0]["job_id"]
+    assert _jobs(meeting_id) == [FINAL_NOTES, FINAL_NOTES]
+    with SessionLocal() as session:
+        notes = list(session.scalars(
+            select(MeetingSummary.summary_text)
+            .where(MeetingSummary.meeting_id == meeting_id, MeetingSummary.kind == "final")
+            .order_by(MeetingSummary.id)
+        ))
+    assert len(notes) == 2
+    assert "delay the launch" in notes[1]
+    # ending the second session again is still a no-op
+    assert client.post(f"/meetings/{meeting_id}/end").json()["job_id"] == ends[1]["job_id"]
@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from app.db.session import SessionLocal
+from app.models.job import Job, JobStatus
+from app.services import jobs
+
+# ahead of anything other tests left queued, so _claim picks these jobs first
+LONG_AGO = datetime(2000, 1, 1)
+
+
+def _enqueue(kind, run_after=LONG_AGO, **kwargs):
+    with SessionLocal() as session:
+        job = jobs.enqueue(session, kind, payload={"n": 1}, **kwargs)
+        job.run_after = run_after
+        session.commit()
+        return job.id
+
+
+def _job(job_id):
+    with SessionLocal() as session:
+        return session.get(Job, job_id)
+
+
+def _claim_and_run(runner, job_id):
+    claimed = runner._claim()
+    assert claimed[0] == job_id and claimed[2:] == (None, {"n": 1})
+    runner._run(*claimed)
+    return _job(job_id)
+
+
+def test_start_requeues_jobs_left_running(db):
+    # not due, so the claims in the tests below leave it alone
+    job_id = _enqueue("test.crashed", run_after=datetime.utcnow() + timedelta(days=1))
+    with SessionLocal() as session:
+        session.get(Job, job_id).status = JobStatus.RUNNING
+        session.commit()
+
+    runner = jobs.JobRunner(workers=0)
+    runner.start()
+    runner.stop()
+
+    assert _job(job_id).status == JobStatus.PENDING
+
+
+def test_failed_attempts_back_off_then_succeed_with_follow_ups(db, monkeypatch):
+    calls = []
+
+    def flaky(job_id, meeting_id, payload):
+        calls.append(payload)
+        if len(calls) < 3:
+            raise ConnectionError(f"attempt {len(calls)} failed")
+        return [("test.follow_up", {"from": job_id})]
+
+    monkeypatch.setitem(jobs._handlers, "test.flaky", flaky)
+    job_id = _enqueue("test.flaky")
+    runner = jobs.JobRunner(workers=1)
+
+    for attempt in (1, 2):
+        before = datetime.utcnow()
+        job = _claim_and_run(runner, job_id)
+        assert (job.status, job.attempts, job.last_error) == (JobStatus.PENDING, attempt, f"attempt {attempt} failed")
+        assert job.run_after >= before + jobs.backoff(attempt) - timedelta(seconds=1)
+        # not due yet: nothing to claim until the backoff has passed
+        with SessionLocal() as session:
+            session.get(Job, job_id).run_after = LONG_AGO
+            session.commit()
+
+    job = _claim_and_run(runner, job_id)
+    assert (job.status, job.attempts, job.last_error) == (JobStatus.SUCCEEDED, 3, None)
+    assert job.finished_at is not None
+    with SessionLocal() as session:
+        child = session.scalars(select(Job).where(Job.parent_id == job_id)).one()
+        assert (child.kind, child.status, child.payload) == ("test.follow_up", JobStatus.PENDING, f'{{"from": {job_id}}}')
+
+
+def test_jobs_give_up_after_max_attempts(db, monkeypatch):
+    def broken(job_id, meeting_id, payload):
+        raise ValueError("bad payload")
+
+    monkeypatch.setitem(jobs._handlers, "test.broken", broken)
+    job_id = _enqueue("test.broken", max_attempts=1)
+
+    job = _claim_and_run(jobs.JobRunner(workers=1), job_id)
+
+    assert (job.status, job.attempts, job.last_error) == (JobStatus.FAILED, 1, "bad payload")
+    assert job.finished_at is not None
+    assert jobs.backoff(20) == timedelta(seconds=300)
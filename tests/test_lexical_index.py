@@ -0,0 +1,115 @@
+import os
+
+from sqlalchemy import func, select
+
+from app.db.session import SessionLocal
+from app.models.event import MeetingEvent
+from app.models.meeting import Meeting
+from app.services import lexical_index
+from app.services.lexical_index import LexicalIndex
+from app.utils.watermark import IdWatermark
+
+
+def _meeting(session, title):
+    meeting = Meeting(title=title)
+    session.add(meeting)
+    session.flush()
+    return meeting.id
+
+
+def _event(session, meeting_id, content, event_id=None):
+    event = MeetingEvent(id=event_id, meeting_id=meeting_id, content=content)
+    session.add(event)
+    session.flush()
+    return event.id
+
+
+def test_watermark_revisits_ids_it_skipped():
+    mark = IdWatermark(window=10)
+    mark.advance([1, 2, 5])
+    assert mark.last_id == 5 and mark.gaps == {3, 4}
+    mark.advance([4])
+    assert mark.gaps == {3}
+    # once it is more than a window behind, a missing id is taken for a rollback
+    mark.advance([20])
+    assert mark.gaps == set(range(11, 20))
+    assert IdWatermark.from_dict(mark.to_dict()).gaps == mark.gaps
+
+
+def test_meeting_scoped_search_matches_filtered_search(db, tmp_path):
+    with SessionLocal() as session:
+        ours = _meeting(session, "ours")
+        theirs = _meeting(session, "theirs")
+        for i in range(30):
+            _event(session, theirs, f"zebracorn rollout step {i}")
+        _event(session, ours, "the zebracorn rollout slipped a week")
+        _event(session, ours, "zebracorn budget approved")
+        session.commit()
+
+    index = LexicalIndex(str(tmp_path))
+    assert index.search("zebracorn") == []  # not loaded: searched once the scheduler has synced it
+    index.sync()
+    everywhere = index.search("zebracorn rollout", k=100)
+    scoped = index.search("zebracorn rollout", k=100, meeting_ids=[ours])
+    assert {h.meeting_id for h in scoped} == {ours}
+    assert [(h.ref, h.score) for h in scoped] == [(h.ref, h.score) for h in everywhere if h.meeting_id == ours]
+
+    # the same from the merged, persisted base
+    index.flush()
+    reopened = LexicalIndex(str(tmp_path))
+    reopened.sync()
+    assert [h.ref for h in reopened.search("zebracorn rollout", k=100, meeting_ids=[ours])] == [h.ref for h in scoped]
+    assert reopened.search("zebracorn", meeting_ids=[ours, theirs], k=100)
+
+
+def test_sync_picks_up_rows_committed_out_of_order(db, tmp_path):
+    with SessionLocal() as session:
+        meeting_id = _meeting(session, "late commit")
+        top = session.scalar(select(func.coalesce(func.max(MeetingEvent.id), 0)))
+        _event(session, meeting_id, "quokkafest opening remarks", top + 1)
+        _event(session, meeting_id, "quokkafest closing remarks", top + 3)
+        session.commit()
+
+    index = LexicalIndex(str(tmp_path))
+    index.sync()
+    assert len(index.search("quokkafest", meeting_ids=[meeting_id])) == 2
+
+    # id top + 2 was taken before top + 3 but its transaction commits after the sync
+    with SessionLocal() as session:
+        _event(session, meeting_id, "quokkafest keynote", top + 2)
+        session.commit()
+    assert index.sync() == 1
+    assert {h.row_id for h in index.search("quokkafest", meeting_ids=[meeting_id])} == {top + 1, top + 2, top + 3}
+
+
+def test_merges_swap_in_a_new_generation(db, tmp_path, monkeypatch):
+    with SessionLocal() as session:
+        meeting_id = _meeting(session, "generations")
+        _event(session, meeting_id, "wombatcon venue booked")
+        session.commit()
+
+    monkeypatch.setattr(lexical_index, "LEXICAL_MERGE_DOCS", 1)
+    index = LexicalIndex(str(tmp_path))
+    index.sync()
+    first = index._generation
+    assert first is not None and index._delta_cols["doc_len"].size == 0
+
+    # below the merge threshold the new event is searched from the delta...
+    monkeypatch.setattr(lexical_index, "LEXICAL_MERGE_DOCS", 10**6)
+    with SessionLocal() as session:
+        _event(session, meeting_id, "wombatcon venue catering booked")
+        session.commit()
+    assert index.sync() == 1
+    before = [(h.ref, h.score) for h in index.search("wombatcon venue", meeting_ids=[meeting_id])]
+    assert len(before) == 2
+
+    # ...and after the merge from the new base, with the same scores
+    index.flush()
+    assert index._generation > first
+    assert not os.path.exists(tmp_path / first)
+    assert [(h.ref, h.score) for h in index.search("wombatcon venue", meeting_ids=[meeting_id])] == before
+
+    reopened = LexicalIndex(str(tmp_path))
+    assert reopened.sync() == 0
+    assert reopened._generation == index._generation
+    assert [h.ref for h in reopened.search("wombatcon venue", meeting_ids=[meeting_id])] == [r for r, _ in before]
@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from app.services.notifier import Broadcaster
+from app.utils import metrics
+
+RESYNC = b"event: resync\ndata: {}\n\n"
+
+
+@pytest.fixture
+def feed(monkeypatch):
+    # a Broadcaster registers itself for /metrics; put the app's one back afterwards
+    monkeypatch.setitem(metrics._registry, "feed", metrics._registry.get("feed"))
+    return Broadcaster(history=3, queue_size=2)
+
+
+def _drain(sub):
+    frames = []
+    while not sub.queue.empty():
+        frames.append(sub.queue.get_nowait())
+    return frames
+
+
+def _ids(frames):
+    return [int(f.split(b"\n", 1)[0][len(b"id: "):]) for f in frames]
+
+
+def test_reconnect_replays_what_was_missed(feed):
+    async def run():
+        seqs = []
+        for i in range(3):
+            feed.publish(["meeting:1", "meetings"], "summary", {"n": i})
+            seqs.append(feed._last_seq)
+        feed.publish(["meeting:2"], "summary", {"n": 99})
+        sub = feed.subscribe("meeting:1", last_event_id=seqs[0])
+        replayed = _drain(sub)
+        feed.publish(["meeting:1"], "meeting", {"status": "ended"})
+        await asyncio.sleep(0)
+        return seqs, replayed, _drain(sub)
+
+    seqs, replayed, live = asyncio.run(run())
+    assert _ids(replayed) == seqs[1:]
+    assert len(live) == 1 and b"event: meeting" in live[0]
+
+
+def test_reconnect_resyncs_when_history_is_gone(feed):
+    async def run():
+        for i in range(5):
+            feed.publish(["meeting:1"], "summary", {"n": i})
+        aged_out = _drain(feed.subscribe("meeting:1", last_event_id=1))
+        # an id from before a server restart is ahead of this process's counter
+        restarted = _drain(feed.subscribe("meeting:1", last_event_id=feed._last_seq + 10))
+        current = _drain(feed.subscribe("meeting:1", last_event_id=feed._last_seq))
+        return aged_out, restarted, current
+
+    aged_out, restarted, current = asyncio.run(run())
+    assert aged_out == [RESYNC]
+    assert restarted == [RESYNC]
+    assert current == []
+
+
+def test_a_subscriber_that_falls_behind_gets_resync(feed):
+    async def run():
+        sub = feed.subscribe("meetings")
+        for i in range(3):
+            feed.publish(["meetings"], "meeting", {"id": i})
+        await asyncio.sleep(0)
+        frames = _drain(sub)
+        feed.unsubscribe(sub)
+        return frames, feed.snapshot()
+
+    frames, snapshot = asyncio.run(run())
+    assert frames == [RESYNC]
+    assert snapshot == {"topics": 0, "subscribers": 0}
@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta
+
+from starlette.requests import Request
+
+from app.db.session import SessionLocal
+from app.models.meeting import Meeting, MeetingSummary
+from app.utils.pagination import cache_headers, etag_for, not_modified
+
+
+def _request(**headers):
+    return Request({"type": "http", "headers": [(k.replace("_", "-").encode(), v.encode()) for k, v in headers.items()]})
+
+
+def test_summaries_cursor_is_in_the_header_like_meetings(client):
+    meeting_id = client.post("/meetings/", json={"title": "Paged"}).json()["id"]
+    now = datetime.utcnow()
+    with SessionLocal() as session:
+        session.add_all([
+            MeetingSummary(
+                meeting_id=meeting_id,
+                window_start=now + timedelta(minutes=i),
+                window_end=now + timedelta(minutes=i + 1),
+                summary_text=f"summary {i}",
+            )
+            for i in range(3)
+        ])
+        session.commit()
+
+    first = client.get(f"/meetings/{meeting_id}/summaries", params={"limit": 2})
+    assert [s["summary_text"] for s in first.json()["summaries"]] == ["summary 2", "summary 1"]
+    assert "next_cursor" not in first.json()
+    rest = client.get(
+        f"/meetings/{meeting_id}/summaries", params={"limit": 2, "cursor": first.headers["X-Next-Cursor"]}
+    )
+    assert [s["summary_text"] for s in rest.json()["summaries"]] == ["summary 0"]
+    assert "X-Next-Cursor" not in rest.headers
+
+    client.post("/meetings/", json={"title": "Paged too"})
+    meetings = client.get("/meetings/", params={"limit": 1})
+    assert "X-Next-Cursor" in meetings.headers
+
+
+def test_last_modified_waits_for_its_second_to_end():
+    etag = etag_for("x")
+    changed = datetime.utcnow()
+    assert "Last-Modified" not in cache_headers(etag, changed)
+    # a client holding a date of this second cannot be told nothing changed: more may change in it
+    date = cache_headers(etag, changed - timedelta(seconds=5))["Last-Modified"]
+    assert not not_modified(_request(if_modified_since=date), etag, changed)
+
+    settled = datetime.utcnow() - timedelta(seconds=5)
+    date = cache_headers(etag, settled)["Last-Modified"]
+    assert not_modified(_request(if_modified_since=date), etag, settled)
+    assert not not_modified(_request(if_modified_since=date), etag, settled + timedelta(seconds=1))
+
+
+def test_meeting_pages_split_ties_on_created_at(client):
+    tied = datetime(2100, 1, 1)
+    with SessionLocal() as session:
+        meetings = [Meeting(title=f"Tied {i}", created_at=tied) for i in range(5)]
+        session.add_all(meetings)
+        session.commit()
+        ids = sorted((m.id for m in meetings), reverse=True)
+
+    seen, params = [], {"limit": 2, "status": "scheduled"}
+    while len(seen) < 5:
+        page = client.get("/meetings/", params=params)
+        seen += [m["id"] for m in page.json()]
+        params["cursor"] = page.headers["X-Next-Cursor"] if len(seen) < 5 else None
+    # newest first, ties broken by id, nothing repeated or skipped across pages
+    assert seen[:5] == ids and len(seen) == len(set(seen))
+
+    assert client.get("/meetings/", params={"cursor": "not-a-cursor"}).status_code == 400
+
+
+def test_meeting_list_is_conditional(client):
+    first = client.get("/meetings/", params={"limit": 1})
+    etag = first.headers["ETag"]
+    assert client.get("/meetings/", params={"limit": 1}, headers={"If-None-Match": etag}).status_code == 304
+    # another page size is another representation
+    assert client.get("/meetings/", params={"limit": 2}, headers={"If-None-Match": etag}).status_code == 200
+
+    client.post("/meetings/", json={"title": "Changes the list"})
+    again = client.get("/meetings/", params={"limit": 1}, headers={"If-None-Match": etag})
+    assert again.status_code == 200 and again.headers["ETag"] != etag
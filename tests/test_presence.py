@@ -0,0 +1,18 @@
+from app.services.presence import presence
+
+
+def test_unknown_meetings_get_no_roster(client):
+    before = presence.snapshot()["meetings"]
+    for meeting_id in range(10_000_000, 10_000_020):
+        assert client.post(f"/meetings/{meeting_id}/heartbeat", json={"email": "x@example.com"}).status_code == 404
+        assert not presence.has_roster(meeting_id)
+    assert presence.snapshot()["meetings"] == before
+
+
+def test_roster_loads_for_a_real_meeting(client):
+    meeting_id = client.post(
+        "/meetings/", json={"title": "Roster", "participants": [{"name": "Ann", "email": "ann@example.com"}]}
+    ).json()["id"]
+    presence._rosters.pop(meeting_id)  # as after a restart
+    assert client.post(f"/meetings/{meeting_id}/join", json={"email": "ann@example.com"}).status_code == 200
+    assert presence.has_roster(meeting_id)
@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.db.session import SessionLocal
+from app.models.meeting import Meeting, MeetingSummary
+from app.services import retrieval
+from app.services.chunker import CHUNK_KIND, TranscriptChunker
+from app.services.lexical_index import EVENT, SUMMARY, LexicalHit
+from app.services.vector_store import VectorHit
+
+T0 = datetime(2026, 2, 2, 10)
+
+
+def test_chunks_overlap_and_carry_their_events():
+    chunker = TranscriptChunker(size=4, overlap=1)
+    chunker.add(7, 1, "ann", "we ship friday", T0)
+    chunker.add(7, 2, "bob", "unless qa objects", T0 + timedelta(seconds=5))
+    first, = chunker.take()
+
+    assert first.text == "we ship friday unless"
+    assert (first.meeting_id, first.kind, first.ref) == (7, CHUNK_KIND, "chunk:1-2")
+    assert first.event_ids == [1, 2] and first.authors == ["ann", "bob"]
+    assert (first.started_at, first.created_at) == (T0.isoformat(), (T0 + timedelta(seconds=5)).isoformat())
+
+    # quiet long enough: the tail is emitted, starting with the shared word
+    chunker.flush_idle(T0 + timedelta(minutes=1), timedelta(seconds=30))
+    tail, = chunker.take()
+    assert tail.text == "unless qa objects" and tail.event_ids == [2]
+    # nothing new after that: the window is dropped rather than emitted again
+    chunker.flush_idle(T0 + timedelta(minutes=2), timedelta(seconds=30))
+    assert chunker.take() == [] and chunker.meetings == 0
+
+    with pytest.raises(ValueError):
+        TranscriptChunker(size=4, overlap=4)
+
+
+class _Lexical:
+    def __init__(self, hits):
+        self.hits = hits
+
+    def search(self, question, k, meeting_ids=None, kinds=None):
+        return self.hits[:k]
+
+
+class _Dense:
+    model = object()
+
+    def __init__(self, hits):
+        self.hits = hits
+
+    def query(self, question, k, meeting_ids=None, kinds=None):
+        return self.hits[:k]
+
+
+def test_chunk_and_lexical_hits_are_fused_by_rank(db, monkeypatch):
+    with SessionLocal() as session:
+        meeting = Meeting(title="Fused")
+        session.add(meeting)
+        session.flush()
+        summary = MeetingSummary(
+            meeting_id=meeting.id, window_start=T0, window_end=T0, summary_text="Ship on Friday.", kind="final"
+        )
+        session.add(summary)
+        session.commit()
+        meeting_id, summary_id = meeting.id, summary.id
+
+    chunk = VectorHit(text="we ship friday unless", score=0.9, meeting_id=meeting_id, kind=CHUNK_KIND,
+                      ref="chunk:1-2", event_ids=[1, 2], authors=["ann", "bob"])
+    unsourced = VectorHit(text="friday it is", score=0.8, meeting_id=meeting_id)
+    dense = [chunk, unsourced]
+    lexical = [
+        LexicalHit(score=7.0, source=SUMMARY, row_id=summary_id, meeting_id=meeting_id, kind="final"),
+        LexicalHit(score=5.0, source=EVENT, row_id=10**9, meeting_id=meeting_id, kind="transcript"),  # since deleted
+    ]
+    monkeypatch.setattr(retrieval, "get_lexical_index", lambda: _Lexical(lexical))
+    monkeypatch.setattr(retrieval, "get_vector_store", lambda: _Dense(dense))
+
+    hits = retrieval.retrieve("when do we ship?", k=5)
+
+    k = retrieval.RAG_RRF_K
+    # both lists' first entries tie on 1 / (k + 1); sorting is stable, so dense comes first
+    assert [(h.ref, h.score) for h in hits] == [
+        ("chunk:1-2", 1 / (k + 1)),
+        (f"summary:{summary_id}", 1 / (k + 1)),
+        (None, 1 / (k + 2)),
+    ]
+    assert hits[0].event_ids == [1, 2] and hits[0].authors == ["ann", "bob"]
+    assert hits[1].text == "Ship on Friday."
+
+    fused = retrieval.reciprocal_rank_fusion([["a", "b", "c"], ["c", "a"]], k=1)
+    assert [key for key, _ in fused] == ["a", "c", "b"]
+    assert dict(fused)["c"] == pytest.approx(1 / 4 + 1 / 2)
@@ -0,0 +1,145 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app.db.session import SessionLocal
+from app.models.event import MeetingEvent
+from app.models.meeting import Meeting, MeetingStatus, MeetingSummary, SummaryWatermark
+from app.services import scheduler
+from app.services.summarizer import discard_summarizer
+from app.utils import metrics
+
+
+def _meeting(session, **fields):
+    meeting = Meeting(title="Scheduled", **fields)
+    session.add(meeting)
+    session.flush()
+    return meeting.id
+
+
+def _events(session, meeting_id, *contents):
+    events = [MeetingEvent(meeting_id=meeting_id, content=c) for c in contents]
+    session.add_all(events)
+    session.flush()
+    return [e.id for e in events]
+
+
+def test_timed_job_records_runs_and_overruns():
+    @scheduler.timed_job("test_quick", timedelta(seconds=60))
+    def quick():
+        pass
+
+    @scheduler.timed_job("test_slow", timedelta(0))
+    def slow():
+        time.sleep(0.01)
+        raise RuntimeError("job failed")
+
+    quick()
+    with pytest.raises(RuntimeError):
+        slow()
+
+    stats = metrics.snapshot("scheduler.test_")
+    assert stats["scheduler.test_quick_ms"]["count"] == 1
+    assert stats["scheduler.test_quick_overruns"] == 0
+    # a failing run is still timed
+    assert stats["scheduler.test_slow_ms"]["count"] == 1
+    assert stats["scheduler.test_slow_ms"]["max"] >= 10
+    assert stats["scheduler.test_slow_overruns"] == 1
+
+
+def test_new_events_of_every_meeting_come_from_one_query(db):
+    with SessionLocal() as session:
+        fresh, behind, ahead = (_meeting(session) for _ in range(3))
+        fresh_ids = _events(session, fresh, "a", "b")
+        behind_ids = _events(session, behind, "c", "d", "e")
+        ahead_ids = _events(session, ahead, "f", "g")
+        session.commit()
+
+        statements = []
+        execute = session.execute
+        session.execute = lambda *args, **kwargs: (statements.append(args[0]), execute(*args, **kwargs))[1]
+        new = scheduler.fetch_new_events(session, {fresh: 0, behind: behind_ids[0], ahead: ahead_ids[-1]})
+
+    assert len(statements) == 1
+    assert {m: [e[0] for e in events] for m, events in new.items()} == {fresh: fresh_ids, behind: behind_ids[1:]}
+    assert [e[1] for e in new[behind]] == ["d", "e"]
+    assert scheduler.fetch_new_events(None, {}) == {}
+
+
+def _rolling(meeting_id):
+    with SessionLocal() as session:
+        rows = session.scalars(
+            select(MeetingSummary)
+            .where(MeetingSummary.meeting_id == meeting_id, MeetingSummary.kind == "rolling")
+            .order_by(MeetingSummary.id)
+        ).all()
+        return [(s.window_start, s.window_end) for s in rows]
+
+
+def _watermark(meeting_id):
+    with SessionLocal() as session:
+        return session.scalar(select(SummaryWatermark.last_event_id).where(SummaryWatermark.meeting_id == meeting_id))
+
+
+def _timed_events(session, meeting_id, start, count):
+    events = [
+        MeetingEvent(
+            meeting_id=meeting_id,
+            content=f"Item {i} of the plan was reviewed by the team.",
+            created_at=start + timedelta(minutes=i),
+        )
+        for i in range(count)
+    ]
+    session.add_all(events)
+    session.flush()
+    return events
+
+
+def test_every_event_lands_in_exactly_one_rolling_summary(db, monkeypatch):
+    monkeypatch.setattr(scheduler, "ROLLING_BATCH_EVENTS", 3)
+    t0 = datetime(2026, 1, 5, 9)
+    with SessionLocal() as session:
+        meeting_id = _meeting(session, status=MeetingStatus.LIVE)
+        first = _timed_events(session, meeting_id, t0, 7)
+        session.commit()
+        times = [e.created_at for e in first]
+        last_id = first[-1].id
+
+    scheduler.summarize_meetings([meeting_id])
+    assert _rolling(meeting_id) == [(times[0], times[2]), (times[3], times[5]), (times[6], times[6])]
+    assert _watermark(meeting_id) == last_id
+
+    scheduler.summarize_meetings([meeting_id])
+    assert len(_rolling(meeting_id)) == 3
+
+    # a restart loses the in-memory state; events below the watermark only rebuild statistics
+    discard_summarizer(meeting_id)
+    with SessionLocal() as session:
+        later = _timed_events(session, meeting_id, t0 + timedelta(hours=1), 2)
+        session.commit()
+        later_times, later_last = [e.created_at for e in later], later[-1].id
+    scheduler.summarize_meetings([meeting_id])
+    assert _rolling(meeting_id)[3:] == [(later_times[0], later_times[1])]
+    assert _watermark(meeting_id) == later_last
+
+
+def test_watermark_starts_after_summaries_written_before_it_existed(db):
+    t0 = datetime(2026, 1, 6, 9)
+    with SessionLocal() as session:
+        meeting_id = _meeting(session, status=MeetingStatus.LIVE)
+        events = _timed_events(session, meeting_id, t0, 4)
+        covered = events[1].id
+        session.add(MeetingSummary(
+            meeting_id=meeting_id,
+            window_start=events[0].created_at,
+            window_end=events[1].created_at,
+            summary_text="Items 0 and 1 were reviewed.",
+            kind="rolling",
+        ))
+        session.flush()
+
+        assert scheduler.load_watermarks(session, [meeting_id]) == {meeting_id: covered}
+        session.commit()
+    assert _watermark(meeting_id) == covered
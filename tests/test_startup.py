@@ -0,0 +1,17 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def test_importing_the_app_loads_no_ml_libraries(tmp_path):
+    # a fresh interpreter: this one has already imported whatever other tests needed
+    code = "import json, sys, app.main; print(json.dumps([m for m in ('torch', 'sklearn', 'faiss') if m in sys.modules]))"
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=tmp_path, env=dict(os.environ, PYTHONPATH=str(ROOT)),
+        capture_output=True, text=True, check=True,
+    ).stdout
+    assert json.loads(out.strip().splitlines()[-1]) == []
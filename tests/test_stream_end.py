@@ -0,0 +1,67 @@
+import pytest
+from sqlalchemy import func, select
+from starlette.websockets import WebSocketDisconnect
+
+from app.api.meetings import _fragments
+from app.db.session import SessionLocal
+from app.models.event import MeetingEvent
+from app.services.ingest import event_buffer
+
+
+def _events(meeting_id):
+    with SessionLocal() as session:
+        return session.scalar(select(func.count()).select_from(MeetingEvent).where(MeetingEvent.meeting_id == meeting_id))
+
+
+def test_end_writes_streamed_fragments_and_closes_stream(client):
+    meeting_id = client.post("/meetings/", json={"title": "Stream then end"}).json()["id"]
+    client.post(f"/meetings/{meeting_id}/start")
+
+    with client.websocket_connect(f"/meetings/{meeting_id}/stream?author=alice") as ws:
+        for text in ("first fragment", "second fragment", "third fragment"):
+            ws.send_text(text)
+            assert "accepted" in ws.receive_json()
+        # the fragments are still buffered here; ending must wait for them
+        ended = client.post(f"/meetings/{meeting_id}/end")
+        assert ended.status_code == 200
+        assert _events(meeting_id) == 3
+
+        ws.send_text("after the end")
+        with pytest.raises(WebSocketDisconnect) as closed:
+            ws.receive_json()
+        assert closed.value.code == 4409
+    assert _events(meeting_id) == 3
+
+    with pytest.raises(WebSocketDisconnect) as refused:
+        with client.websocket_connect(f"/meetings/{meeting_id}/stream") as ws:
+            ws.receive_json()
+    assert refused.value.code == 4409
+
+
+def test_json_scalar_captions_stay_text():
+    frames = ["2024", "true", "null", '"quoted"', "plain words"]
+    assert [r["content"] for f in frames for r in _fragments(f, 1, "alice")] == frames
+    assert _fragments('[{"content": "one", "author": "bob"}, "two"]', 1, "alice") == [
+        {"meeting_id": 1, "content": "one", "author": "bob"},
+        {"meeting_id": 1, "content": "two", "author": "alice"},
+    ]
+
+
+def test_ended_meetings_are_not_kept_closed_forever(client):
+    quiet = client.post("/meetings/", json={"title": "No stream"}).json()["id"]
+    client.post(f"/meetings/{quiet}/start")
+    client.post(f"/meetings/{quiet}/end")
+    assert not event_buffer.is_closed(quiet)
+
+    streamed = client.post("/meetings/", json={"title": "Streamed"}).json()["id"]
+    client.post(f"/meetings/{streamed}/start")
+    with client.websocket_connect(f"/meetings/{streamed}/stream") as ws:
+        ws.send_text("hello")
+        ws.receive_json()
+        client.post(f"/meetings/{streamed}/end")
+        # the open stream still has to learn that the meeting ended
+        assert event_buffer.is_closed(streamed)
+        ws.send_text("too late")
+        with pytest.raises(WebSocketDisconnect):
+            ws.receive_json()
+    assert not event_buffer.is_closed(streamed)
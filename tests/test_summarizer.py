@@ -0,0 +1,29 @@
+import pytest
+
+from app.services.summarizer import split_chunks, split_sentences
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("We shipped v1.2 today. Latency dropped 3.5 percent.", ["We shipped v1.2 today", "Latency dropped 3.5 percent"]),
+    ("Use a cache, e.g. Redis. It helps.", ["Use a cache, e.g. Redis", "It helps"]),
+    ("Dr. Lee joins at 9 a.m. tomorrow. Bring the U.S. numbers.", ["Dr. Lee joins at 9 a.m. tomorrow", "Bring the U.S. numbers"]),
+    ("Wait for it... Done", ["Wait for it", "Done"]),
+    ("Bring pens, paper, etc. and a laptop. Then we start.", ["Bring pens, paper, etc. and a laptop", "Then we start"]),
+    ("Neither did I. Next item", ["Neither did I", "Next item"]),
+    ("no punctuation\nacross lines", ["no punctuation across lines"]),
+    (" . ", []),
+])
+def test_split_sentences(text, expected):
+    assert split_sentences(text) == expected
+
+
+@pytest.mark.parametrize("chunks, expected", [
+    (["Hello everyone", "Let's start"], ["Hello everyone", "Let's start"]),
+    (["Is that done?", "Yes, yesterday."], ["Is that done?", "Yes, yesterday"]),
+    # streamed caption fragments that stop mid-sentence
+    (["we should move the", "launch to Friday.", "Agreed."], ["we should move the launch to Friday", "Agreed"]),
+    (["Ask Dr.", "Lee first", "and then the team"], ["Ask Dr. Lee first and then the team"]),
+    (["We have 5.", "Next item"], ["We have 5", "Next item"]),
+])
+def test_split_chunks(chunks, expected):
+    assert split_chunks(chunks) == expected
@@ -0,0 +1,80 @@
+import os
+
+import numpy as np
+
+from app.services.vector_segments import SegmentLog
+
+DIM = 4
+
+
+def _rows(start, n):
+    vectors = np.arange(start * DIM, (start + n) * DIM, dtype=np.float32).reshape(n, DIM)
+    return vectors, [{"text": f"row {i}"} for i in range(start, start + n)]
+
+
+def _open(path, segment_rows=4):
+    log = SegmentLog(str(path), DIM, segment_rows)
+    log.open()
+    return log
+
+
+def test_appends_survive_reopen_across_sealed_segments(tmp_path):
+    log = _open(tmp_path)
+    for start in range(0, 10, 2):
+        log.append(*_rows(start, 2))
+    assert len(log.segments) == 3 and len(log.sealed()) == 2
+
+    reopened = _open(tmp_path)
+    assert reopened.size == 10
+    assert [s.start for s in reopened.segments] == [0, 4, 8]
+    assert reopened.record(7) == {"text": "row 7"}
+    np.testing.assert_array_equal(reopened.vector(7), _rows(7, 1)[0][0])
+    assert reopened.record(10) is None
+
+
+def test_torn_tail_is_trimmed_on_open(tmp_path):
+    log = _open(tmp_path, segment_rows=100)
+    log.append(*_rows(0, 3))
+    name = log.segments[-1].name
+    # a crash mid-append: a vector row written, its record line only half
+    with open(os.path.join(tmp_path, f"{name}.vec"), "ab") as f:
+        f.write(_rows(3, 1)[0].tobytes())
+    with open(os.path.join(tmp_path, f"{name}.jsonl"), "ab") as f:
+        f.write(b'{"text": "ro')
+
+    reopened = _open(tmp_path, segment_rows=100)
+    assert reopened.size == 3
+    assert os.path.getsize(os.path.join(tmp_path, f"{name}.vec")) == 3 * DIM * 4
+    reopened.append(*_rows(3, 1))
+    assert [r["text"] for r in _open(tmp_path, segment_rows=100).segments[0].records] == [
+        "row 0", "row 1", "row 2", "row 3"
+    ]
+
+
+def test_compaction_merges_sealed_segments_and_keeps_positions(tmp_path):
+    log = _open(tmp_path)
+    for start in range(0, 10, 2):
+        log.append(*_rows(start, 2))
+    sealed = [s.name for s in log.sealed()]
+    swaps = []
+
+    assert log.compact(on_swap=lambda swap: (swaps.append(True), swap()))
+    assert swaps == [True]
+    assert len(log.segments) == 2 and log.segments[0].size == 8
+    for name in sealed:
+        assert not os.path.exists(os.path.join(tmp_path, f"{name}.vec"))
+    assert not log.compact()  # a single sealed segment is left
+
+    reopened = _open(tmp_path)
+    assert [reopened.record(i)["text"] for i in range(10)] == [f"row {i}" for i in range(10)]
+    np.testing.assert_array_equal(reopened.vector(5), _rows(5, 1)[0][0])
+
+
+def test_files_of_a_crashed_compaction_are_removed(tmp_path):
+    log = _open(tmp_path)
+    log.append(*_rows(0, 2))
+    for ext in (".vec", ".jsonl"):
+        open(os.path.join(tmp_path, f"99999999{ext}"), "wb").close()
+
+    _open(tmp_path)
+    assert not any(f.startswith("99999999") for f in os.listdir(tmp_path))
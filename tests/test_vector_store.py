@@ -0,0 +1,202 @@
+import threading
+import time
+import zlib
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from app.services import vector_store
+from app.services.vector_store import VectorRecord, VectorStore
+from app.utils.locks import ReadWriteLock
+
+
+class HashEncoder:
+    """Bag of hashed words: a small deterministic stand-in for the sentence-transformers model."""
+
+    dimension = 64
+
+    def __init__(self):
+        self.encoded = []
+
+    def get_sentence_embedding_dimension(self):
+        return self.dimension
+
+    def encode(self, texts, normalize_embeddings=False, **_):
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+        self.encoded.extend(texts)
+        out = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for word in text.lower().split():
+                out[i, zlib.crc32(word.encode()) % self.dimension] += 1.0
+        if normalize_embeddings:
+            out /= np.maximum(np.linalg.norm(out, axis=1, keepdims=True), 1e-12)
+        return out[0] if single else out
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(vector_store, "load_encoder", HashEncoder)
+    return VectorStore(index_dir=str(tmp_path))
+
+
+def _add(store, meeting_id, *texts):
+    store.add_records([VectorRecord(text=t, meeting_id=meeting_id, kind="final") for t in texts])
+
+
+def test_adds_only_outdate_results_for_their_meetings(store):
+    _add(store, 1, "budget review for the launch", "hiring plan")
+    _add(store, 2, "budget for the offsite")
+    question = "What about the budget?"
+
+    first = store.query(question, k=5, meeting_ids=[1])
+    hits = store._result_cache.hits
+    _add(store, 2, "budget overrun on catering")
+    assert store.query(question, k=5, meeting_ids=[1]) == first
+    assert store._result_cache.hits == hits + 1
+
+    _add(store, 1, "budget approved by finance")
+    again = store.query(question, k=5, meeting_ids=[1])
+    assert "budget approved by finance" in [h.text for h in again]
+    # the question was embedded once; adds keep its embedding cached
+    assert store.model.encoded.count(question) == 1
+
+
+def test_unscoped_results_follow_every_add(store):
+    _add(store, 1, "budget review")
+    assert [h.text for h in store.query("budget", k=5)] == ["budget review"]
+    _add(store, 2, "budget for the offsite")
+    assert len(store.query("budget", k=5)) == 2
+
+
+def test_recall_report_leaves_the_live_index_alone(tmp_path, monkeypatch):
+    pytest.importorskip("faiss")
+    from app.services import ann_index
+
+    monkeypatch.setattr(vector_store, "load_encoder", HashEncoder)
+    store = VectorStore(index_dir=str(tmp_path), index_mode="hnsw")
+    words = "budget hiring release roadmap database migration customer security latency design".split()
+    store.add_texts([f"{words[i % 10]} {words[(i * 7) % 10]} item {i}" for i in range(60)], meeting_id=1)
+    store._build_ann()
+    live = store._ann
+    assert live is not None
+    ef_search = ann_index.get_search_param(live)
+
+    tuned = []
+    set_search_param = ann_index.set_search_param
+    monkeypatch.setattr(ann_index, "set_search_param", lambda index, value: (tuned.append(index), set_search_param(index, value)))
+    report = store.recall_report(k=5, sample=20, values=[4, 16])
+
+    assert [row["efSearch"] for row in report] == [4, 16]
+    assert tuned and all(index is not live for index in tuned)
+    assert ann_index.get_search_param(live) == ef_search
+
+
+def test_filtered_query_widens_past_the_first_over_fetch(store):
+    # 150 "rolling" rows outrank the single "final" one, so the first fetch of 100 holds no final row
+    store.add_records([VectorRecord(text="budget budget review", kind="rolling") for _ in range(150)])
+    store.add_records([VectorRecord(text="budget plan", kind="final")])
+    lookups = []
+    record = store._log.record
+    store._log.record = lambda pos: (lookups.append(pos), record(pos))[1]
+
+    hits = store.query("budget review", k=1, kinds=["final"])
+
+    assert [h.text for h in hits] == ["budget plan"]
+    assert len(lookups) <= 151
+    lookups.clear()
+    assert [h.kind for h in store.query("budget review", k=3, kinds=["rolling"])] == ["rolling"] * 3
+    # the first 100 candidates were enough; the rest of the corpus was not looked at
+    assert len(lookups) == 3
+
+
+def test_partitions_gather_only_new_rows(store):
+    _add(store, 1, "budget review", "hiring plan")
+    store.query("budget", k=5, meeting_ids=[1])
+    part = store._partitions[1]
+    rows = part._rows
+    _add(store, 1, "budget approved")
+
+    hits = store.query("budget", k=5, meeting_ids=[1])
+
+    assert {h.text for h in hits} == {"budget review", "hiring plan", "budget approved"}
+    assert part._gathered == 3
+    # the rows gathered earlier were copied, not looked up again
+    np.testing.assert_array_equal(part._rows[:2], rows[:2])
+    np.testing.assert_array_equal(part.matrix(store._log), store.model.encode(
+        ["budget review", "hiring plan", "budget approved"], normalize_embeddings=True
+    ))
+
+
+def test_queries_never_see_half_an_add(store):
+    errors = []
+    done = threading.Event()
+
+    def writer():
+        try:
+            for batch in range(40):
+                _add(store, 1, *(f"shared batch{batch} row{row}" for row in range(3)))
+        except Exception as e:  # surfaced below; a thread would swallow it
+            errors.append(e)
+        finally:
+            done.set()
+
+    def reader(scope):
+        try:
+            while not done.is_set():
+                hits = store.query("shared", k=1000, meeting_ids=scope)
+                # every batch is appended under one write lock: a query sees all of its rows or none
+                sizes = Counter(h.text.split()[1] for h in hits)
+                assert set(sizes.values()) <= {3}, sizes
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer)]
+    threads += [threading.Thread(target=reader, args=(scope,)) for scope in (None, [1], None, [1])]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=30)
+
+    assert not errors
+    assert len(store.query("shared", k=1000, meeting_ids=[1])) == 120
+
+
+def test_readers_finish_while_a_writer_waits():
+    lock = ReadWriteLock()
+    order = []
+    reading = threading.Event()
+    release_reader = threading.Event()
+
+    def first_reader():
+        with lock.read():
+            reading.set()
+            release_reader.wait(5)
+            order.append("first reader")
+
+    def writer():
+        with lock.write():
+            order.append("writer")
+
+    def late_reader():
+        with lock.read():
+            order.append("late reader")
+
+    threads = [threading.Thread(target=first_reader)]
+    threads[0].start()
+    reading.wait(5)
+    threads.append(threading.Thread(target=writer))
+    threads[1].start()
+    while not lock._writers_waiting:
+        time.sleep(0.001)
+    # a reader arriving now queues behind the waiting writer
+    threads.append(threading.Thread(target=late_reader))
+    threads[2].start()
+    time.sleep(0.05)
+    assert order == []
+
+    release_reader.set()
+    for t in threads:
+        t.join(5)
+    assert order == ["first reader", "writer", "late reader"]